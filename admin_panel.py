@@ -1,5 +1,6 @@
 from aiogram import Bot, types
 from database import Database
+from tracing import tracer
 
 
 class AdminHandler:
@@ -14,6 +15,7 @@ class AdminHandler:
         """Check if user is admin"""
         return user_id in self.admin_ids
     
+    @tracer.traced("admin.handle_admin_action")
     async def handle_admin_action(self, message: types.Message, data: str):
         """Handle admin actions from WebApp"""
         user_id = message.from_user.id
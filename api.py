@@ -0,0 +1,217 @@
+import json
+import math
+import zlib
+from typing import Optional
+
+from aiohttp import web
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+DEFAULT_CHART_POINTS = 50
+MAX_CHART_POINTS = 500
+DEFAULT_SEARCH_RESULTS = 20
+MAX_SEARCH_RESULTS = 100
+MAX_QUERY_LENGTH = 100
+MAX_DELTA_RECORDS = 500  # beyond this a full reload is cheaper than a delta
+RANGE_PARAMS = ("min_price", "max_price", "min_float", "max_float")
+
+
+def json_error(text: str, status: int = 400) -> web.Response:
+    """JSON error response"""
+    return web.json_response({"error": text}, status=status)
+
+
+def parse_int(request: web.Request, name: str, default: int, maximum: int) -> int:
+    """Read an integer query parameter, clamped to [1, maximum]"""
+    try:
+        value = int(request.query.get(name, default))
+    except ValueError:
+        raise web.HTTPBadRequest(text=json.dumps({"error": f"{name} must be an integer"}),
+                                 content_type="application/json")
+    return min(max(value, 1), maximum)
+
+
+def parse_float(request: web.Request, name: str) -> Optional[float]:
+    """Read an optional finite float query parameter"""
+    raw = request.query.get(name)
+    if not raw:
+        return None
+    try:
+        value = float(raw)
+    except ValueError:
+        value = None
+    if value is None or not math.isfinite(value):
+        raise web.HTTPBadRequest(text=json.dumps({"error": f"{name} must be a number"}),
+                                 content_type="application/json")
+    return value
+
+
+def parse_limit(request: web.Request) -> int:
+    """Read the ``limit`` query parameter, clamped to MAX_PAGE_SIZE"""
+    return parse_int(request, "limit", DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+
+
+def catalog_etag(db, request: web.Request) -> str:
+    """Strong ETag for one query against the current catalog version"""
+    query_hash = zlib.crc32(request.path_qs.encode()) & 0xffffffff
+    return f'"{db.instance_id}-{db.version}-{query_hash:08x}"'
+
+
+def not_modified(request: web.Request, etag: str) -> bool:
+    """Check If-None-Match against an ETag"""
+    if_none_match = request.headers.get("If-None-Match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def not_modified_response(etag: str) -> web.Response:
+    """Empty 304 response"""
+    return web.Response(status=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def etag_json(payload, etag: str) -> web.Response:
+    """Compact JSON response that clients must revalidate with the ETag"""
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return web.Response(text=body, content_type="application/json",
+                        headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def auction_summary(auction: dict) -> dict:
+    """Auction fields for listings, without the full bid history"""
+    summary = {key: value for key, value in auction.items() if key != "bids"}
+    summary["bid_count"] = len(auction.get("bids", ()))
+    return summary
+
+
+class CatalogAPI:
+    """JSON catalog endpoints for the Mini App"""
+
+    def __init__(self, db, search_index=None):
+        self.db = db
+        self.search_index = search_index
+
+    def register(self, app: web.Application):
+        app.router.add_get("/api/products", self.list_products)
+        app.router.add_get("/api/auctions", self.list_auctions)
+        app.router.add_get("/api/auctions/{auction_id}/chart", self.auction_chart)
+        app.router.add_get("/api/catalog/changes", self.catalog_changes)
+        if self.search_index is not None:
+            app.router.add_get("/api/search", self.search)
+
+    async def list_products(self, request: web.Request) -> web.Response:
+        """GET /api/products?category=&status=&sort=&min_price=&max_price=&min_float=&max_float=&limit=&cursor="""
+        return await self._list(request, self.db.get_products_page, lambda item: item)
+
+    async def list_auctions(self, request: web.Request) -> web.Response:
+        """GET /api/auctions?category=&status=&sort=&min_price=&max_price=&min_float=&max_float=&limit=&cursor="""
+        return await self._list(request, self.db.get_auctions_page, auction_summary)
+
+    async def auction_chart(self, request: web.Request) -> web.Response:
+        """GET /api/auctions/{auction_id}/chart?points= -- downsampled price history"""
+        points = parse_int(request, "points", DEFAULT_CHART_POINTS, MAX_CHART_POINTS)
+        etag = catalog_etag(self.db, request)
+        if not_modified(request, etag):
+            return not_modified_response(etag)
+
+        auction_id = request.match_info["auction_id"]
+        series = await self.db.run(self.db.get_price_series, auction_id, points)
+        if series is None:
+            return json_error("Auction not found", status=404)
+        return etag_json(series, etag)
+
+    async def catalog_changes(self, request: web.Request) -> web.Response:
+        """GET /api/catalog/changes?since=&instance= -- net changes since a catalog version
+
+        ``since`` is the ``version`` of an earlier response and ``instance``
+        its ``instance``.  The reply lists each changed record once, as it
+        is now, or asks for a full ``resync`` when that version was compacted
+        away, belongs to another (or no) instance, or is too far behind.
+        """
+        try:
+            since = int(request.query["since"])
+        except (KeyError, ValueError):
+            return json_error("since must be an integer")
+        etag = catalog_etag(self.db, request)
+        if not_modified(request, etag):
+            return not_modified_response(etag)
+
+        version = self.db.version
+        changes = None
+        if 0 <= since <= version and request.query.get("instance") == self.db.instance_id:
+            changes = self.db.changes.since(since)
+        if changes is None or len(changes) > MAX_DELTA_RECORDS:
+            return etag_json({"resync": True, "version": version, "instance": self.db.instance_id}, etag)
+        items = await self.db.run(self._read_changes, changes) if changes else []
+        return etag_json({"changes": items, "version": version, "instance": self.db.instance_id}, etag)
+
+    def _read_changes(self, changes) -> list:
+        """Current state of each changed record; a missing record is a delete"""
+        items = []
+        for kind, record_id, op in changes:
+            if kind == "products":
+                record = self.db.get_product(record_id)
+            else:
+                record = self.db.get_auction(record_id)
+                record = record and auction_summary(record)
+            if record is None:
+                items.append({"kind": kind, "id": record_id, "op": "delete"})
+            else:
+                items.append({"kind": kind, "id": record_id,
+                              "op": "update" if op == "delete" else op, "item": record})
+        return items
+
+    async def search(self, request: web.Request) -> web.Response:
+        """GET /api/search?q=&kind=&limit= -- typo-tolerant name search"""
+        limit = parse_int(request, "limit", DEFAULT_SEARCH_RESULTS, MAX_SEARCH_RESULTS)
+        query = request.query.get("q", "")[:MAX_QUERY_LENGTH]
+        kind = request.query.get("kind") or None
+        if kind not in (None, "products", "auctions"):
+            return json_error("kind must be products or auctions")
+        etag = catalog_etag(self.db, request)
+        if not_modified(request, etag):
+            return not_modified_response(etag)
+
+        version = self.db.version
+        hits = self.search_index.search(query, limit=limit, kind=kind)
+        items = []
+        for hit_kind, record_id, score in hits:
+            if hit_kind == "products":
+                record = await self.db.run(self.db.get_product, record_id)
+            else:
+                record = await self.db.run(self.db.get_auction, record_id)
+                record = record and auction_summary(record)
+            if record is not None:
+                items.append({"kind": hit_kind, "score": score, "item": record})
+        return etag_json({"items": items, "version": version}, etag)
+
+    async def _list(self, request: web.Request, get_page, serialize) -> web.Response:
+        limit = parse_limit(request)
+        ranges = {name: parse_float(request, name) for name in RANGE_PARAMS}
+        # Check the ETag before touching storage so a 304 costs no query
+        etag = catalog_etag(self.db, request)
+        if not_modified(request, etag):
+            return not_modified_response(etag)
+
+        version = self.db.version
+        try:
+            items, next_cursor = await self.db.run(
+                get_page,
+                category=request.query.get("category") or None,
+                status=request.query.get("status") or None,
+                limit=limit,
+                cursor=request.query.get("cursor") or None,
+                sort=request.query.get("sort") or "newest",
+                **ranges,
+            )
+        except ValueError as e:
+            return json_error(str(e))
+
+        return etag_json({
+            "items": [serialize(item) for item in items],
+            "next_cursor": next_cursor,
+            "version": version,
+            "instance": self.db.instance_id,
+        }, etag)
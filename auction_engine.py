@@ -0,0 +1,126 @@
+import asyncio
+import math
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+
+@dataclass
+class BidResult:
+    """Outcome of one bid"""
+    accepted: bool
+    reason: str  # leading, outbid, raised_max, too_low, invalid, not_found, closed
+    current_price: float
+    leader_id: Optional[int] = None
+    min_next_bid: Optional[float] = None
+
+
+class AuctionEngine:
+    """Bidding rules on top of the auction records in the database.
+
+    Bids on one lot are serialized by a per-lot FIFO lock, so a burst of
+    concurrent bids resolves in arrival order; a lock lives only while bids
+    hold or wait for it.  Each bid carries the
+    bidder's maximum; the engine keeps the leader's maximum hidden and
+    raises the visible price only as far as needed to beat the runner-up
+    (proxy bidding).  Visible price steps are recorded with ``add_bid``.
+    Hidden maximums are dropped when the lot closes or is deleted
+    (followed through ``Database.subscribe``).
+    """
+
+    def __init__(self, db, min_increment: float = 1.0, increment_ratio: float = 0.0):
+        self.db = db
+        self.min_increment = min_increment
+        self.increment_ratio = increment_ratio
+        # auction_id -> [lock, bids holding or waiting for it]
+        self._locks: Dict[str, list] = {}
+        # auction_id -> (leader user_id, hidden maximum)
+        self._proxies: Dict[str, Tuple[int, float]] = {}
+        db.subscribe(self.on_change)
+
+    def increment(self, price: float) -> float:
+        """Minimum raise over the current price"""
+        return max(self.min_increment, round(price * self.increment_ratio, 2))
+
+    def min_next_bid(self, auction: dict) -> float:
+        price = auction["current_price"]
+        return round(price + self.increment(price), 2)
+
+    def get_leader(self, auction: dict) -> Tuple[Optional[int], float]:
+        """Current leader and their maximum (falls back to the last recorded bid)"""
+        proxy = self._proxies.get(auction["id"])
+        # The leader's bid is always the last one; anything else means another
+        # worker process took the lead and the hidden maximum is stale
+        if proxy is not None and auction["bids"] and auction["bids"][-1]["user_id"] == proxy[0]:
+            return proxy
+        if auction["bids"]:
+            return auction["bids"][-1]["user_id"], auction["current_price"]
+        return None, 0.0
+
+    async def place_bid(self, auction_id: str, user_id: int, max_amount: float) -> BidResult:
+        """Place a bid with a maximum the engine may bid up to automatically"""
+        # NaN slips through every comparison and infinity can never be outbid
+        if not (math.isfinite(max_amount) and max_amount > 0):
+            return BidResult(False, "invalid", 0.0)
+        entry = self._locks.get(auction_id)
+        if entry is None:
+            entry = self._locks[auction_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                return await self._place_bid(auction_id, user_id, max_amount)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[auction_id]
+
+    def on_change(self, entry):
+        """Database listener"""
+        op = entry[0]
+        if op == "bid" or entry[1] != "auctions":
+            return
+        if op == "del" or (op == "patch" and entry[3].get("status", "active") != "active"):
+            self._proxies.pop(entry[2], None)
+
+    async def _place_bid(self, auction_id: str, user_id: int, max_amount: float) -> BidResult:
+        auction = await self.db.run(self.db.get_auction, auction_id)
+        if auction is None:
+            self._proxies.pop(auction_id, None)
+            return BidResult(False, "not_found", 0.0)
+        if auction["status"] != "active":
+            self._proxies.pop(auction_id, None)
+            return BidResult(False, "closed", auction["current_price"])
+
+        price = auction["current_price"]
+        min_next = self.min_next_bid(auction)
+        leader_id, leader_max = self.get_leader(auction)
+
+        if leader_id == user_id:
+            if max_amount > leader_max:
+                self._proxies[auction_id] = (user_id, max_amount)
+                return BidResult(True, "raised_max", price, user_id, min_next)
+            return BidResult(False, "too_low", price, user_id, min_next)
+
+        if max_amount < min_next:
+            return BidResult(False, "too_low", price, leader_id, min_next)
+
+        if leader_id is not None and max_amount <= leader_max:
+            # The standing proxy answers; ties go to the earlier bidder
+            new_price = min(leader_max, round(max_amount + self.increment(max_amount), 2))
+            if max_amount < new_price:
+                await self.db.run(self.db.add_bid, auction_id, user_id, max_amount)
+            if not await self.db.run(self.db.add_bid, auction_id, leader_id, new_price):
+                return BidResult(False, "too_low", price, leader_id, min_next)
+            return BidResult(False, "outbid", new_price, leader_id,
+                             round(new_price + self.increment(new_price), 2))
+
+        # New leader: pay just enough to beat the previous maximum
+        if leader_id is None:
+            new_price = min_next
+        else:
+            new_price = max(min_next, min(max_amount, round(leader_max + self.increment(leader_max), 2)))
+        if not await self.db.run(self.db.add_bid, auction_id, user_id, new_price):
+            # Another worker raised the price after the auction was read
+            return BidResult(False, "too_low", price, leader_id, min_next)
+        self._proxies[auction_id] = (user_id, max_amount)
+        return BidResult(True, "leading", new_price, user_id,
+                         round(new_price + self.increment(new_price), 2))
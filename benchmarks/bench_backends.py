@@ -0,0 +1,91 @@
+"""Compare the in-memory and SQLite storage backends.
+
+Usage:
+    python benchmarks/bench_backends.py --records 10000 --ops 2000
+
+Every operation goes through ``await db.run(...)`` with several concurrent
+callers, the same way the bot handlers reach the database.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from sqlite_database import SqliteDatabase  # noqa: E402
+
+CATEGORIES = ("weapons", "agents")
+CONCURRENCY = 8
+
+
+def populate(db, records: int):
+    product_ids = []
+    for i in range(records):
+        product_ids.append(db.add_product(
+            name=f"AK-47 | Redline #{i}",
+            price=round(random.uniform(1, 5000), 2),
+            category=CATEGORIES[i % len(CATEGORIES)],
+            description="Field-Tested",
+            photo_url="",
+            link=f"https://example.com/{i}",
+            float_value=random.random(),
+        ))
+    auction_id = db.add_auction("AWP | Dragon Lore", 100, "weapons", "", "", "")
+    return product_ids, auction_id
+
+
+async def measure(name: str, ops: int, make_call) -> dict:
+    """Run ``ops`` calls with CONCURRENCY callers and return ops/sec"""
+    counter = iter(range(ops))
+
+    async def worker():
+        for i in counter:
+            await make_call(i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    elapsed = time.perf_counter() - start
+    return {"name": name, "ops": ops, "seconds": elapsed, "ops_per_sec": ops / elapsed}
+
+
+async def bench_backend(db, records: int, ops: int) -> list:
+    product_ids, auction_id = populate(db, records)
+    results = [
+        await measure("list (category+status)", max(ops // 20, 10), lambda i: db.run(
+            db.get_all_products, category=CATEGORIES[i % 2], status="available")),
+        await measure("get product", ops, lambda i: db.run(
+            db.get_product, product_ids[i % len(product_ids)])),
+        await measure("bid", ops, lambda i: db.run(
+            db.add_bid, auction_id, i, 101 + i)),
+        await measure("record purchase", ops, lambda i: db.run(
+            db.record_purchase, product_ids[i % len(product_ids)], i)),
+    ]
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--ops", type=int, default=2000)
+    args = parser.parse_args()
+    random.seed(42)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {
+            "memory": Database(),
+            "sqlite": SqliteDatabase(os.path.join(tmp, "bench.sqlite3")),
+        }
+        print(f"{'backend':<8} {'operation':<24} {'ops/sec':>12}")
+        for backend, db in backends.items():
+            for result in await bench_backend(db, args.records, args.ops):
+                print(f"{backend:<8} {result['name']:<24} {result['ops_per_sec']:>12.0f}")
+        backends["sqlite"].close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
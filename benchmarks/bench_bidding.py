@@ -0,0 +1,58 @@
+"""Bid throughput on a single hot auction lot.
+
+Usage:
+    python benchmarks/bench_bidding.py --bids 20000 --bidders 200
+
+All bidders fire at the same lot concurrently; the engine serializes them
+per lot and resolves proxy bids.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auction_engine import AuctionEngine  # noqa: E402
+from database import Database  # noqa: E402
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bids", type=int, default=20000)
+    parser.add_argument("--bidders", type=int, default=200)
+    args = parser.parse_args()
+    random.seed(42)
+
+    db = Database()
+    engine = AuctionEngine(db, min_increment=1.0)
+    auction_id = db.add_auction("AWP | Dragon Lore", 100, "weapons", "", "", "")
+    per_bidder = args.bids // args.bidders
+    outcomes = {}
+
+    async def bidder(user_id: int):
+        for _ in range(per_bidder):
+            await asyncio.sleep(0)  # interleave bidders like independent updates
+            auction = db.get_auction(auction_id)
+            max_amount = engine.min_next_bid(auction) + random.uniform(0, 20)
+            result = await engine.place_bid(auction_id, user_id, max_amount)
+            outcomes[result.reason] = outcomes.get(result.reason, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(bidder(user_id) for user_id in range(args.bidders)))
+    elapsed = time.perf_counter() - start
+
+    total = per_bidder * args.bidders
+    auction = db.get_auction(auction_id)
+    print(f"bids placed:     {total}")
+    print(f"elapsed:         {elapsed:.3f} s")
+    print(f"throughput:      {total / elapsed:,.0f} bids/s")
+    print(f"outcomes:        {outcomes}")
+    print(f"recorded steps:  {len(auction['bids'])}")
+    print(f"final price:     {auction['current_price']:.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
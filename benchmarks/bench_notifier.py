@@ -0,0 +1,53 @@
+"""Exercise the outbound notification queue against a fake Bot session.
+
+Usage:
+    python benchmarks/bench_notifier.py --purchases 200 --admins 2
+
+Simulates a burst of purchase notifications and reports how long the
+handler-side enqueue took, how many Telegram messages were actually sent
+after coalescing, and how flood-limit answers were absorbed.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_bot import make_fake_bot  # noqa: E402
+from notifier import OutboundQueue  # noqa: E402
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--purchases", type=int, default=200)
+    parser.add_argument("--admins", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.02, help="fake API round trip, seconds")
+    parser.add_argument("--flood-every", type=int, default=7)
+    args = parser.parse_args()
+
+    bot = make_fake_bot(latency=args.latency, flood_every=args.flood_every, retry_after=1)
+    queue = OutboundQueue(bot, per_chat_rate=5, per_chat_burst=5)
+    await queue.start()
+
+    start = time.perf_counter()
+    for i in range(args.purchases):
+        for admin_id in range(1, args.admins + 1):
+            queue.enqueue(admin_id, f"🔔 Новая попытка покупки #{i}")
+    enqueue_elapsed = time.perf_counter() - start
+
+    await queue.join()
+    elapsed = time.perf_counter() - start
+    await queue.stop()
+
+    print(f"notifications:   {args.purchases * args.admins}")
+    print(f"enqueue time:    {enqueue_elapsed * 1000:.2f} ms")
+    print(f"delivered in:    {elapsed:.2f} s")
+    print(f"messages sent:   {queue.sent} (coalesced {queue.coalesced})")
+    print(f"failed:          {queue.failed}")
+    await bot.session.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
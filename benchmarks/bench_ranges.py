@@ -0,0 +1,82 @@
+"""Range-filter query cost as the catalog grows.
+
+Usage:
+    python benchmarks/bench_ranges.py --sizes 10000 50000 200000
+
+For each catalog size, times typical storefront queries through the range
+indexes against a full scan of the same filter.  Indexed cost should stay
+roughly flat while the scan grows linearly.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+
+CATEGORIES = ("rifles", "pistols", "knives", "agents")
+QUERIES = {
+    "FN under 0.07, lowest float": dict(status="available", sort="float_asc", max_float=0.07),
+    "price 100-200, cheapest": dict(status="available", sort="price_asc", min_price=100, max_price=200),
+    "knives 50-60, newest": dict(category="knives", status="available", min_price=50, max_price=60),
+    "float 0.15-0.16, priciest": dict(sort="price_desc", min_float=0.15, max_float=0.16),
+}
+
+
+def populate(db: Database, items: int):
+    for i in range(items):
+        db.add_product(
+            name=f"Item #{i}",
+            price=round(random.lognormvariate(4, 1.2), 2),
+            category=random.choice(CATEGORIES),
+            description="",
+            photo_url="",
+            link="",
+            float_value=round(random.random(), 6),
+        )
+
+
+def full_scan(db: Database, category=None, status=None, sort="newest", min_price=None,
+              max_price=None, min_float=None, max_float=None, limit=50):
+    """What the same query costs without indexes"""
+    matches = [
+        p for p in db.products.values()
+        if (not category or p["category"] == category) and (not status or p["status"] == status)
+        and (min_price is None or p["price"] >= min_price) and (max_price is None or p["price"] <= max_price)
+        and (min_float is None or p["float"] >= min_float) and (max_float is None or p["float"] <= max_float)
+    ]
+    field = {"newest": "created_at", "price_asc": "price", "price_desc": "price",
+             "float_asc": "float"}[sort]
+    matches.sort(key=lambda p: p[field], reverse=sort in ("newest", "price_desc"))
+    return matches[:limit]
+
+
+def timed(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 200000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    random.seed(42)
+
+    print(f"{'items':>8}  {'query':<30} {'indexed':>10} {'scan':>10}")
+    for size in args.sizes:
+        db = Database()
+        populate(db, size)
+        for name, query in QUERIES.items():
+            indexed = timed(lambda: db.get_products_page(limit=50, **query), args.repeat)
+            scan = timed(lambda: full_scan(db, **query), max(args.repeat // 10, 1))
+            print(f"{size:>8}  {name:<30} {indexed:>8.3f}ms {scan:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Search latency over a synthetic CS2 skin catalog.
+
+Usage:
+    python benchmarks/bench_search.py --items 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from search import SearchIndex  # noqa: E402
+
+WEAPONS = ["AK-47", "M4A4", "M4A1-S", "AWP", "Desert Eagle", "USP-S", "Glock-18",
+           "P250", "FAMAS", "Galil AR", "SSG 08", "MP9", "MAC-10", "UMP-45", "P90",
+           "Karambit", "Butterfly Knife", "Bayonet", "Five-SeveN", "Tec-9"]
+SKINS = ["Redline", "Asiimov", "Dragon Lore", "Hyper Beast", "Fade", "Doppler",
+         "Case Hardened", "Vulcan", "Fire Serpent", "Howl", "Neo-Noir", "Printstream",
+         "Bloodsport", "Fever Dream", "Neon Rider", "Slate", "Elite Build", "Safari Mesh",
+         "Boreal Forest", "Crimson Web", "Tiger Tooth", "Lore", "Gamma Doppler", "Marble Fade"]
+WEARS = ["Factory New", "Minimal Wear", "Field-Tested", "Well-Worn", "Battle-Scarred"]
+QUERIES = ["ak47 redline", "awp asimov", "редлайн", "karambit fade", "desert eagle",
+           "m4a1 printstrem", "dragon lor", "glok", "hyper beast", "карамбит допплер"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    random.seed(42)
+
+    db = Database()
+    for i in range(args.items):
+        name = f"{random.choice(WEAPONS)} | {random.choice(SKINS)}"
+        db.add_product(name, random.randint(100, 100000), "weapons",
+                       f"{random.choice(WEARS)} #{i}", "", "", random.random())
+
+    start = time.perf_counter()
+    index = SearchIndex(db)
+    print(f"indexed {len(index)} items in {time.perf_counter() - start:.2f} s")
+
+    for query in QUERIES:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            results = index.search(query, limit=20)
+        elapsed = (time.perf_counter() - start) / args.repeat
+        top = db.get_product(results[0][1])["name"] if results else "-"
+        print(f"{query!r:<24} {elapsed * 1000:7.2f} ms  top: {top}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Offline stand-ins for the Telegram Bot API.
+
+``FakeSession`` plugs into ``aiogram.Bot(session=...)`` and answers every
+method locally, so handlers can be driven without network access.
+"""
+import asyncio
+import itertools
+from datetime import datetime
+from typing import List, Optional
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import GetMe, GetWebhookInfo, SendMessage
+from aiogram.types import Chat, Message, User, WebhookInfo
+
+FAKE_TOKEN = "123456:TEST-fake-token-for-offline-runs"
+
+
+class FakeSession(BaseSession):
+    """Records API calls and answers them with minimal valid objects.
+
+    ``latency`` simulates the round trip, and every ``flood_every``-th
+    SendMessage fails with RetryAfter to exercise flood handling.
+    """
+
+    def __init__(self, latency: float = 0.0, flood_every: int = 0, retry_after: int = 1):
+        super().__init__()
+        self.latency = latency
+        self.flood_every = flood_every
+        self.retry_after = retry_after
+        self.requests: List[object] = []
+        self._message_ids = itertools.count(1)
+        self._sends = 0
+
+    async def make_request(self, bot: Bot, method, timeout: Optional[int] = None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if isinstance(method, SendMessage):
+            self._sends += 1
+            if self.flood_every and self._sends % self.flood_every == 0:
+                raise TelegramRetryAfter(method=method, message="Too Many Requests",
+                                         retry_after=self.retry_after)
+            self.requests.append(method)
+            return Message(
+                message_id=next(self._message_ids),
+                date=datetime.now(),
+                chat=Chat(id=method.chat_id, type="private"),
+                text=method.text,
+            )
+        self.requests.append(method)
+        if isinstance(method, GetMe):
+            return User(id=123456, is_bot=True, first_name="FakeBot", username="fake_bot")
+        if isinstance(method, GetWebhookInfo):
+            return WebhookInfo(url="", has_custom_certificate=False, pending_update_count=0)
+        return True
+
+    async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536,
+                             raise_for_status=True):
+        yield b""
+
+    async def close(self):
+        pass
+
+    def sent_messages(self) -> List[SendMessage]:
+        return [method for method in self.requests if isinstance(method, SendMessage)]
+
+
+def make_fake_bot(**session_options) -> Bot:
+    """Bot instance wired to a FakeSession"""
+    return Bot(token=FAKE_TOKEN, session=FakeSession(**session_options))
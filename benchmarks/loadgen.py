@@ -0,0 +1,469 @@
+"""Load generator for the webhook endpoint, with the Bot API stubbed locally.
+
+Usage:
+    python benchmarks/loadgen.py --updates 5000 --concurrency 50
+    python benchmarks/loadgen.py --rate 200 --duration 30 --mix start=1,buy=4,admin=1,bid=2
+    python benchmarks/loadgen.py --app-env WEBHOOK_QUEUE=1 --app-env DB_BACKEND=sqlite
+    python benchmarks/loadgen.py --target http://127.0.0.1:8080 --token <BOT_TOKEN> --api-port 8081
+
+By default a catalog is seeded (memory backend: a journal snapshot in a
+temporary DATA_DIR; sqlite/shared: the SQLite file), ``bot.py`` is
+started on a free port with TELEGRAM_API_URL pointing at a fake Bot API
+server run by this script, and synthetic Update JSON is posted to the
+webhook path ``/webhook/<token>``.  With ``--target`` an app that is
+already running is driven instead; start it with
+``TELEGRAM_API_URL=http://127.0.0.1:<api-port>`` so its replies land here.
+
+Closed loop (``--concurrency``): that many senders post back to back.
+Open loop (``--rate``): updates arrive on a Poisson schedule whether or
+not earlier ones finished, so queueing shows up in the latency.
+
+The webhook handler answers before the update is handled, so latency
+is measured end to end: from the POST to the app's reply reaching the
+fake Bot API (``--api-latency`` simulates each call's round trip).  Every
+update is sent from its own chat id so its reply can be matched; updates
+with no reply within ``--reply-timeout`` (e.g. rate-limited ones) are
+counted separately.  The POST acknowledgement time is reported too.
+The report has throughput and p50/p95/p99 per update type plus the Bot
+API calls the app made.  Admin purchase notifications go to the admins'
+own chats and are paced like real Telegram (NOTIFY_CHAT_RATE per admin
+chat), so most are still queued when the run ends unless raised with
+``--app-env NOTIFY_CHAT_RATE=...``.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector, web  # noqa: E402
+
+TOKEN = "123456:LOADGEN-fake-token"
+ADMIN_IDS = (900000001, 900000002)
+UPDATE_TYPES = ("start", "buy", "admin", "bid")
+ADMIN_ACTIONS = ("product_created", "auction_created", "product_deleted", "status_changed")
+CATEGORIES = ("weapons", "agents", "knives", "gloves")
+FIRST_USER_ID = 1_000_000
+FIRST_CHAT_ID = 5_000_000_000  # plus the update id: a chat per update, apart from user and admin ids
+
+
+def percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """``start=1,buy=4`` to update type weights"""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in UPDATE_TYPES:
+            raise argparse.ArgumentTypeError(f"unknown update type {name!r} (expected {', '.join(UPDATE_TYPES)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeBotAPI:
+    """Local stand-in for ``api.telegram.org``: ``POST /bot<token>/<method>``.
+
+    Answers every method with a minimal valid result, counts calls per
+    method and optionally sleeps ``latency`` seconds to mimic the round trip.
+    ``expect_reply`` returns a future resolved with the arrival time of the
+    next send or edit call for that chat.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: Dict[str, int] = {}
+        self.webhook_url = ""
+        self.waiters: Dict[int, asyncio.Future] = {}
+        self._message_ids = itertools.count(1)
+
+    def expect_reply(self, chat_id: int) -> asyncio.Future:
+        waiter = self.waiters[chat_id] = asyncio.get_running_loop().create_future()
+        return waiter
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        return app
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] = self.calls.get(method, 0) + 1
+        try:
+            params = await request.post()
+        except ConnectionResetError:
+            return web.Response(status=499)  # the app gave up on the call (e.g. shutting down)
+        if method.startswith(("send", "edit")):
+            self._reply_arrived(params.get("chat_id", ""), time.perf_counter())
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return web.json_response({"ok": True, "result": self._result(method.lower(), params)})
+
+    def _reply_arrived(self, chat_id: str, arrived_at: float):
+        if not chat_id.lstrip("-").isdigit():
+            return
+        waiter = self.waiters.pop(int(chat_id), None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(arrived_at)
+
+    def _result(self, method: str, params):
+        if method == "getme":
+            return {"id": 123456, "is_bot": True, "first_name": "LoadgenBot", "username": "loadgen_bot"}
+        if method == "getwebhookinfo":
+            return {"url": self.webhook_url, "has_custom_certificate": False, "pending_update_count": 0}
+        if method == "setwebhook":
+            self.webhook_url = params.get("url", "")
+        elif method == "deletewebhook":
+            self.webhook_url = ""
+        elif method.startswith("send") or method.startswith("edit"):
+            chat_id = params.get("chat_id", "0")
+            return {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": int(chat_id) if chat_id.lstrip("-").isdigit() else 0, "type": "private"},
+                "text": params.get("text", ""),
+            }
+        elif method == "getfile":
+            return {"file_id": params.get("file_id", ""), "file_unique_id": "loadgen"}
+        return True
+
+
+class UpdateFactory:
+    """Synthetic Telegram updates of each type.
+
+    Buyers and bidders are drawn from ``users`` distinct ids, so per-user
+    rate limits apply as they would to a crowd; admin payloads come from
+    the admin ids (exempt from rate limits).
+    """
+
+    def __init__(self, product_ids: List[str], auctions: Dict[str, float], users: int, seed: int = 42):
+        self.product_ids = product_ids
+        self.auctions = auctions  # auction id -> last price we bid
+        self.users = users
+        self.random = random.Random(seed)
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+
+    def make(self, kind: str) -> dict:
+        update_id = next(self._update_ids)
+        chat_id = FIRST_CHAT_ID + update_id
+        user_id = FIRST_USER_ID + self.random.randrange(self.users)
+        if kind == "start":
+            message = self._message(chat_id, user_id, text="/start")
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": 6}]
+        elif kind == "buy":
+            product_id = self.random.choice(self.product_ids) if self.product_ids else "missing"
+            message = self._message(chat_id, user_id, web_app_data=f"buy:{product_id}")
+        elif kind == "admin":
+            message = self._message(chat_id, self.random.choice(ADMIN_IDS),
+                                    web_app_data=f"admin:{self.random.choice(ADMIN_ACTIONS)}")
+        else:
+            if self.auctions:
+                auction_id = self.random.choice(list(self.auctions))
+                amount = self.auctions[auction_id] + self.random.uniform(1, 50)
+                self.auctions[auction_id] = amount
+            else:
+                auction_id, amount = "missing", 100.0
+            message = self._message(chat_id, user_id, web_app_data=f"bid:{auction_id}:{amount:.2f}")
+        return {"update_id": update_id, "message": message}
+
+    def _message(self, chat_id: int, user_id: int, text: Optional[str] = None, web_app_data: Optional[str] = None) -> dict:
+        message = {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": f"User{user_id}",
+                     "language_code": self.random.choice(("ru", "uz"))},
+        }
+        if text is not None:
+            message["text"] = text
+        if web_app_data is not None:
+            message["web_app_data"] = {"data": web_app_data, "button_text": "Shop"}
+        return message
+
+
+class Results:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {kind: [] for kind in UPDATE_TYPES}
+        self.acks: Dict[str, List[float]] = {kind: [] for kind in UPDATE_TYPES}
+        self.errors: Dict[str, int] = {kind: 0 for kind in UPDATE_TYPES}
+        self.no_reply: Dict[str, int] = {kind: 0 for kind in UPDATE_TYPES}
+
+    def report(self, elapsed: float, api_calls: Dict[str, int]) -> dict:
+        per_type = {}
+        for kind, samples in self.latencies.items():
+            if not samples and not self.errors[kind] and not self.no_reply[kind]:
+                continue
+            entry = {"count": len(samples), "errors": self.errors[kind], "no_reply": self.no_reply[kind],
+                     "ops_per_sec": round(len(samples) / elapsed, 1)}
+            if samples:
+                entry.update({f"p{q}_ms": round(percentile(samples, q / 100) * 1000, 2) for q in (50, 95, 99)})
+            if self.acks[kind]:
+                entry.update({f"ack_p{q}_ms": round(percentile(self.acks[kind], q / 100) * 1000, 2)
+                              for q in (50, 99)})
+            per_type[kind] = entry
+        total = sum(len(samples) for samples in self.latencies.values())
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "updates": total,
+            "errors": sum(self.errors.values()),
+            "no_reply": sum(self.no_reply.values()),
+            "updates_per_sec": round(total / elapsed, 1),
+            "types": per_type,
+            "bot_api_calls": dict(sorted(api_calls.items())),
+        }
+
+
+async def post_update(session: ClientSession, url: str, fake_api: FakeBotAPI, kind: str, update: dict,
+                      results: Results, reply_timeout: float):
+    """POST one update and wait for the app's reply to its chat"""
+    chat_id = update["message"]["chat"]["id"]
+    waiter = fake_api.expect_reply(chat_id)
+    body = json.dumps(update)
+    started = time.perf_counter()
+    try:
+        async with session.post(url, data=body, headers={"Content-Type": "application/json"}) as response:
+            await response.read()
+            ok = response.status == 200
+    except Exception:
+        ok = False
+    if not ok:
+        fake_api.waiters.pop(chat_id, None)
+        results.errors[kind] += 1
+        return
+    results.acks[kind].append(time.perf_counter() - started)
+    try:
+        replied_at = await asyncio.wait_for(waiter, reply_timeout)
+    except asyncio.TimeoutError:
+        fake_api.waiters.pop(chat_id, None)
+        results.no_reply[kind] += 1
+        return
+    results.latencies[kind].append(replied_at - started)
+
+
+async def closed_loop(session, url, fake_api: FakeBotAPI, factory: UpdateFactory, kinds, weights,
+                      results: Results, reply_timeout: float, concurrency: int, updates: int, deadline: float):
+    remaining = itertools.count()
+
+    async def sender():
+        while next(remaining) < updates and time.perf_counter() < deadline:
+            kind = factory.random.choices(kinds, weights)[0]
+            await post_update(session, url, fake_api, kind, factory.make(kind), results, reply_timeout)
+
+    await asyncio.gather(*(sender() for _ in range(concurrency)))
+
+
+async def open_loop(session, url, fake_api: FakeBotAPI, factory: UpdateFactory, kinds, weights,
+                    results: Results, reply_timeout: float, rate: float, updates: int, deadline: float):
+    tasks = set()
+    next_at = time.perf_counter()
+    for _ in range(updates):
+        if next_at >= deadline:
+            break
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        kind = factory.random.choices(kinds, weights)[0]
+        task = asyncio.create_task(
+            post_update(session, url, fake_api, kind, factory.make(kind), results, reply_timeout))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        next_at += factory.random.expovariate(rate)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+async def seed_catalog(app_env: Dict[str, str], data_dir: str, products: int, auctions: int):
+    """Create products and auction lots where the spawned app will load them from"""
+    backend = app_env.get("DB_BACKEND", "memory")
+    rng = random.Random(7)
+    items = [{"name": f"Skin {i}", "price": rng.randint(100, 100000), "category": rng.choice(CATEGORIES),
+              "float": round(rng.random(), 4)} for i in range(products)]
+    if backend in ("sqlite", "shared"):
+        from sqlite_database import SqliteDatabase
+        db = SqliteDatabase(app_env.setdefault("SQLITE_PATH", os.path.join(data_dir, "loadgen.sqlite3")))
+        db.add_products(items)
+        for i in range(auctions):
+            db.add_auction(f"Lot {i}", rng.randint(100, 10000), rng.choice(CATEGORIES), "", "", "")
+        db.close()
+        return
+    from database import Database
+    from persistence import Journal
+    db = Database()
+    journal = Journal(data_dir)
+    db.attach_journal(journal)
+    await journal.start(db)
+    db.add_products(items)
+    for i in range(auctions):
+        db.add_auction(f"Lot {i}", rng.randint(100, 10000), rng.choice(CATEGORIES), "", "", "")
+    await journal.snapshot()
+    await journal.close()
+    app_env["DATA_DIR"] = data_dir
+
+
+async def fetch_ids(session: ClientSession, base_url: str, path: str, limit: int) -> List[dict]:
+    """Page through a catalog listing of the app under test"""
+    items, cursor = [], None
+    while len(items) < limit:
+        params = {"limit": "200"}
+        if cursor:
+            params["cursor"] = cursor
+        async with session.get(f"{base_url}{path}", params=params) as response:
+            if response.status != 200:
+                break
+            page = await response.json()
+        items.extend(page["items"])
+        cursor = page.get("next_cursor")
+        if not cursor:
+            break
+    return items[:limit]
+
+
+async def wait_healthy(session: ClientSession, base_url: str, process: Optional[subprocess.Popen],
+                       timeout: float) -> bool:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process is not None and process.poll() is not None:
+            return False
+        try:
+            async with session.get(f"{base_url}/health") as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            pass
+        await asyncio.sleep(0.1)
+    return False
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("start=2,buy=4,admin=1,bid=3"),
+                        help="update type weights, e.g. start=2,buy=4,admin=1,bid=3")
+    parser.add_argument("--updates", type=int, default=5000, help="stop after this many updates")
+    parser.add_argument("--duration", type=float, default=60.0, help="stop after this many seconds")
+    parser.add_argument("--concurrency", type=int, default=32, help="closed loop: senders in flight")
+    parser.add_argument("--rate", type=float, help="open loop: mean arrivals per second (overrides --concurrency)")
+    parser.add_argument("--users", type=int, default=10000, help="distinct synthetic users")
+    parser.add_argument("--products", type=int, default=2000, help="products to seed")
+    parser.add_argument("--auctions", type=int, default=50, help="auction lots to seed")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="fake Bot API round trip, seconds")
+    parser.add_argument("--reply-timeout", type=float, default=10.0,
+                        help="seconds to wait for the reply to an update before counting it as unanswered")
+    parser.add_argument("--api-port", type=int, default=0, help="fake Bot API port (0: any free port)")
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the spawned bot.py (repeatable)")
+    parser.add_argument("--target", help="base URL of an app that is already running (no spawn, no seeding)")
+    parser.add_argument("--token", default=TOKEN, help="bot token of the --target app (its webhook path)")
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+
+    fake_api = FakeBotAPI(latency=args.api_latency)
+    api_runner = web.AppRunner(fake_api.app(), access_log=None)
+    await api_runner.setup()
+    api_port = args.api_port or free_port()
+    await web.TCPSite(api_runner, "127.0.0.1", api_port).start()
+
+    process = None
+    data_dir = None
+    log_file = None
+    token = args.token
+    base_url = args.target.rstrip("/") if args.target else None
+    connector = TCPConnector(limit=0)
+    session = ClientSession(connector=connector, timeout=ClientTimeout(total=60))
+    try:
+        if base_url is None:
+            token = TOKEN
+            port = free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            data_dir = tempfile.mkdtemp(prefix="loadgen-")
+            app_env = dict(item.split("=", 1) for item in args.app_env)
+            print(f"Seeding {args.products} products and {args.auctions} auctions...")
+            await seed_catalog(app_env, data_dir, args.products, args.auctions)
+            env = dict(os.environ, BOT_TOKEN=token, PORT=str(port), ADMIN_IDS=",".join(map(str, ADMIN_IDS)),
+                       TELEGRAM_API_URL=f"http://127.0.0.1:{api_port}", RENDER_EXTERNAL_URL=base_url,
+                       WEBAPP_URL=base_url, **app_env)
+            log_file = open(os.path.join(data_dir, "app.log"), "w+")
+            process = subprocess.Popen([sys.executable, "bot.py"], cwd=ROOT, env=env,
+                                       stdout=log_file, stderr=subprocess.STDOUT)
+        if not await wait_healthy(session, base_url, process, args.startup_timeout):
+            if log_file is not None:
+                log_file.seek(0)
+                print(log_file.read()[-4000:], file=sys.stderr)
+            raise SystemExit(f"App at {base_url} did not become healthy")
+
+        products = await fetch_ids(session, base_url, "/api/products", 20000)
+        auctions = await fetch_ids(session, base_url, "/api/auctions", 1000)
+        factory = UpdateFactory(
+            [product["id"] for product in products],
+            {auction["id"]: float(auction.get("current_price") or 0) for auction in auctions},
+            args.users,
+        )
+        kinds = list(args.mix)
+        weights = [args.mix[kind] for kind in kinds]
+        url = f"{base_url}/webhook/{token}"
+        results = Results()
+        mode = f"rate {args.rate:g}/s" if args.rate else f"concurrency {args.concurrency}"
+        print(f"Posting to {base_url}/webhook/... ({mode}, {len(products)} products, {len(auctions)} auctions)")
+
+        started = time.perf_counter()
+        deadline = started + args.duration
+        if args.rate:
+            await open_loop(session, url, fake_api, factory, kinds, weights, results, args.reply_timeout,
+                            args.rate, args.updates, deadline)
+        else:
+            await closed_loop(session, url, fake_api, factory, kinds, weights, results, args.reply_timeout,
+                              args.concurrency, args.updates, deadline)
+        report = results.report(time.perf_counter() - started, fake_api.calls)
+    finally:
+        await session.close()
+        if process is not None:
+            process.send_signal(signal.SIGTERM)
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if log_file is not None:
+            log_file.close()
+        if data_dir is not None:
+            shutil.rmtree(data_dir, ignore_errors=True)
+        await api_runner.cleanup()
+
+    print(f"\n{report['updates']} updates in {report['elapsed_s']} s: "
+          f"{report['updates_per_sec']} updates/s, {report['errors']} errors, {report['no_reply']} unanswered")
+    print(f"{'type':<8}{'count':>8}{'errors':>8}{'no reply':>10}{'ops/s':>10}"
+          f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ack p50':>10}")
+    for kind, entry in report["types"].items():
+        print(f"{kind:<8}{entry['count']:>8}{entry['errors']:>8}{entry['no_reply']:>10}{entry['ops_per_sec']:>10}"
+              f"{entry.get('p50_ms', '-'):>10}{entry.get('p95_ms', '-'):>10}{entry.get('p99_ms', '-'):>10}"
+              f"{entry.get('ack_p50_ms', '-'):>10}")
+    print("Bot API calls: " + ", ".join(f"{method} {count}" for method, count in report["bot_api_calls"].items()))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
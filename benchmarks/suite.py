@@ -0,0 +1,320 @@
+"""Offline benchmark suite with a machine-readable report.
+
+Usage:
+    python benchmarks/suite.py --output bench-report.json
+    python benchmarks/suite.py --sizes 1000 100000 --baseline bench-baseline.json
+    python benchmarks/suite.py --only http handlers
+
+Groups:
+    storage   Database add/get/list/page/bid/purchase at each catalog size
+    handlers  ShopHandler.handle_purchase and AdminHandler.handle_admin_action
+              against a fake Bot session
+    http      serve_webapp/serve_static through an aiohttp test client
+
+The report is JSON: ``meta`` (interpreter, platform, commit, sizes) and
+``results`` keyed by ``group/case@size`` with ops/sec and p50/p95 latency
+of the best of three rounds.
+With ``--baseline`` every shared case is compared by median latency and the
+exit status is 1 when any case got slower by more than ``--threshold``.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from aiogram.types import Chat, Message, User  # noqa: E402
+from aiohttp import web  # noqa: E402
+from aiohttp.test_utils import TestClient, TestServer  # noqa: E402
+
+from admin_panel import AdminHandler  # noqa: E402
+from benchmarks.fake_bot import make_fake_bot  # noqa: E402
+from bid_history import BidHistory  # noqa: E402
+from database import Database  # noqa: E402
+from shop import ShopHandler  # noqa: E402
+
+GROUPS = ("storage", "handlers", "http")
+CATEGORIES = ("weapons", "agents", "knives", "gloves")
+ADMIN_IDS = [1, 2]
+OP_BUDGET = 2_000_000  # records touched per case, caps ops for O(n) calls on big catalogs
+ROUNDS = 3  # each case reports its best round, which filters out noisy neighbours
+
+
+def percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def summarize(samples) -> dict:
+    """Per-op latencies (seconds) to a report entry"""
+    total = sum(samples)
+    return {
+        "ops": len(samples),
+        "ops_per_sec": round(len(samples) / total, 1) if total else None,
+        "p50_us": round(percentile(samples, 0.50) * 1e6, 2),
+        "p95_us": round(percentile(samples, 0.95) * 1e6, 2),
+    }
+
+
+def measure(func, ops: int) -> dict:
+    """Time ``func(i)`` over ROUNDS rounds of ``ops`` calls; keep the best round"""
+    for i in range(max(ops // 10, 1)):
+        func(i)
+    rounds = []
+    clock = time.perf_counter
+    for _ in range(ROUNDS):
+        gc.collect()
+        samples = []
+        for i in range(ops):
+            start = clock()
+            func(i)
+            samples.append(clock() - start)
+        rounds.append(summarize(samples))
+    return min(rounds, key=lambda result: result["p50_us"])
+
+
+async def measure_async(func, ops: int) -> dict:
+    """Time ``await func(i)`` like ``measure``"""
+    for i in range(max(ops // 10, 1)):
+        await func(i)
+    rounds = []
+    clock = time.perf_counter
+    for _ in range(ROUNDS):
+        gc.collect()
+        samples = []
+        for i in range(ops):
+            start = clock()
+            await func(i)
+            samples.append(clock() - start)
+        rounds.append(summarize(samples))
+    return min(rounds, key=lambda result: result["p50_us"])
+
+
+def populated_db(size: int) -> Database:
+    """Database with ``size`` products and a few auctions, loaded like a restore"""
+    rng = random.Random(size)
+    base = datetime(2024, 1, 1)
+    products = {}
+    for i in range(size):
+        product_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        products[product_id] = {
+            "id": product_id,
+            "name": f"AK-47 | Redline #{i}",
+            "price": round(rng.uniform(1, 5000), 2),
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "description": "Field-Tested",
+            "photo_url": "",
+            "link": f"https://example.com/{i}",
+            "float": round(rng.random(), 6),
+            "status": "available" if rng.random() < 0.8 else "sold",
+            "created_at": (base + timedelta(seconds=i)).isoformat(),
+        }
+    auctions = {}
+    for i in range(max(size // 100, 1)):
+        auction_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        auctions[auction_id] = {
+            "id": auction_id,
+            "name": f"AWP | Dragon Lore #{i}",
+            "starting_price": 100.0,
+            "current_price": 100.0,
+            "category": "weapons",
+            "description": "",
+            "photo_url": "",
+            "link": "",
+            "float": round(rng.random(), 6),
+            "status": "active",
+            "bids": BidHistory(),
+            "created_at": (base + timedelta(seconds=i)).isoformat(),
+        }
+    db = Database()
+    db.load_state({"products": products, "auctions": auctions, "purchases": {}})
+    db.rebuild_indexes()
+    return db
+
+
+def bench_storage(size: int) -> dict:
+    db = populated_db(size)
+    product_ids = list(db.products)
+    auction_id = next(iter(db.auctions))
+    price = [db.auctions[auction_id]["current_price"]]
+    listing_ops = max(min(200, OP_BUDGET // size), 3)
+
+    def add_bid(i):
+        price[0] += 1
+        db.add_bid(auction_id, i, price[0])
+
+    results = {
+        "get_product": measure(lambda i: db.get_product(product_ids[i % size]), 20000),
+        "products_page": measure(lambda i: db.get_products_page(
+            category=CATEGORIES[i % len(CATEGORIES)], status="available", limit=50), 5000),
+        "products_page_price": measure(lambda i: db.get_products_page(
+            status="available", sort="price_asc", min_price=100 + i % 100, limit=50), 2000),
+        "list_all_filtered": measure(lambda i: db.get_all_products(
+            category=CATEGORIES[i % len(CATEGORIES)], status="available"), listing_ops),
+        "category_counts": measure(lambda i: db.get_category_counts("available"), 5000),
+        "add_bid": measure(add_bid, 20000),
+        "record_purchase": measure(lambda i: db.record_purchase(product_ids[i % size], i), 20000),
+        "add_product": measure(lambda i: db.add_product(
+            f"M4A4 | Howl #{i}", 100 + i % 900, CATEGORIES[i % len(CATEGORIES)],
+            "Minimal Wear", "", "", (i % 1000) / 1000), 5000),
+    }
+    return results
+
+
+def make_message(bot, user_id: int, text: str = "") -> Message:
+    return Message(
+        message_id=user_id,
+        date=datetime.now(),
+        chat=Chat(id=user_id, type="private"),
+        from_user=User(id=user_id, is_bot=False, first_name="Bench", username="bench"),
+        text=text,
+    ).as_(bot)
+
+
+async def bench_handlers(size: int) -> dict:
+    db = populated_db(size)
+    bot = make_fake_bot()
+    shop = ShopHandler(db, bot, ADMIN_IDS)
+    admin = AdminHandler(db, bot, ADMIN_IDS)
+    product_ids = [product["id"] for product in db.get_all_products(status="available")[:1000]]
+    buyer = make_message(bot, 1000)
+    admin_message = make_message(bot, ADMIN_IDS[0])
+    actions = ("admin:product_created", "admin:auction_created",
+               "admin:product_deleted", "admin:status_changed")
+
+    results = {
+        "handle_purchase": await measure_async(
+            lambda i: shop.handle_purchase(buyer, product_ids[i % len(product_ids)]), 2000),
+        "handle_admin_action": await measure_async(
+            lambda i: admin.handle_admin_action(admin_message, actions[i % len(actions)]), 5000),
+    }
+    await bot.session.close()
+    return results
+
+
+async def bench_http() -> dict:
+    # bot.py reads its config at import time; it builds the Bot but makes no requests
+    os.environ.setdefault("STATIC_ROOT", os.path.join(ROOT, "static-site"))
+    import bot
+    logging.getLogger("aiohttp.access").setLevel(logging.WARNING)
+
+    app = web.Application()
+    app.router.add_get("/", bot.serve_webapp)
+    app.router.add_get("/static/{filename}", bot.serve_static)
+
+    async with TestClient(TestServer(app)) as client:
+        etag = (await client.get("/static/app.js")).headers["ETag"]
+
+        async def get(path, headers=None):
+            async with client.get(path, headers=headers) as response:
+                await response.read()
+
+        results = {
+            "webapp": await measure_async(lambda i: get("/"), 2000),
+            "static_gzip": await measure_async(
+                lambda i: get("/static/app.js", {"Accept-Encoding": "gzip"}), 2000),
+            "static_identity": await measure_async(
+                lambda i: get("/static/app.js", {"Accept-Encoding": "identity"}), 2000),
+            "static_not_modified": await measure_async(
+                lambda i: get("/static/app.js", {"If-None-Match": etag}), 2000),
+        }
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> bool:
+    """Print per-case median latency changes; return True when nothing regressed.
+
+    The median is compared rather than mean ops/sec, so a few scheduler
+    hiccups on a shared machine do not flag a regression.
+    """
+    ok = True
+    print(f"\n{'case':<44} {'base p50':>10} {'p50':>10} {'change':>8}")
+    for name, result in report["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before or not before.get("p50_us") or not result.get("p50_us"):
+            continue
+        change = result["p50_us"] / before["p50_us"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            ok = False
+        print(f"{name:<44} {before['p50_us']:>8.1f}us {result['p50_us']:>8.1f}us"
+              f" {change:>+7.1%}{flag}")
+    return ok
+
+
+async def run(args) -> dict:
+    results = {}
+
+    def record(group, size, cases):
+        for case, result in cases.items():
+            key = f"{group}/{case}" + (f"@{size}" if size else "")
+            results[key] = result
+            print(f"{key:<44} {result['ops_per_sec']:>12.0f} ops/s"
+                  f"  p50 {result['p50_us']:>9.1f}us  p95 {result['p95_us']:>9.1f}us", flush=True)
+
+    if "storage" in args.only:
+        for size in args.sizes:
+            record("storage", size, bench_storage(size))
+    if "handlers" in args.only:
+        record("handlers", args.handler_size, await bench_handlers(args.handler_size))
+    if "http" in args.only:
+        record("http", None, await bench_http())
+
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": args.sizes,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--handler-size", type=int, default=10000,
+                        help="catalog size behind the handler benchmarks")
+    parser.add_argument("--only", nargs="+", choices=GROUPS, default=list(GROUPS))
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="compare against a saved report")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="median latency increase that counts as a regression (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if not compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
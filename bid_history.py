@@ -0,0 +1,106 @@
+import time
+from array import array
+from bisect import bisect_right
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+
+class BidHistory:
+    """Column-wise bid history of one auction.
+
+    Amounts, user ids and epoch timestamps live in typed arrays (24 bytes
+    per bid).  Indexing and iteration still yield the familiar
+    ``{"user_id", "amount", "timestamp"}`` dicts, built on demand.
+    """
+
+    __slots__ = ("amounts", "user_ids", "timestamps")
+
+    def __init__(self):
+        self.amounts = array("d")
+        self.user_ids = array("q")
+        self.timestamps = array("d")
+
+    def append(self, user_id: int, amount: float, timestamp: Optional[float] = None):
+        self.amounts.append(amount)
+        self.user_ids.append(user_id)
+        self.timestamps.append(time.time() if timestamp is None else timestamp)
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def __bool__(self) -> bool:
+        return len(self.amounts) > 0
+
+    def __eq__(self, other) -> bool:
+        # Value equality, so re-applying an unchanged auction is not a patch
+        if not isinstance(other, BidHistory):
+            return NotImplemented
+        return (self.amounts == other.amounts and self.user_ids == other.user_ids
+                and self.timestamps == other.timestamps)
+
+    __hash__ = None  # mutable
+
+    def __getitem__(self, index: int) -> dict:
+        return {
+            "user_id": self.user_ids[index],
+            "amount": self.amounts[index],
+            "timestamp": datetime.fromtimestamp(self.timestamps[index]).isoformat(),
+        }
+
+    def __iter__(self):
+        for index in range(len(self.amounts)):
+            yield self[index]
+
+    def to_columns(self) -> Dict[str, list]:
+        """Plain lists for JSON snapshots"""
+        return {
+            "amounts": self.amounts.tolist(),
+            "user_ids": self.user_ids.tolist(),
+            "timestamps": self.timestamps.tolist(),
+        }
+
+    @classmethod
+    def from_columns(cls, columns) -> "BidHistory":
+        """Rebuild from ``to_columns`` output or a legacy list of bid dicts"""
+        history = cls()
+        if isinstance(columns, dict):
+            history.amounts.extend(columns["amounts"])
+            history.user_ids.extend(columns["user_ids"])
+            history.timestamps.extend(columns["timestamps"])
+        else:
+            for bid in columns:
+                history.append(bid["user_id"], bid["amount"],
+                               datetime.fromisoformat(bid["timestamp"]).timestamp())
+        return history
+
+    def price_series(self, points: int, start: Optional[float] = None,
+                     end: Optional[float] = None) -> Dict[str, list]:
+        """Downsampled price-over-time series, see ``downsample_series``"""
+        return downsample_series(self.timestamps, self.amounts, points, start, end)
+
+
+def downsample_series(timestamps: Sequence[float], amounts: Sequence[float], points: int,
+                      start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, list]:
+    """Sample a step-wise price series at ``points`` evenly spaced times.
+
+    ``timestamps`` must be ascending.  Each sample is the price in effect
+    at that moment, found by binary search, so the cost is
+    O(points * log n) and the history is never copied.
+    """
+    if not timestamps or points < 1:
+        return {"t": [], "price": []}
+    start = timestamps[0] if start is None else start
+    end = timestamps[-1] if end is None else end
+    if points == 1 or end <= start:
+        index = bisect_right(timestamps, end) - 1
+        return {"t": [end], "price": [amounts[index] if index >= 0 else None]}
+
+    step = (end - start) / (points - 1)
+    times: List[float] = []
+    prices: List[Optional[float]] = []
+    for i in range(points):
+        moment = end if i == points - 1 else start + step * i
+        index = bisect_right(timestamps, moment) - 1
+        times.append(round(moment, 3))
+        prices.append(amounts[index] if index >= 0 else None)
+    return {"t": times, "price": prices}
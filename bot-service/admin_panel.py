@@ -3,12 +3,11 @@ from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-import os
 
 from database import db
+from shop import ADMIN_IDS, ORDER_STATUSES, ORDERS_PAGE_SIZE, format_order
 
 admin_router = Router()
-ADMIN_IDS = [int(id.strip()) for id in os.getenv("ADMIN_IDS", "1939282952,5266027747").split(",")]
 
 class ProductForm(StatesGroup):
     category = State()
@@ -24,6 +23,7 @@ async def show_admin_menu(message: types.Message):
         [InlineKeyboardButton(text="➕ Добавить товар", callback_data="admin_add_product")],
         [InlineKeyboardButton(text="📦 Список товаров", callback_data="admin_list_products")],
         [InlineKeyboardButton(text="🎯 Аукционы", callback_data="admin_auctions")],
+        [InlineKeyboardButton(text="🧾 Заказы", callback_data="admin_orders")],
     ])
     
     await message.answer(
@@ -145,3 +145,60 @@ async def list_products(callback: types.CallbackQuery):
         text += f"   ID: {product['id']}\n\n"
     
     await callback.message.edit_text(text)
+
+@admin_router.callback_query(F.data == "admin_orders")
+async def show_order_queues(callback: types.CallbackQuery):
+    """Показать очереди заказов по статусам"""
+    if callback.from_user.id not in ADMIN_IDS:
+        await callback.answer("❌ Нет доступа", show_alert=True)
+        return
+    
+    counts = db.count_orders_by_status()
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=f"{label} ({counts[status]})", callback_data=f"admin_orders_{status}")]
+        for status, label in ORDER_STATUSES.items()
+    ])
+    await callback.message.edit_text("🧾 Заказы по статусам:", reply_markup=keyboard)
+    await callback.answer()
+
+@admin_router.callback_query(F.data.startswith("admin_orders_"))
+async def list_order_queue(callback: types.CallbackQuery):
+    """Показать заказы в статусе (старые первыми)"""
+    if callback.from_user.id not in ADMIN_IDS:
+        await callback.answer("❌ Нет доступа", show_alert=True)
+        return
+    
+    # admin_orders_{status} или admin_orders_{status}_{cursor}
+    status, _, cursor = callback.data[len("admin_orders_"):].partition("_")
+    try:
+        orders, next_cursor = db.get_orders_by_status(status, limit=ORDERS_PAGE_SIZE, cursor=cursor or None)
+    except ValueError:
+        await callback.answer("❌ Неверный запрос", show_alert=True)
+        return
+    
+    if not orders:
+        empty_text = f"{ORDER_STATUSES[status]}: заказов нет."
+        await callback.message.edit_text(empty_text)
+        await callback.answer(empty_text)
+        return
+    
+    text = f"{ORDER_STATUSES[status]}:\n\n"
+    buttons = []
+    for order in orders:
+        text += f"{format_order(order)}\n   Покупатель: {order['user_id']}\n\n"
+        if status == "pending":
+            buttons.append([
+                InlineKeyboardButton(text=f"✅ #{order['id']}", callback_data=f"process_order_{order['id']}"),
+                InlineKeyboardButton(text="❌", callback_data=f"cancel_order_{order['id']}")
+            ])
+        elif status == "processing":
+            buttons.append([
+                InlineKeyboardButton(text=f"✅ Завершить #{order['id']}", callback_data=f"complete_order_{order['id']}"),
+                InlineKeyboardButton(text="❌", callback_data=f"cancel_order_{order['id']}")
+            ])
+    if next_cursor:
+        buttons.append([InlineKeyboardButton(
+            text="➡️ Далее", callback_data=f"admin_orders_{status}_{next_cursor}"
+        )])
+    await callback.message.edit_text(text, reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons))
+    await callback.answer()
@@ -6,7 +6,7 @@ from aiogram.filters import Command
 from aiogram.types import WebAppInfo, InlineKeyboardMarkup, InlineKeyboardButton
 
 from database import db
-from shop import handle_purchase_request
+from shop import ADMIN_IDS, handle_purchase_request, shop_router
 from admin_panel import admin_router
 
 # Настройка логирования
@@ -15,7 +15,6 @@ logger = logging.getLogger(__name__)
 
 # Инициализация бота
 BOT_TOKEN = os.getenv("BOT_TOKEN", "7504123410:AAEznGqRafbyrBx2e34HzsxztWV201HRMxE")
-ADMIN_IDS = [int(id.strip()) for id in os.getenv("ADMIN_IDS", "1939282952,5266027747").split(",")]
 WEBAPP_URL = os.getenv("WEBAPP_URL", "https://csgosalleruzb-1.onrender.com")
 
 bot = Bot(token=BOT_TOKEN)
@@ -23,6 +22,7 @@ dp = Dispatcher()
 
 # Подключаем роутер админ-панели
 dp.include_router(admin_router)
+dp.include_router(shop_router)
 
 @dp.message(Command("start"))
 async def cmd_start(message: types.Message):
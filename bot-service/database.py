@@ -1,5 +1,24 @@
+from bisect import bisect_left, bisect_right, insort
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+
+# Допустимые переходы статусов заказа
+ORDER_TRANSITIONS = {
+    "pending": ("processing", "cancelled"),
+    "processing": ("completed", "cancelled"),
+    "completed": (),
+    "cancelled": (),
+}
+ORDER_PREFIX = "order_"
+
+def _order_number(order_id: str) -> int:
+    """Порядковый номер заказа из его ID"""
+    if not isinstance(order_id, str) or not order_id.startswith(ORDER_PREFIX):
+        raise ValueError(f"Invalid order id: {order_id!r}")
+    try:
+        return int(order_id[len(ORDER_PREFIX):])
+    except ValueError:
+        raise ValueError(f"Invalid order id: {order_id!r}") from None
 
 class Database:
     def __init__(self):
@@ -8,6 +27,11 @@ class Database:
         self.purchases: List[dict] = []
         self.next_product_id = 1
         self.next_auction_id = 1
+        self.orders: Dict[str, dict] = {}
+        self.next_order_id = 1
+        # Номера заказов по возрастанию: по пользователю и по статусу
+        self.user_orders: Dict[int, List[int]] = {}
+        self.status_orders: Dict[str, List[int]] = {status: [] for status in ORDER_TRANSITIONS}
         
     # Products
     def add_product(self, category: str, name: str, price: float, 
@@ -99,6 +123,87 @@ class Database:
             "amount": amount,
             "timestamp": datetime.now().isoformat()
         })
+    
+    # Orders
+    def create_order(self, user_id: int, item_id: str, item_type: str, amount: float,
+                     status: str = "pending") -> Optional[str]:
+        """Создать заказ; новый заказ может быть только в статусе pending"""
+        if status != "pending":
+            return None
+        number = self.next_order_id
+        self.next_order_id += 1
+        order_id = f"{ORDER_PREFIX}{number}"
+        now = datetime.now().isoformat()
+        
+        self.orders[order_id] = {
+            "id": order_id,
+            "user_id": user_id,
+            "item_id": item_id,
+            "item_type": item_type,
+            "amount": amount,
+            "status": status,
+            "created_at": now,
+            "updated_at": now
+        }
+        # Номера растут, поэтому append сохраняет порядок
+        self.user_orders.setdefault(user_id, []).append(number)
+        self.status_orders[status].append(number)
+        return order_id
+    
+    def get_order(self, order_id: str) -> Optional[dict]:
+        return self.orders.get(order_id)
+    
+    def can_transition(self, order_id: str, status: str) -> bool:
+        order = self.orders.get(order_id)
+        return order is not None and status in ORDER_TRANSITIONS[order["status"]]
+    
+    def update_order_status(self, order_id: str, status: str) -> bool:
+        """Перевести заказ в новый статус, если переход допустим"""
+        if not self.can_transition(order_id, status):
+            return False
+        order = self.orders[order_id]
+        number = _order_number(order_id)
+        
+        queue = self.status_orders[order["status"]]
+        position = bisect_left(queue, number)
+        if position < len(queue) and queue[position] == number:
+            del queue[position]
+        insort(self.status_orders[status], number)
+        
+        order["status"] = status
+        order["updated_at"] = datetime.now().isoformat()
+        return True
+    
+    def get_user_orders(self, user_id: int, limit: int = 10,
+                        cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """Страница заказов пользователя (новые первыми) и курсор следующей"""
+        return self._orders_page(self.user_orders.get(user_id, []), limit, cursor, newest_first=True)
+    
+    def get_orders_by_status(self, status: str, limit: int = 10,
+                             cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """Страница заказов в статусе (старые первыми, как очередь) и курсор следующей"""
+        if status not in self.status_orders:
+            raise ValueError(f"Unknown order status: {status!r}")
+        return self._orders_page(self.status_orders[status], limit, cursor, newest_first=False)
+    
+    def count_orders_by_status(self) -> Dict[str, int]:
+        return {status: len(numbers) for status, numbers in self.status_orders.items()}
+    
+    def _orders_page(self, numbers: List[int], limit: int, cursor: Optional[str],
+                     newest_first: bool) -> Tuple[List[dict], Optional[str]]:
+        """Курсор - ID последнего заказа предыдущей страницы; поиск бинарный"""
+        if newest_first:
+            end = bisect_left(numbers, _order_number(cursor)) if cursor else len(numbers)
+            start = max(end - limit, 0)
+            page = numbers[start:end][::-1]
+            has_more = start > 0
+        else:
+            start = bisect_right(numbers, _order_number(cursor)) if cursor else 0
+            page = numbers[start:start + limit]
+            has_more = start + limit < len(numbers)
+        orders = [self.orders[f"{ORDER_PREFIX}{number}"] for number in page]
+        next_cursor = orders[-1]["id"] if has_more and orders else None
+        return orders, next_cursor
 
 # Глобальный экземпляр базы данных
 db = Database()
@@ -1,9 +1,14 @@
 import json
 import logging
-from aiogram import types, Bot, F
+import os
+from aiogram import Router, types, Bot, F
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from database import db
 
+shop_router = Router()
+ADMIN_IDS = [int(id.strip()) for id in os.getenv("ADMIN_IDS", "1939282952,5266027747").split(",")]
+ORDERS_PAGE_SIZE = 5
+
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
@@ -71,7 +76,7 @@ async def handle_purchase_request(message: types.Message, bot: Bot):
                 )
                 
                 # Уведомление админам
-                admin_ids = bot.get("ADMIN_IDS", [])
+                admin_ids = ADMIN_IDS
                 admin_keyboard = InlineKeyboardMarkup(inline_keyboard=[
                     [
                         InlineKeyboardButton(
@@ -133,7 +138,7 @@ async def handle_purchase_request(message: types.Message, bot: Bot):
             if not order:
                 return await message.answer("❌ Заказ не найден.")
                 
-            if order['user_id'] != user_id and user_id not in bot.get("ADMIN_IDS", []):
+            if order['user_id'] != user_id and user_id not in ADMIN_IDS:
                 return await message.answer("❌ У вас нет доступа к этому заказу.")
                 
             status_text = ORDER_STATUSES.get(order['status'], order['status'])
@@ -164,3 +169,94 @@ async def handle_purchase_request(message: types.Message, bot: Bot):
             "❌ Произошла непредвиденная ошибка. "
             "Пожалуйста, попробуйте позже или свяжитесь с поддержкой."
         )
+
+
+def format_order(order: dict) -> str:
+    """Короткая строка заказа для списков"""
+    status_text = ORDER_STATUSES.get(order['status'], order['status'])
+    return (
+        f"#{order['id']} - ${order['amount']:.2f}\n"
+        f"   {status_text}, {order['created_at'][:16].replace('T', ' ')}"
+    )
+
+@shop_router.callback_query(F.data.startswith("my_orders_"))
+async def show_my_orders(callback: types.CallbackQuery):
+    """Показать заказы пользователя (постранично)"""
+    # my_orders_{user_id} или my_orders_{user_id}_{cursor}
+    user_part, _, cursor = callback.data[len("my_orders_"):].partition("_")
+    try:
+        owner_id = int(user_part)
+    except ValueError:
+        return await callback.answer("❌ Неверный запрос", show_alert=True)
+    if owner_id != callback.from_user.id and callback.from_user.id not in ADMIN_IDS:
+        return await callback.answer("❌ Нет доступа", show_alert=True)
+    
+    try:
+        orders, next_cursor = db.get_user_orders(owner_id, limit=ORDERS_PAGE_SIZE, cursor=cursor or None)
+    except ValueError:
+        return await callback.answer("❌ Неверный запрос", show_alert=True)
+    
+    if not orders:
+        await callback.message.answer("📦 У вас пока нет заказов.")
+        return await callback.answer()
+    
+    text = "📦 Ваши заказы:\n\n" + "\n\n".join(format_order(order) for order in orders)
+    buttons = [
+        [InlineKeyboardButton(text=f"❌ Отменить #{order['id']}", callback_data=f"cancel_order_{order['id']}")]
+        for order in orders if order['status'] == 'pending'
+    ]
+    if next_cursor:
+        buttons.append([InlineKeyboardButton(
+            text="➡️ Далее", callback_data=f"my_orders_{owner_id}_{next_cursor}"
+        )])
+    await callback.message.answer(text, reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons))
+    await callback.answer()
+
+async def change_order_status(callback: types.CallbackQuery, bot: Bot, status: str):
+    """Сменить статус заказа и уведомить покупателя"""
+    order_id = callback.data.split("_order_", 1)[1]
+    order = db.get_order(order_id)
+    if not order:
+        return await callback.answer("❌ Заказ не найден", show_alert=True)
+    
+    is_admin = callback.from_user.id in ADMIN_IDS
+    # Покупатель может только отменить свой заказ, пока он не принят
+    is_owner_cancel = (status == 'cancelled' and order['user_id'] == callback.from_user.id
+                       and order['status'] == 'pending')
+    if not is_admin and not is_owner_cancel:
+        return await callback.answer("❌ Нет доступа", show_alert=True)
+    
+    previous_text = ORDER_STATUSES.get(order['status'], order['status'])
+    if not db.update_order_status(order_id, status):
+        return await callback.answer(f"❌ Заказ уже в статусе: {previous_text}", show_alert=True)
+    
+    status_text = ORDER_STATUSES[status]
+    keyboard = None
+    if is_admin and status == 'processing':
+        keyboard = InlineKeyboardMarkup(inline_keyboard=[[
+            InlineKeyboardButton(text="✅ Завершить", callback_data=f"complete_order_{order_id}"),
+            InlineKeyboardButton(text="❌ Отменить", callback_data=f"cancel_order_{order_id}")
+        ]])
+    await callback.message.answer(f"📦 Заказ #{order_id}: {status_text}", reply_markup=keyboard)
+    await callback.answer()
+    
+    if order['user_id'] != callback.from_user.id:
+        try:
+            await bot.send_message(order['user_id'], f"📦 Статус заказа #{order_id} изменен: {status_text}")
+        except Exception as e:
+            logger.error(f"Failed to notify user {order['user_id']}: {e}")
+
+@shop_router.callback_query(F.data.startswith("process_order_"))
+async def process_order(callback: types.CallbackQuery, bot: Bot):
+    """Принять заказ в обработку"""
+    await change_order_status(callback, bot, 'processing')
+
+@shop_router.callback_query(F.data.startswith("complete_order_"))
+async def complete_order(callback: types.CallbackQuery, bot: Bot):
+    """Завершить заказ"""
+    await change_order_status(callback, bot, 'completed')
+
+@shop_router.callback_query(F.data.startswith("cancel_order_"))
+async def cancel_order(callback: types.CallbackQuery, bot: Bot):
+    """Отменить заказ"""
+    await change_order_status(callback, bot, 'cancelled')
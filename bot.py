@@ -1,18 +1,41 @@
 import asyncio
+import hmac
+import json
 import logging
+import math
 import os
+import time
 from aiohttp import web
 from aiogram import Bot, Dispatcher, types, F
-from aiogram.filters import Command
-from aiogram.types import WebAppInfo, InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.filters import Command, CommandObject
+from aiogram.types import WebAppInfo, InlineKeyboardMarkup, InlineKeyboardButton, BufferedInputFile, FSInputFile
 from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 from shop import ShopHandler
 from admin_panel import AdminHandler
+from auction_engine import AuctionEngine
+from api import CatalogAPI
 from database import Database
+from first_paint import FirstPaintRenderer
+from live_updates import LiveUpdates
+from metrics import HandlerTimingMiddleware, ServiceMetrics, TelegramRequestMiddleware
+from notifier import OutboundQueue
+from rate_limit import RateLimitMiddleware, UserRateLimiter
+from reservations import ReservationBook
+from placeholders import PlaceholderImages
+from search import SearchIndex
+from startup import StartupTimer, ensure_webhook
+from static_cache import StaticCache
+from tracing import (MAX_PROFILE_SECONDS, MIN_PROFILE_SECONDS, HandlerTracingMiddleware, SamplingProfiler,
+                     TelegramTracingMiddleware, UpdateTracingMiddleware, tracer)
+
+startup_timer = StartupTimer()  # counts from process creation, so this phase includes the interpreter
+startup_timer.mark("imports")
 
 # Configuration
-BOT_TOKEN = "7504123410:AAEznGqRafbyrBx2e34HzsxztWV201HRMxE"
-ADMIN_IDS = [1939282952, 5266027747]
+BOT_TOKEN = os.getenv("BOT_TOKEN", "7504123410:AAEznGqRafbyrBx2e34HzsxztWV201HRMxE")
+ADMIN_IDS = [int(admin_id) for admin_id in os.getenv("ADMIN_IDS", "1939282952,5266027747").split(",")]
 WEBAPP_URL = os.getenv("WEBAPP_URL", "https://csgosalleruzb-1.onrender.com")  # Set in Render env vars
 
 WEBHOOK_PATH = f"/webhook/{BOT_TOKEN}"
@@ -21,13 +44,156 @@ WEBHOOK_URL = f"{WEBHOOK_HOST}{WEBHOOK_PATH}"
 WEB_SERVER_HOST = "0.0.0.0"
 WEB_SERVER_PORT = int(os.getenv("PORT", 8080))  # Render provides PORT env variable
 
+# Bot API server: unset for api.telegram.org; a local telegram-bot-api or the fake one in benchmarks/loadgen.py
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL")
+
+# Fast start for hosts that spin down when idle (Render free plan): bind the port first, keep pending
+# updates and the webhook, re-register it only if getWebhookInfo differs, and warm caches afterwards
+FAST_START = os.getenv("FAST_START", "0") == "1"
+
+# Webhook ingestion: WEBHOOK_QUEUE=1 acknowledges updates at once and processes them in workers
+WEBHOOK_QUEUE = os.getenv("WEBHOOK_QUEUE", "0") == "1"
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", 8))
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", 1000))
+
+# Static site (served from memory; STATIC_RELOAD=1 re-reads changed files in development)
+STATIC_ROOT = os.getenv("STATIC_ROOT", "static-site")
+STATIC_RELOAD = os.getenv("STATIC_RELOAD", "0") == "1"
+PLACEHOLDER_CACHE_BYTES = int(os.getenv("PLACEHOLDER_CACHE_BYTES", 4 * 1024 * 1024))  # rendered product placeholders
+
+# Auction bidding: each bid must beat the price by max(BID_MIN_INCREMENT, price * BID_INCREMENT_RATIO)
+BID_MIN_INCREMENT = float(os.getenv("BID_MIN_INCREMENT", 1))
+BID_INCREMENT_RATIO = float(os.getenv("BID_INCREMENT_RATIO", 0))
+
+# Outbound Telegram messages (admin notifications) - Telegram allows ~30 msg/s overall, ~1 msg/s per chat
+NOTIFY_WORKERS = int(os.getenv("NOTIFY_WORKERS", 4))
+NOTIFY_GLOBAL_RATE = float(os.getenv("NOTIFY_GLOBAL_RATE", 30))
+NOTIFY_CHAT_RATE = float(os.getenv("NOTIFY_CHAT_RATE", 1))
+
+# A purchase holds the product for its buyer this long; unconfirmed purchases are then deleted
+PURCHASE_HOLD_TTL = float(os.getenv("PURCHASE_HOLD_TTL", 900))
+
+# Per-user rate limits (tokens per second, burst) checked before any handler; rate 0 disables, admins are exempt
+RATE_LIMIT_PURCHASE = float(os.getenv("RATE_LIMIT_PURCHASE", 0.1))
+RATE_LIMIT_PURCHASE_BURST = float(os.getenv("RATE_LIMIT_PURCHASE_BURST", 3))
+RATE_LIMIT_BID = float(os.getenv("RATE_LIMIT_BID", 1))
+RATE_LIMIT_BID_BURST = float(os.getenv("RATE_LIMIT_BID_BURST", 5))
+RATE_LIMIT_MESSAGE = float(os.getenv("RATE_LIMIT_MESSAGE", 1))  # commands and other Mini App data
+RATE_LIMIT_MESSAGE_BURST = float(os.getenv("RATE_LIMIT_MESSAGE_BURST", 10))
+RATE_LIMIT_CALLBACK = float(os.getenv("RATE_LIMIT_CALLBACK", 2))
+RATE_LIMIT_CALLBACK_BURST = float(os.getenv("RATE_LIMIT_CALLBACK_BURST", 10))
+RATE_LIMIT_MAX_BUCKETS = int(os.getenv("RATE_LIMIT_MAX_BUCKETS", 100000))  # bounds memory under many users
+
+# Storage backend: "memory" (dicts, optionally journaled), "sqlite", or "shared"
+# (SQLite shared by WORKERS processes, each reading from an in-memory cache)
+DB_BACKEND = os.getenv("DB_BACKEND", "memory")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "shop.sqlite3")
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", 4))
+SHARED_POLL_INTERVAL = float(os.getenv("SHARED_POLL_INTERVAL", 0.05))  # seconds between change polls
+CHANGE_LOG_SIZE = int(os.getenv("CHANGE_LOG_SIZE", 10000))  # catalog changes kept for /api/catalog/changes
+
+# Worker processes sharing the port (SO_REUSEPORT); more than one requires DB_BACKEND=shared
+WORKERS = int(os.getenv("WORKERS", 1))
+WORKER_INDEX = 0  # worker 0 owns the webhook registration
+
+# Persistence for the memory backend (disabled unless DATA_DIR is set, e.g. to a Render disk mount)
+DATA_DIR = os.getenv("DATA_DIR")
+WAL_FSYNC_INTERVAL = float(os.getenv("WAL_FSYNC_INTERVAL", 0.05))  # seconds between fsyncs
+WAL_FSYNC_BATCH = int(os.getenv("WAL_FSYNC_BATCH", 512))  # pending entries forcing an early fsync
+SNAPSHOT_INTERVAL = float(os.getenv("SNAPSHOT_INTERVAL", 300))  # seconds between snapshots
+
+# Live catalog updates for the Mini App over Server-Sent Events (/api/live)
+LIVE_MAX_CLIENTS = int(os.getenv("LIVE_MAX_CLIENTS", 10000))
+LIVE_COALESCE_INTERVAL = float(os.getenv("LIVE_COALESCE_INTERVAL", 0.25))  # min seconds between writes per client
+LIVE_HEARTBEAT_INTERVAL = float(os.getenv("LIVE_HEARTBEAT_INTERVAL", 20))  # keeps idle proxies from closing streams
+
+# Metrics at /metrics (Prometheus text format); set METRICS_TOKEN to require ?token= or a Bearer header
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Diagnostics for admins: /trace on|off|dump keeps per-update spans, /profile N samples stacks for N seconds
+TRACING = os.getenv("TRACING", "0") == "1"
+TRACE_BUFFER = int(os.getenv("TRACE_BUFFER", 500))  # finished traces kept in memory
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", 0.005))  # seconds between stack samples
+
 # Initialize
 logging.basicConfig(level=logging.INFO)
-bot = Bot(token=BOT_TOKEN)
+session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL)) if TELEGRAM_API_URL else None
+bot = Bot(token=BOT_TOKEN, session=session)
 dp = Dispatcher()
-db = Database()
-shop_handler = ShopHandler(db, bot, ADMIN_IDS)
+journal = None
+if DB_BACKEND == "sqlite":
+    from sqlite_database import SqliteDatabase
+    db = SqliteDatabase(SQLITE_PATH, pool_size=SQLITE_POOL_SIZE, change_log_size=CHANGE_LOG_SIZE)
+elif DB_BACKEND == "shared":
+    from shared_database import SharedDatabase
+    db = SharedDatabase(SQLITE_PATH, pool_size=SQLITE_POOL_SIZE, poll_interval=SHARED_POLL_INTERVAL,
+                        change_log_size=CHANGE_LOG_SIZE)
+else:
+    db = Database(change_log_size=CHANGE_LOG_SIZE)
+    if DATA_DIR:
+        from persistence import Journal
+        journal = Journal(
+            DATA_DIR,
+            fsync_interval=WAL_FSYNC_INTERVAL,
+            fsync_batch=WAL_FSYNC_BATCH,
+            snapshot_interval=SNAPSHOT_INTERVAL,
+        )
+        replayed = db.attach_journal(journal)
+        print(f"💾 Restored {len(db.products)} products, {len(db.auctions)} auctions "
+              f"({replayed} log entries replayed)")
+auction_engine = AuctionEngine(db, min_increment=BID_MIN_INCREMENT, increment_ratio=BID_INCREMENT_RATIO)
+notifier = OutboundQueue(
+    bot,
+    workers=NOTIFY_WORKERS,
+    global_rate=NOTIFY_GLOBAL_RATE / WORKERS,  # the Bot API limit is per token, not per process
+    per_chat_rate=NOTIFY_CHAT_RATE,
+)
+reservations = ReservationBook(db, ttl=PURCHASE_HOLD_TTL)
+shop_handler = ShopHandler(db, bot, ADMIN_IDS, auction_engine, notifier, reservations)
 admin_handler = AdminHandler(db, bot, ADMIN_IDS)
+metrics = ServiceMetrics()
+metrics.instrument_database(db)
+metrics.registry.gauge("notifier_pending_messages", "Admin notifications waiting for delivery",
+                       notifier.pending_count)
+metrics.registry.gauge("purchase_holds", "Products on hold for a pending purchase", reservations.hold_count)
+dp.message.middleware(HandlerTimingMiddleware(metrics))
+dp.callback_query.middleware(HandlerTimingMiddleware(metrics))
+bot.session.middleware(TelegramRequestMiddleware(metrics))
+tracer.configure(enabled=TRACING, capacity=TRACE_BUFFER)
+tracer.instrument_database(db)
+dp.update.outer_middleware(UpdateTracingMiddleware(tracer))
+dp.message.middleware(HandlerTracingMiddleware(tracer))
+dp.callback_query.middleware(HandlerTracingMiddleware(tracer))
+bot.session.middleware(TelegramTracingMiddleware(tracer))
+rate_limiter = UserRateLimiter({
+    "buy": (RATE_LIMIT_PURCHASE, RATE_LIMIT_PURCHASE_BURST),
+    "bid": (RATE_LIMIT_BID, RATE_LIMIT_BID_BURST),
+    "message": (RATE_LIMIT_MESSAGE, RATE_LIMIT_MESSAGE_BURST),
+    "webapp": (RATE_LIMIT_MESSAGE, RATE_LIMIT_MESSAGE_BURST),
+    "callback": (RATE_LIMIT_CALLBACK, RATE_LIMIT_CALLBACK_BURST),
+}, max_buckets=RATE_LIMIT_MAX_BUCKETS)
+rate_limited = metrics.registry.counter("bot_rate_limited_total", "Updates dropped by per-user rate limits",
+                                        ("action",))
+rate_limit_middleware = RateLimitMiddleware(rate_limiter, exempt=ADMIN_IDS, on_reject=rate_limited.inc)
+dp.message.outer_middleware(rate_limit_middleware)
+dp.callback_query.outer_middleware(rate_limit_middleware)
+metrics.registry.gauge("rate_limit_buckets", "Per-user rate limit buckets in memory", rate_limiter.bucket_count)
+profiler = None  # created by the first /profile
+search_index = SearchIndex(db)  # follows catalog changes through db.subscribe
+catalog_api = CatalogAPI(db, search_index)
+live_updates = LiveUpdates(
+    db,
+    max_clients=LIVE_MAX_CLIENTS,
+    coalesce_interval=LIVE_COALESCE_INTERVAL,
+    heartbeat_interval=LIVE_HEARTBEAT_INTERVAL,
+)
+metrics.registry.gauge("live_connections", "Open /api/live event streams", live_updates.client_count)
+static_cache = StaticCache(STATIC_ROOT, reload=STATIC_RELOAD, preload=not FAST_START)
+placeholder_images = PlaceholderImages(max_bytes=PLACEHOLDER_CACHE_BYTES)
+first_paint = FirstPaintRenderer.for_site(static_cache, db)
+metrics.registry.gauge("startup_phase_seconds", "Duration of each startup phase", startup_timer.as_gauges,
+                       ("phase",))
+startup_timer.mark("setup")
 
 
 @dp.message(Command("start"))
@@ -35,11 +201,12 @@ async def cmd_start(message: types.Message):
     """Handle /start command"""
     user_id = message.from_user.id
     is_admin = user_id in ADMIN_IDS
+    lang = "uz" if message.from_user.language_code == "uz" else "ru"  # picks the prerendered page
     
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(
             text="🛍️ Открыть магазин / Do'konni ochish",
-            web_app=WebAppInfo(url=WEBAPP_URL)
+            web_app=WebAppInfo(url=f"{WEBAPP_URL}?lang={lang}")
         )]
     ])
     
@@ -47,7 +214,7 @@ async def cmd_start(message: types.Message):
         keyboard.inline_keyboard.append([
             InlineKeyboardButton(
                 text="⚙️ Админ-панель / Admin panel",
-                web_app=WebAppInfo(url=f"{WEBAPP_URL}?admin=true")
+                web_app=WebAppInfo(url=f"{WEBAPP_URL}?admin=true&lang={lang}")
             )
         ])
     
@@ -76,6 +243,121 @@ async def cmd_help(message: types.Message):
     await message.answer(help_text)
 
 
+@dp.message(Command("trace"))
+async def cmd_trace(message: types.Message, command: CommandObject):
+    """Admin: toggle per-update tracing or dump recent traces"""
+    if message.from_user.id not in ADMIN_IDS:
+        return
+    arg = (command.args or "").strip().lower()
+    if arg in ("on", "off"):
+        tracer.configure(enabled=arg == "on")
+        await message.answer(f"🔍 Трассировка / Trassirovka: {arg}")
+        return
+    traces = tracer.recent()
+    if not traces:
+        await message.answer("🔍 Нет трасс / Trassalar yo'q (/trace on)")
+        return
+    summary = "\n".join(
+        f"{trace['duration_ms']:.1f} ms  {trace['name']}  ({len(trace['spans'])} spans)"
+        for trace in tracer.slowest(5)
+    )
+    body = "".join(json.dumps(trace, ensure_ascii=False) + "\n" for trace in traces)
+    await message.answer_document(
+        BufferedInputFile(body.encode(), filename=f"traces-{int(time.time())}.jsonl"),
+        caption=f"🐢 Самые медленные / Eng sekin:\n{summary}"[:1024],
+    )
+
+
+@dp.message(Command("profile"))
+async def cmd_profile(message: types.Message, command: CommandObject):
+    """Admin: run the sampling profiler and send collapsed stacks"""
+    global profiler
+    if message.from_user.id not in ADMIN_IDS:
+        return
+    try:
+        seconds = float(command.args or 10)
+    except ValueError:
+        seconds = 10
+    if not math.isfinite(seconds):
+        await message.answer("❌ /profile <секунды / soniya>")
+        return
+    seconds = min(max(seconds, MIN_PROFILE_SECONDS), MAX_PROFILE_SECONDS)
+    if profiler is None:
+        profiler = SamplingProfiler(interval=PROFILE_INTERVAL)
+    if profiler.running:
+        await message.answer("⏳ Профилирование уже идет / Profillash allaqachon ketmoqda")
+        return
+    await message.answer(f"⏱ Профилирование {seconds:g} с / Profillash {seconds:g} s...")
+    collapsed = await profiler.run_for(seconds)
+    await message.answer_document(
+        BufferedInputFile(collapsed.encode(), filename=f"profile-{int(time.time())}.folded"),
+        caption=f"🔥 {profiler.sample_count} samples (flamegraph.pl / speedscope)",
+    )
+
+
+@dp.message(Command("import"))
+async def cmd_import(message: types.Message, command: CommandObject):
+    """Admin: bulk-add products from a CSV/JSONL document (sent with or replied to by /import) or a server path"""
+    if message.from_user.id not in ADMIN_IDS:
+        return
+    import tempfile
+    from catalog_io import detect_format, import_file
+    document = message.document or (message.reply_to_message and message.reply_to_message.document)
+    path = (command.args or "").strip()
+    if document is None and not path:
+        await message.answer(
+            "📥 Отправьте .csv или .jsonl файл с подписью /import (или /import <путь на сервере>)\n"
+            "📥 .csv yoki .jsonl faylni /import izohi bilan yuboring (yoki /import <serverdagi yo'l>)\n\n"
+            "name, price, category, description, photo_url, link, float, status"
+        )
+        return
+    try:
+        fmt = detect_format(path if document is None else document.file_name or "")
+    except ValueError:
+        await message.answer("❌ Нужен файл .csv или .jsonl / .csv yoki .jsonl fayl kerak")
+        return
+    started = time.perf_counter()
+    try:
+        if document is None:
+            report = await import_file(db, path, fmt)
+        else:
+            # Streamed to disk rather than memory; the Bot API serves files up to 20 MB
+            with tempfile.TemporaryDirectory() as directory:
+                local_path = os.path.join(directory, f"import.{fmt}")
+                await bot.download(document, destination=local_path, timeout=120)
+                report = await import_file(db, local_path, fmt)
+    except (OSError, UnicodeDecodeError) as e:
+        logging.exception("Catalog import failed")
+        await message.answer(f"❌ Ошибка импорта / Import xatosi: {e}"[:1000])
+        return
+    text = (f"✅ Импортировано / Import qilindi: {report.imported}\n"
+            f"⚠️ Пропущено / O'tkazib yuborildi: {report.skipped}\n"
+            f"⏱ {time.perf_counter() - started:.1f} s")
+    if report.errors:
+        text += "\n\n" + "\n".join(f"#{line}: {reason}" for line, reason in report.errors)
+    await message.answer(text[:4000])
+
+
+@dp.message(Command("export"))
+async def cmd_export(message: types.Message, command: CommandObject):
+    """Admin: send the product catalog as a CSV (default) or JSONL document"""
+    if message.from_user.id not in ADMIN_IDS:
+        return
+    import tempfile
+    from catalog_io import FORMATS, export_file
+    fmt = (command.args or "csv").strip().lower()
+    if fmt not in FORMATS:
+        await message.answer("❌ /export csv | /export jsonl")
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f"catalog-{int(time.time())}.{fmt}")
+        count = await export_file(db, path, fmt)
+        await message.answer_document(
+            FSInputFile(path),
+            caption=f"📤 Товаров / Mahsulotlar: {count}",
+        )
+
+
 @dp.message(F.web_app_data)
 async def handle_webapp_data(message: types.Message):
     """Handle data from WebApp"""
@@ -85,10 +367,16 @@ async def handle_webapp_data(message: types.Message):
     # Handle different actions from WebApp
     if data.startswith("buy:"):
         product_id = data.split(":")[1]
-        await shop_handler.handle_purchase(message, product_id)
+        with metrics.action_latency.time("purchase"):
+            await shop_handler.handle_purchase(message, product_id)
+    elif data.startswith("bid:"):
+        _, auction_id, amount = (data.split(":") + [""])[:3]
+        with metrics.action_latency.time("bid"):
+            await shop_handler.handle_bid(message, auction_id, amount)
     elif data.startswith("admin:"):
         if user_id in ADMIN_IDS:
-            await admin_handler.handle_admin_action(message, data)
+            with metrics.action_latency.time("admin"):
+                await admin_handler.handle_admin_action(message, data)
     else:
         await message.answer("✅ Данные получены / Ma'lumotlar qabul qilindi")
 
@@ -98,72 +386,135 @@ async def health_check(request):
     return web.Response(text="OK")
 
 
+async def serve_metrics(request):
+    """Prometheus metrics"""
+    if METRICS_TOKEN:
+        token = request.query.get("token") or request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+            return web.Response(status=401, text="Unauthorized")
+    return await metrics.handle(request)
+
+
 async def serve_webapp(request):
-    """Serve the main webapp HTML"""
-    try:
-        with open('static-site/index.html', 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        return web.Response(text=html_content, content_type='text/html')
-    except FileNotFoundError:
+    """Serve the main webapp HTML with translations and the first catalog page inlined"""
+    response = await first_paint.respond(request)
+    if response.status == 404:
         return web.Response(text="WebApp not found", status=404)
+    return response
 
 
 async def serve_static(request):
     """Serve static files (JS, CSS, images)"""
-    filename = request.match_info['filename']
-    try:
-        # Определяем тип контента
-        if filename.endswith('.js'):
-            content_type = 'application/javascript'
-        elif filename.endswith('.css'):
-            content_type = 'text/css'
-        elif filename.endswith('.png'):
-            content_type = 'image/png'
-        elif filename.endswith('.jpg') or filename.endswith('.jpeg'):
-            content_type = 'image/jpeg'
-        else:
-            content_type = 'text/plain'
-        
-        with open(f'static-site/{filename}', 'r', encoding='utf-8') as f:
-            content = f.read()
-        return web.Response(text=content, content_type=content_type)
-    except FileNotFoundError:
-        return web.Response(text="File not found", status=404)
+    return static_cache.respond(request, request.match_info['filename'])
 
 
 async def on_startup(app):
     """Set webhook on startup"""
-    await bot.set_webhook(WEBHOOK_URL, drop_pending_updates=True)
-    print(f"🌐 Webhook set to: {WEBHOOK_URL}")
-    print(f"🚀 Server running on {WEB_SERVER_HOST}:{WEB_SERVER_PORT}")
+    if journal is not None:
+        await journal.start(db)
+    if DB_BACKEND == "shared":
+        await db.start()
+    await notifier.start()
+    await reservations.restore()
+    await reservations.start()
+    if FAST_START:
+        return  # the rest runs in warm_up() once the port is bound
+    first_paint.build_all()
+    if WORKER_INDEX == 0:
+        await bot.set_webhook(WEBHOOK_URL, drop_pending_updates=True)
+        print(f"🌐 Webhook set to: {WEBHOOK_URL}")
+    startup_timer.mark("on_startup")
+    print(f"🚀 Worker {WORKER_INDEX} running on {WEB_SERVER_HOST}:{WEB_SERVER_PORT}")
+    print(f"⏱ Startup: {startup_timer.summary()}")
+
+
+async def warm_up():
+    """Fast start: check the webhook and fill the static and catalog caches after the port is bound"""
+    if WORKER_INDEX == 0:
+        started = time.perf_counter()
+        try:
+            if await ensure_webhook(bot, WEBHOOK_URL):
+                print(f"🌐 Webhook set to: {WEBHOOK_URL}")
+            else:
+                print(f"🌐 Webhook unchanged: {WEBHOOK_URL}")
+        except Exception:
+            logging.exception("Webhook check failed")
+        startup_timer.record("webhook", time.perf_counter() - started)
+    started = time.perf_counter()
+    static_cache.load_all()
+    await db.run(first_paint.build_all)
+    startup_timer.record("warm caches", time.perf_counter() - started)
+    print(f"⏱ Startup: {startup_timer.summary()}")
+
+
+async def serve_fast(app):
+    """Fast start: bind the port as soon as the app is set up, then warm up while serving"""
+    runner = web.AppRunner(app, handle_signals=True)
+    await runner.setup()
+    try:
+        startup_timer.mark("on_startup")
+        site = web.TCPSite(runner, WEB_SERVER_HOST, WEB_SERVER_PORT, reuse_port=WORKERS > 1)
+        await site.start()
+        startup_timer.mark("bind")
+        startup_timer.set_ready()
+        print(f"🚀 Worker {WORKER_INDEX} running on {WEB_SERVER_HOST}:{WEB_SERVER_PORT}")
+        await warm_up()
+        await asyncio.Event().wait()  # until SIGINT/SIGTERM raises GracefulExit
+    finally:
+        await runner.cleanup()
 
 
 async def on_shutdown(app):
     """Delete webhook on shutdown"""
-    await bot.delete_webhook()
-    print("🛑 Webhook deleted")
+    await notifier.stop()
+    await reservations.stop()
+    if WORKER_INDEX == 0 and not FAST_START:
+        await bot.delete_webhook()  # with FAST_START it stays, so Telegram's next update wakes us up
+        print("🛑 Webhook deleted")
+    if journal is not None:
+        await journal.close()
+        print("💾 Journal flushed")
+    if DB_BACKEND == "shared":
+        await db.stop()
+    if DB_BACKEND in ("sqlite", "shared"):
+        db.close()
 
 
-def main():
-    """Start the bot with webhook"""
-    print("🤖 Bot is starting with webhook...")
-    print(f"📱 WebApp URL: {WEBAPP_URL}")
-    print(f"👥 Admin IDs: {ADMIN_IDS}")
+def run_worker(index: int):
+    """Serve the app in this process"""
+    global WORKER_INDEX
+    WORKER_INDEX = index
     
-    # Create aiohttp application
-    app = web.Application()
+    # Create aiohttp application (the webhook route is relabelled so the token stays out of metrics)
+    app = web.Application(middlewares=[metrics.http_middleware({WEBHOOK_PATH: "/webhook"})])
     
     # Setup webhook handler
-    webhook_requests_handler = SimpleRequestHandler(
-        dispatcher=dp,
-        bot=bot,
-    )
+    if WEBHOOK_QUEUE:
+        from webhook_queue import QueuedRequestHandler
+        webhook_requests_handler = QueuedRequestHandler(
+            dispatcher=dp,
+            bot=bot,
+            workers=WEBHOOK_WORKERS,
+            queue_size=WEBHOOK_QUEUE_SIZE,
+        )
+    else:
+        webhook_requests_handler = SimpleRequestHandler(
+            dispatcher=dp,
+            bot=bot,
+        )
     webhook_requests_handler.register(app, path=WEBHOOK_PATH)
+    if WEBHOOK_QUEUE:
+        metrics.registry.gauge("webhook_queue_depth", "Updates waiting for a worker",
+                               webhook_requests_handler.queue_depth)
     
     # Add routes
     app.router.add_get("/", serve_webapp)  # Главная страница - магазин
     app.router.add_get("/health", health_check)  # Health check для Render
+    app.router.add_get("/metrics", serve_metrics)  # Метрики Prometheus
     app.router.add_get("/static/{filename}", serve_static)  # Статические файлы
+    placeholder_images.register(app)  # Заглушки для фото товаров
+    catalog_api.register(app)  # JSON API каталога
+    live_updates.register(app)  # Живые обновления (SSE)
     
     # Setup startup and shutdown hooks
     app.on_startup.append(on_startup)
@@ -171,7 +522,39 @@ def main():
     
     # Configure and start web server
     setup_application(app, dp, bot=bot)
-    web.run_app(app, host=WEB_SERVER_HOST, port=WEB_SERVER_PORT)
+    if FAST_START:
+        try:
+            asyncio.run(serve_fast(app))
+        except (web.GracefulExit, KeyboardInterrupt):
+            pass
+        return
+    web.run_app(app, host=WEB_SERVER_HOST, port=WEB_SERVER_PORT, reuse_port=WORKERS > 1)
+
+
+def main():
+    """Start the bot with webhook"""
+    print("🤖 Bot is starting with webhook...")
+    print(f"📱 WebApp URL: {WEBAPP_URL}")
+    print(f"👥 Admin IDs: {ADMIN_IDS}")
+    
+    if WORKERS > 1 and DB_BACKEND != "shared":
+        raise SystemExit("WORKERS > 1 requires DB_BACKEND=shared")
+    
+    # Extra workers are fresh interpreters ("spawn"): SQLite connections must not cross a fork
+    processes = []
+    if WORKERS > 1:
+        import multiprocessing
+        context = multiprocessing.get_context("spawn")
+        processes = [context.Process(target=run_worker, args=(index,), daemon=True)
+                     for index in range(1, WORKERS)]
+    for process in processes:
+        process.start()
+    try:
+        run_worker(0)
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
 
 
 if __name__ == "__main__":
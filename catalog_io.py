@@ -0,0 +1,186 @@
+import asyncio
+import csv
+import io
+import json
+import math
+import os
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, TextIO, Tuple
+from urllib.parse import quote
+
+from placeholders import placeholder_token
+
+IMPORT_BATCH_SIZE = 1000  # rows per add_products call (one index update each)
+EXPORT_PAGE_SIZE = 1000
+MAX_REPORTED_ERRORS = 10
+FORMATS = ("csv", "jsonl")
+STATUSES = ("available", "sold")
+EXPORT_FIELDS = ("id", "name", "price", "category", "description", "photo_url",
+                 "link", "float", "status", "created_at")
+
+
+class ImportReport:
+    """Counts of an import and the first few rejected rows"""
+
+    __slots__ = ("imported", "skipped", "errors")
+
+    def __init__(self):
+        self.imported = 0
+        self.skipped = 0
+        self.errors: List[Tuple[int, str]] = []
+
+    def reject(self, line: int, reason: str):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, reason))
+
+
+def detect_format(filename: str) -> str:
+    """``csv`` or ``jsonl`` from a file name, raising ValueError for anything else"""
+    extension = os.path.splitext(filename)[1].lower().lstrip(".")
+    if extension == "ndjson":
+        extension = "jsonl"
+    if extension not in FORMATS:
+        raise ValueError(f"Unsupported file type: {filename!r} (expected .csv or .jsonl)")
+    return extension
+
+
+def read_rows(stream: TextIO, fmt: str) -> Iterator[Tuple[int, object]]:
+    """Yield ``(line number, row)``: a dict per CSV record (header required), the decoded value per JSON line"""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for number, text in enumerate(stream, 1):
+        text = text.strip()
+        if not text:
+            continue
+        try:
+            yield number, json.loads(text)
+        except ValueError:
+            yield number, text  # rejected by parse_product
+
+
+def _number(row: dict, field: str) -> Optional[float]:
+    value = row.get(field)
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"{field} must be a number")
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be a number, got {value!r}")
+    if not math.isfinite(number):
+        raise ValueError(f"{field} must be finite")
+    return number
+
+
+def parse_product(row) -> dict:
+    """Validate one imported row into ``Database.add_products`` fields.
+
+    ``name``, ``category`` and ``price`` are required; an empty photo or
+    link gets the same defaults as the Mini App form.
+    """
+    if not isinstance(row, dict):
+        raise ValueError("Row is not a JSON object")
+    name = str(row.get("name") or "").strip()
+    category = str(row.get("category") or "").strip()
+    if not name:
+        raise ValueError("name is required")
+    if not category:
+        raise ValueError("category is required")
+    price = _number(row, "price")
+    if price is None or price < 0:
+        raise ValueError("price must be a non-negative number")
+    float_value = _number(row, "float")
+    if float_value is not None and not 0 <= float_value <= 1:
+        raise ValueError("float must be between 0 and 1")
+    status = str(row.get("status") or "available").strip()
+    if status not in STATUSES:
+        raise ValueError(f"status must be one of {', '.join(STATUSES)}")
+    return {
+        "name": name,
+        "price": price,
+        "category": category,
+        "description": str(row.get("description") or ""),
+        "photo_url": row.get("photo_url") or f"/img/placeholder/{placeholder_token(name, category)}.svg",
+        "link": row.get("link") or f"https://steamcommunity.com/market/search?q={quote(name)}",
+        "float": float_value,
+        "status": status,
+    }
+
+
+async def import_products(db, rows: Iterable[Tuple[int, object]],
+                          batch_size: int = IMPORT_BATCH_SIZE) -> ImportReport:
+    """Add valid rows to the catalog in batches; invalid rows are skipped and reported.
+
+    The event loop gets control back after every batch, so updates keep
+    being served during a long import.
+    """
+    report = ImportReport()
+    batch = []
+    for line, row in rows:
+        try:
+            batch.append(parse_product(row))
+        except ValueError as e:
+            report.reject(line, str(e))
+            continue
+        if len(batch) >= batch_size:
+            report.imported += len(await db.run(db.add_products, batch))
+            batch = []
+            await asyncio.sleep(0)
+    if batch:
+        report.imported += len(await db.run(db.add_products, batch))
+    return report
+
+
+async def import_file(db, path: str, fmt: Optional[str] = None,
+                      batch_size: int = IMPORT_BATCH_SIZE) -> ImportReport:
+    """Import a CSV or JSON Lines file from disk, streaming it row by row"""
+    fmt = fmt or detect_format(path)
+    # utf-8-sig: spreadsheet exports often start with a byte order mark
+    with open(path, "r", encoding="utf-8-sig", newline="") as stream:
+        return await import_products(db, read_rows(stream, fmt), batch_size)
+
+
+async def export_rows(db, status: Optional[str] = None,
+                      page_size: int = EXPORT_PAGE_SIZE) -> AsyncIterator[dict]:
+    """Yield products as export rows, newest first, reading one listing page at a time"""
+    cursor = None
+    while True:
+        items, cursor = await db.run(db.get_products_page, status=status, limit=page_size, cursor=cursor)
+        for item in items:
+            yield {field: item.get(field) for field in EXPORT_FIELDS}
+        if cursor is None:
+            return
+        await asyncio.sleep(0)
+
+
+async def format_rows(rows: AsyncIterator[dict], fmt: str) -> AsyncIterator[str]:
+    """Serialize rows as CSV (with a header) or JSON Lines, one line at a time"""
+    if fmt == "jsonl":
+        async for row in rows:
+            yield json.dumps(row, ensure_ascii=False) + "\n"
+        return
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, lineterminator="\n")
+    writer.writeheader()
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    async for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+async def export_file(db, path: str, fmt: str, status: Optional[str] = None) -> int:
+    """Write the catalog to ``path``; return the number of products written"""
+    lines = 0
+    with open(path, "w", encoding="utf-8", newline="") as stream:
+        async for line in format_rows(export_rows(db, status), fmt):
+            stream.write(line)
+            lines += 1
+    return lines - 1 if fmt == "csv" else lines  # minus the header
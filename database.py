@@ -1,15 +1,657 @@
+import base64
+import heapq
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
 from datetime import datetime
-from typing import Dict, List, Optional
+import time
+from typing import Deque, Dict, List, Optional, Tuple
 import uuid
 
+from bid_history import BidHistory
+
+
+CATALOG_COLLECTIONS = ("products", "auctions")
+
+# Range-filterable fields per collection; "price" of an auction is its current price
+RANGE_FIELDS = {
+    "products": {"price": "price", "float": "float"},
+    "auctions": {"price": "current_price", "float": "float"},
+}
+SORT_ORDERS = ("newest", "price_asc", "price_desc", "float_asc", "float_desc")
+_MAX_ID = "\U0010ffff"  # sorts after any record id, for inclusive upper bounds
+
+
+def encode_cursor(entry: Tuple[str, str]) -> str:
+    """Encode a listing position as an opaque URL-safe cursor"""
+    return base64.urlsafe_b64encode(f"{entry[0]}|{entry[1]}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a cursor produced by ``encode_cursor``"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, record_id = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return created_at, record_id
+
+
+def change_key(entry: tuple) -> Tuple[str, str, str]:
+    """``(collection, record_id, op)`` of a catalog change entry for the ChangeLog"""
+    op = entry[0]
+    if op == "bid":
+        return "auctions", entry[1], "update"
+    if op == "put":
+        return entry[1], entry[2]["id"], "insert"
+    return entry[1], entry[2], "update" if op == "patch" else "delete"
+
+
+def merge_sorted(entries: list, new: list):
+    """Merge ``new`` into the sorted list ``entries`` in place.
+
+    Sorts only the new entries and splices them in at bisected positions,
+    so a batch costs ``k log n`` comparisons plus one copy of the list
+    rather than a re-sort of all of it.
+    """
+    new.sort()
+    if not entries or entries[-1] <= new[0]:
+        entries.extend(new)
+        return
+    merged = []
+    extend, append = merged.extend, merged.append
+    start = 0
+    for entry in new:
+        position = bisect_left(entries, entry, start)
+        if position > start:
+            extend(entries[start:position])
+            start = position
+        append(entry)
+    extend(entries[start:])
+    entries[:] = merged
+
+
+class _ListingIndex:
+    """Creation-ordered secondary indexes over one collection.
+
+    Every bucket is a list of ``(created_at, id)`` pairs kept sorted, so a
+    filtered listing is a reversed walk over exactly the matching records.
+    """
+
+    def __init__(self):
+        self.all: List[Tuple[str, str]] = []
+        self.by_category: Dict[str, List[Tuple[str, str]]] = {}
+        self.by_status: Dict[str, List[Tuple[str, str]]] = {}
+        self.by_category_status: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+        self._keys: Dict[str, Tuple[str, str, str]] = {}
+
+    def add(self, record: dict):
+        """Index a record by its current category, status and created_at"""
+        record_id = record["id"]
+        if record_id in self._keys:
+            self.remove(record_id)
+        category, status = record.get("category"), record.get("status")
+        entry = (record["created_at"], record_id)
+        self._keys[record_id] = (entry[0], category, status)
+        insort(self.all, entry)
+        insort(self.by_category.setdefault(category, []), entry)
+        insort(self.by_status.setdefault(status, []), entry)
+        insort(self.by_category_status.setdefault((category, status), []), entry)
+
+    def build(self, records):
+        """Index many records at once with a single sort"""
+        for record in sorted(records, key=lambda x: (x["created_at"], x["id"])):
+            category, status = record.get("category"), record.get("status")
+            entry = (record["created_at"], record["id"])
+            self._keys[entry[1]] = (entry[0], category, status)
+            self.all.append(entry)
+            self.by_category.setdefault(category, []).append(entry)
+            self.by_status.setdefault(status, []).append(entry)
+            self.by_category_status.setdefault((category, status), []).append(entry)
+
+    def add_many(self, records: List[dict]):
+        """Index a batch of new records, merging it into each touched bucket once"""
+        added = []
+        grouped: Dict[tuple, List[Tuple[str, str]]] = {}
+        for record in records:
+            category, status = record.get("category"), record.get("status")
+            entry = (record["created_at"], record["id"])
+            self._keys[entry[1]] = (entry[0], category, status)
+            added.append(entry)
+            for group in ((0, category), (1, status), (2, (category, status))):
+                grouped.setdefault(group, []).append(entry)
+        if added:
+            merge_sorted(self.all, added)
+        buckets = (self.by_category, self.by_status, self.by_category_status)
+        for (kind, key), entries in grouped.items():
+            merge_sorted(buckets[kind].setdefault(key, []), entries)
+
+    def remove(self, record_id: str):
+        """Drop a record from every bucket"""
+        keys = self._keys.pop(record_id, None)
+        if keys is None:
+            return
+        created_at, category, status = keys
+        entry = (created_at, record_id)
+        self._discard(self.all, entry)
+        self._discard_bucket(self.by_category, category, entry)
+        self._discard_bucket(self.by_status, status, entry)
+        self._discard_bucket(self.by_category_status, (category, status), entry)
+
+    def reindex(self, record: dict):
+        """Move a record between buckets if an indexed field changed"""
+        keys = self._keys.get(record["id"])
+        if keys != (record["created_at"], record.get("category"), record.get("status")):
+            self.add(record)
+
+    def positions(self, record_ids: List[str]) -> List[Tuple[str, str]]:
+        """``(created_at, id)`` sort positions of the ids"""
+        keys = self._keys
+        return [(keys[record_id][0], record_id) for record_id in record_ids]
+
+    def bucket(self, category: Optional[str] = None,
+               status: Optional[str] = None) -> List[Tuple[str, str]]:
+        """Return the sorted bucket matching the filters"""
+        if category and status:
+            return self.by_category_status.get((category, status), [])
+        if category:
+            return self.by_category.get(category, [])
+        if status:
+            return self.by_status.get(status, [])
+        return self.all
+
+    def page(self, category: Optional[str] = None, status: Optional[str] = None,
+             limit: int = 50, before: Optional[Tuple[str, str]] = None) -> tuple:
+        """Return up to ``limit`` entries older than ``before``, newest first"""
+        entries = self.bucket(category, status)
+        end = bisect_left(entries, before) if before else len(entries)
+        start = max(end - limit, 0)
+        selected = entries[start:end][::-1]
+        next_entry = selected[-1] if start > 0 and selected else None
+        return selected, next_entry
+
+    def count(self, category: Optional[str] = None,
+              status: Optional[str] = None) -> int:
+        return len(self.bucket(category, status))
+
+    def category_counts(self, status: Optional[str] = None) -> Dict[str, int]:
+        """Number of records per category, optionally for one status"""
+        if status:
+            return {category: len(entries)
+                    for (category, entry_status), entries in self.by_category_status.items()
+                    if entry_status == status and entries}
+        return {category: len(entries)
+                for category, entries in self.by_category.items() if entries}
+
+    @staticmethod
+    def _discard(entries: List[Tuple[str, str]], entry: Tuple[str, str]):
+        position = bisect_left(entries, entry)
+        if position < len(entries) and entries[position] == entry:
+            del entries[position]
+
+    def _discard_bucket(self, buckets: dict, key, entry: Tuple[str, str]):
+        entries = buckets.get(key)
+        if entries is None:
+            return
+        self._discard(entries, entry)
+        if not entries:
+            del buckets[key]
+
+
+class _RangeIndex:
+    """Value-ordered index of one numeric field.
+
+    Buckets mirror ``_ListingIndex`` (all, per category, per status, per
+    both) and hold sorted ``(value, id)`` pairs, so a range filter is two
+    bisections and an ordered walk.  Records without a value are not indexed.
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self.buckets: Dict[Tuple[Optional[str], Optional[str]], List[Tuple[float, str]]] = {}
+        self._keys: Dict[str, Tuple[float, str, str]] = {}
+
+    def _bucket_keys(self, category: str, status: str) -> tuple:
+        return (None, None), (category, None), (None, status), (category, status)
+
+    def add(self, record: dict):
+        """Index a record by its current value, category and status"""
+        record_id = record["id"]
+        if record_id in self._keys:
+            self.remove(record_id)
+        value = record.get(self.field)
+        if value is None:
+            return
+        category, status = record.get("category"), record.get("status")
+        self._keys[record_id] = (value, category, status)
+        entry = (value, record_id)
+        for key in self._bucket_keys(category, status):
+            insort(self.buckets.setdefault(key, []), entry)
+
+    def build(self, records):
+        """Index many records at once with a single sort"""
+        entries = [(record[self.field], record) for record in records
+                   if record.get(self.field) is not None]
+        entries.sort(key=lambda item: (item[0], item[1]["id"]))
+        for value, record in entries:
+            category, status = record.get("category"), record.get("status")
+            self._keys[record["id"]] = (value, category, status)
+            entry = (value, record["id"])
+            for key in self._bucket_keys(category, status):
+                self.buckets.setdefault(key, []).append(entry)
+
+    def add_many(self, records: List[dict]):
+        """Index a batch of new records, merging it into each touched bucket once"""
+        grouped: Dict[Tuple[Optional[str], Optional[str]], List[Tuple[float, str]]] = {}
+        for record in records:
+            value = record.get(self.field)
+            if value is None:
+                continue
+            category, status = record.get("category"), record.get("status")
+            self._keys[record["id"]] = (value, category, status)
+            entry = (value, record["id"])
+            for key in self._bucket_keys(category, status):
+                grouped.setdefault(key, []).append(entry)
+        for key, entries in grouped.items():
+            merge_sorted(self.buckets.setdefault(key, []), entries)
+
+    def remove(self, record_id: str):
+        """Drop a record from every bucket"""
+        keys = self._keys.pop(record_id, None)
+        if keys is None:
+            return
+        value, category, status = keys
+        entry = (value, record_id)
+        for key in self._bucket_keys(category, status):
+            entries = self.buckets.get(key)
+            if entries is None:
+                continue
+            position = bisect_left(entries, entry)
+            if position < len(entries) and entries[position] == entry:
+                del entries[position]
+            if not entries:
+                del self.buckets[key]
+
+    def reindex(self, record: dict):
+        """Move a record if its value, category or status changed"""
+        keys = self._keys.get(record["id"])
+        current = (record.get(self.field), record.get("category"), record.get("status"))
+        if keys != current:
+            self.add(record)
+
+    def filter(self, record_ids: List[str], low: Optional[float] = None,
+               high: Optional[float] = None) -> List[str]:
+        """Keep the ids whose value lies within [low, high]"""
+        keys = self._keys
+        return [record_id for record_id in record_ids if record_id in keys
+                and (low is None or keys[record_id][0] >= low)
+                and (high is None or keys[record_id][0] <= high)]
+
+    def positions(self, record_ids: List[str]) -> List[Tuple[float, str]]:
+        """``(value, id)`` sort positions of the ids that have a value"""
+        keys = self._keys
+        return [(keys[record_id][0], record_id) for record_id in record_ids if record_id in keys]
+
+    def slice(self, category: Optional[str] = None, status: Optional[str] = None,
+              low: Optional[float] = None, high: Optional[float] = None) -> tuple:
+        """Return ``(entries, start, end)``: entries[start:end] have low <= value <= high"""
+        entries = self.buckets.get((category or None, status or None), [])
+        start = bisect_left(entries, (low, "")) if low is not None else 0
+        end = bisect_right(entries, (high, _MAX_ID)) if high is not None else len(entries)
+        return entries, start, max(start, end)
+
+
+def _in_bounds(record: dict, bounds: Dict[str, Tuple[Optional[float], Optional[float]]]) -> bool:
+    for field, (low, high) in bounds.items():
+        value = record.get(field)
+        if value is None or (low is not None and value < low) or (high is not None and value > high):
+            return False
+    return True
+
+
+class ChangeLog:
+    """Bounded log of catalog changes by version, for delta sync.
+
+    Holds ``(version, collection, record_id, op)`` with ``op`` one of
+    ``insert``/``update``/``delete`` -- records are read as they are now
+    when a delta is served, so the log stays a few tuples per change.
+    ``floor`` is the newest version that fell out of the log: deltas can
+    be served from any version at or above it.
+    """
+
+    def __init__(self, capacity: int = 10000):
+        self.entries: Deque[Tuple[int, str, str, str]] = deque(maxlen=capacity)
+        self.floor = 0
+        self._lock = threading.Lock()  # SqliteDatabase records from executor threads
+
+    def record(self, version: int, collection: str, record_id: str, op: str):
+        with self._lock:
+            if len(self.entries) == self.entries.maxlen:
+                self.floor = self.entries[0][0]
+            self.entries.append((version, collection, record_id, op))
+
+    def reset(self, version: int):
+        """Forget everything up to ``version`` (e.g. after a reload)"""
+        with self._lock:
+            self.entries.clear()
+            self.floor = version
+
+    def since(self, version: int) -> Optional[List[Tuple[str, str, str]]]:
+        """Net ``(collection, record_id, op)`` changes after ``version``, or None if compacted"""
+        with self._lock:
+            if version < self.floor:
+                return None
+            tail = []
+            for entry in reversed(self.entries):
+                if entry[0] <= version:
+                    break
+                tail.append(entry)
+        merged: Dict[Tuple[str, str], str] = {}
+        for _, collection, record_id, op in reversed(tail):
+            key = (collection, record_id)
+            previous = merged.get(key)
+            if previous is None:
+                merged[key] = op
+            elif op == "delete":
+                if previous == "insert":
+                    del merged[key]  # created and removed in between: the client never saw it
+                else:
+                    merged[key] = "delete"
+            elif previous == "delete":
+                merged[key] = "update"  # re-created under the same id
+        return [(collection, record_id, op) for (collection, record_id), op in merged.items()]
+
 
 class Database:
     """In-memory database for products and auctions"""
     
-    def __init__(self):
+    def __init__(self, change_log_size: int = 10000):
         self.products: Dict[str, dict] = {}
         self.auctions: Dict[str, dict] = {}
         self.purchases: Dict[str, dict] = {}
+        self._product_index = _ListingIndex()
+        self._auction_index = _ListingIndex()
+        self._product_ranges = self._range_indexes("products")
+        self._auction_ranges = self._range_indexes("auctions")
+        self.journal = None
+        self.instance_id = uuid.uuid4().hex[:8]
+        self.version = 0
+        self.changes = ChangeLog(change_log_size)
+        self._listeners = []
+    
+    async def run(self, func, *args, **kwargs):
+        """Call a database method (kept for parity with SqliteDatabase)"""
+        return func(*args, **kwargs)
+    
+    # Persistence
+    def attach_journal(self, journal) -> int:
+        """Restore state from a journal and log every later mutation to it"""
+        replayed = journal.restore(self)
+        self.journal = journal
+        return replayed
+    
+    def subscribe(self, listener):
+        """Call ``listener(entry)`` after every mutation (same entries as the journal)"""
+        self._listeners.append(listener)
+    
+    def _log(self, *entry):
+        if entry[0] == "bid" or entry[1] in CATALOG_COLLECTIONS:
+            self.version += 1
+            self.changes.record(self.version, *change_key(entry))
+        if self.journal is not None:
+            self.journal.append(entry)
+        for listener in self._listeners:
+            listener(entry)
+    
+    def collection_sizes(self) -> Dict[str, int]:
+        """Number of records per collection"""
+        return {name: len(collection) for name, collection in self._collections().items()}
+    
+    def _collections(self) -> Dict[str, Dict[str, dict]]:
+        return {
+            "products": self.products,
+            "auctions": self.auctions,
+            "purchases": self.purchases,
+        }
+    
+    @staticmethod
+    def _export(record: dict) -> dict:
+        """JSON-ready copy of a record"""
+        exported = {}
+        for key, value in record.items():
+            if isinstance(value, BidHistory):
+                value = value.to_columns()
+            elif isinstance(value, list):
+                value = list(value)
+            exported[key] = value
+        return exported
+    
+    def dump_state(self) -> Dict[str, List[dict]]:
+        """Copy all records for a snapshot"""
+        return {
+            name: [self._export(record) for record in collection.values()]
+            for name, collection in self._collections().items()
+        }
+    
+    def load_state(self, state: Dict[str, Dict[str, dict]]):
+        """Replace all records with a loaded snapshot"""
+        self.products = state.get("products", {})
+        self.auctions = state.get("auctions", {})
+        self.purchases = state.get("purchases", {})
+        for auction in self.auctions.values():
+            auction["bids"] = BidHistory.from_columns(auction.get("bids", []))
+    
+    def apply_journal_entry(self, entry: list):
+        """Replay one logged mutation without re-logging or re-indexing it"""
+        op = entry[0]
+        if op == "bid":
+            _, auction_id, user_id, amount, timestamp = entry
+            auction = self.auctions.get(auction_id)
+            if auction is not None:
+                auction["bids"].append(user_id, amount, timestamp)
+                auction["current_price"] = amount
+            return
+        collections = self._collections()
+        if op == "put":
+            _, name, record = entry
+            if name == "auctions":
+                record["bids"] = BidHistory.from_columns(record.get("bids", []))
+            collections[name][record["id"]] = record
+        elif op == "patch":
+            _, name, record_id, fields = entry
+            record = collections[name].get(record_id)
+            if record is not None:
+                record.update(fields)
+        elif op == "del":
+            _, name, record_id = entry
+            collections[name].pop(record_id, None)
+    
+    def rebuild_indexes(self):
+        """Rebuild all secondary indexes from the records"""
+        self._product_index = _ListingIndex()
+        self._product_index.build(self.products.values())
+        self._auction_index = _ListingIndex()
+        self._auction_index.build(self.auctions.values())
+        self._product_ranges = self._range_indexes("products")
+        self._auction_ranges = self._range_indexes("auctions")
+        for index in self._product_ranges.values():
+            index.build(self.products.values())
+        for index in self._auction_ranges.values():
+            index.build(self.auctions.values())
+    
+    @staticmethod
+    def _range_indexes(collection: str) -> Dict[str, _RangeIndex]:
+        return {field: _RangeIndex(field) for field in RANGE_FIELDS[collection].values()}
+
+    # Replication
+    def apply_change(self, entry: tuple):
+        """Apply a change committed elsewhere, keeping indexes and listeners in step.
+
+        ``put`` carries the whole record and works as an upsert: an existing
+        record is updated in place and listeners see a ``patch`` of the
+        fields that actually changed, so re-applying a record is a no-op.
+        """
+        op = entry[0]
+        if op == "bid":
+            _, auction_id, user_id, amount, timestamp = entry
+            auction = self.auctions.get(auction_id)
+            if auction is None:
+                return
+            auction["bids"].append(user_id, amount, timestamp)
+            auction["current_price"] = amount
+            self._auction_ranges["current_price"].reindex(auction)
+            self._log(*entry)
+            return
+
+        name = entry[1]
+        collection = self._collections()[name]
+        listing, ranges = {
+            "products": (self._product_index, self._product_ranges),
+            "auctions": (self._auction_index, self._auction_ranges),
+        }.get(name, (None, {}))
+        if op == "del":
+            if collection.pop(entry[2], None) is None:
+                return
+            if listing is not None:
+                listing.remove(entry[2])
+            for index in ranges.values():
+                index.remove(entry[2])
+            self._log(*entry)
+            return
+
+        record = dict(entry[2])
+        if name == "auctions" and not isinstance(record.get("bids", BidHistory()), BidHistory):
+            record["bids"] = BidHistory.from_columns(record["bids"])
+        current = collection.get(record["id"])
+        if current is None:
+            if name == "auctions":
+                record.setdefault("bids", BidHistory())
+            collection[record["id"]] = current = record
+            change = ("put", name, self._export(record) if name == "auctions" else record)
+        else:
+            fields = {key: value for key, value in record.items() if current.get(key) != value}
+            if not fields:
+                return
+            current.update(fields)
+            change = ("patch", name, record["id"], fields)
+        if listing is not None:
+            listing.reindex(current)
+        for index in ranges.values():
+            index.reindex(current)
+        self._log(*change)
+    
+    def apply_changes(self, entries: List[tuple]):
+        """Apply a run of replicated changes in order.
+
+        Consecutive inserts of new products (a bulk import elsewhere) are
+        indexed as one batch instead of one ``apply_change`` each.
+        """
+        added = []
+        for entry in entries:
+            if entry[0] == "put" and entry[1] == "products" and entry[2]["id"] not in self.products:
+                product = dict(entry[2])
+                self.products[product["id"]] = product
+                added.append(product)
+                continue
+            if added:
+                self._index_new_products(added)
+                added = []
+            self.apply_change(entry)
+        if added:
+            self._index_new_products(added)
+    
+    def _find_page(self, records: Dict[str, dict], listing: _ListingIndex,
+                   ranges: Dict[str, _RangeIndex], collection: str,
+                   category: Optional[str], status: Optional[str], limit: int,
+                   cursor: Optional[str], sort: str,
+                   filters: Dict[str, Tuple[Optional[float], Optional[float]]]) -> tuple:
+        """Filtered, sorted page over a listing index and its range indexes.
+
+        The page is produced either by walking the index of the sort order
+        and checking range filters per record, or by collecting the
+        narrowest range slice and sorting it.  Walking costs about
+        ``limit * walk_size / slice_size`` records, collecting costs
+        ``slice_size``; the cheaper plan is chosen per query.
+        """
+        if sort not in SORT_ORDERS:
+            raise ValueError(f"Unknown sort order: {sort!r}")
+        fields = RANGE_FIELDS[collection]
+        bounds = {fields[name]: bound for name, bound in filters.items()
+                  if bound != (None, None)}
+        if sort == "newest":
+            sort_field, descending = None, True
+        else:
+            name, _, direction = sort.rpartition("_")
+            sort_field, descending = fields[name], direction == "desc"
+
+        if sort_field is None:
+            if not bounds:
+                before = decode_cursor(cursor) if cursor else None
+                entries, next_entry = listing.page(category, status, limit, before)
+                return ([records[record_id] for _, record_id in entries],
+                        encode_cursor(next_entry) if next_entry else None)
+            after = decode_cursor(cursor) if cursor else None
+            walk = listing.bucket(category, status)
+            start, end = 0, len(walk)
+            if after:
+                end = bisect_left(walk, after)
+        else:
+            if cursor:
+                value, record_id = decode_cursor(cursor)
+                try:
+                    after = (float(value), record_id)
+                except ValueError:
+                    raise ValueError(f"Invalid cursor: {cursor!r}")
+            else:
+                after = None
+            walk, start, end = ranges[sort_field].slice(category, status,
+                                                        *bounds.get(sort_field, (None, None)))
+            if after:
+                if descending:
+                    end = max(start, min(end, bisect_left(walk, after)))
+                else:
+                    start = min(end, max(start, bisect_right(walk, after)))
+
+        # The walked slice already applies the sort field's own bounds
+        walk_bounds = {field: bound for field, bound in bounds.items() if field != sort_field}
+        narrow = None
+        for field, (low, high) in walk_bounds.items():
+            entries, lo, hi = ranges[field].slice(category, status, low, high)
+            if narrow is None or hi - lo < narrow[3] - narrow[2]:
+                narrow = (field, entries, lo, hi)
+
+        if narrow is not None and (narrow[3] - narrow[2]) ** 2 < limit * (end - start):
+            # Filter and order by index values only; records are read for the page alone
+            narrow_field, entries, lo, hi = narrow
+            record_ids = [record_id for _, record_id in entries[lo:hi]]
+            for field, (low, high) in bounds.items():
+                if field != narrow_field:
+                    record_ids = ranges[field].filter(record_ids, low, high)
+            order = listing if sort_field is None else ranges[sort_field]
+            positions = order.positions(record_ids)
+            if after is not None:
+                positions = [position for position in positions
+                             if (position < after if descending else position > after)]
+            select = heapq.nlargest if descending else heapq.nsmallest
+            page = [(position, records[position[1]]) for position in select(limit + 1, positions)]
+        else:
+            indexes = range(end - 1, start - 1, -1) if descending else range(start, end)
+            page = []
+            for i in indexes:
+                position = walk[i]
+                record = records[position[1]]
+                if _in_bounds(record, walk_bounds):
+                    page.append((position, record))
+                    if len(page) > limit:
+                        break
+
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            position = page[-1][0]
+            next_cursor = encode_cursor((position[0] if sort_field is None else repr(position[0]),
+                                         position[1]))
+        return [record for _, record in page], next_cursor
     
     # Product methods
     def add_product(self, name: str, price: float, category: str, 
@@ -29,37 +671,98 @@ class Database:
             "status": "available",  # available, sold
             "created_at": datetime.now().isoformat()
         }
+        self._product_index.add(self.products[product_id])
+        for index in self._product_ranges.values():
+            index.add(self.products[product_id])
+        self._log("put", "products", self.products[product_id])
         return product_id
     
+    def add_products(self, items: List[dict]) -> List[str]:
+        """Add many products at once, updating the indexes once for the batch.
+
+        Each item has the ``add_product`` fields (``float`` for the float
+        value); a ``status`` may be given as well.
+        """
+        products = []
+        for item in items:
+            product_id = str(uuid.uuid4())
+            product = {
+                "id": product_id,
+                "name": item["name"],
+                "price": item["price"],
+                "category": item["category"],
+                "description": item.get("description", ""),
+                "photo_url": item.get("photo_url", ""),
+                "link": item.get("link", ""),
+                "float": item.get("float"),
+                "status": item.get("status") or "available",
+                "created_at": datetime.now().isoformat()
+            }
+            self.products[product_id] = product
+            products.append(product)
+        self._index_new_products(products)
+        return [product["id"] for product in products]
+    
+    def _index_new_products(self, products: List[dict]):
+        """Index and log products just stored, one index update for the batch"""
+        self._product_index.add_many(products)
+        for index in self._product_ranges.values():
+            index.add_many(products)
+        for product in products:
+            self._log("put", "products", product)
+    
     def get_product(self, product_id: str) -> Optional[dict]:
         """Get product by ID"""
         return self.products.get(product_id)
     
     def get_all_products(self, category: Optional[str] = None, 
                         status: Optional[str] = None) -> List[dict]:
-        """Get all products with optional filters"""
-        products = list(self.products.values())
-        
-        if category:
-            products = [p for p in products if p["category"] == category]
-        
-        if status:
-            products = [p for p in products if p["status"] == status]
-        
-        return sorted(products, key=lambda x: x["created_at"], reverse=True)
+        """Get all products with optional filters, newest first"""
+        products = self.products
+        return [products[product_id] for _, product_id
+                in reversed(self._product_index.bucket(category, status))]
+    
+    def get_products_page(self, category: Optional[str] = None,
+                          status: Optional[str] = None, limit: int = 50,
+                          cursor: Optional[str] = None, sort: str = "newest",
+                          min_price: Optional[float] = None, max_price: Optional[float] = None,
+                          min_float: Optional[float] = None, max_float: Optional[float] = None
+                          ) -> Tuple[List[dict], Optional[str]]:
+        """Get one page of products and the cursor of the next page"""
+        return self._find_page(self.products, self._product_index, self._product_ranges,
+                               "products", category, status, limit, cursor, sort,
+                               {"price": (min_price, max_price), "float": (min_float, max_float)})
+    
+    def count_products(self, category: Optional[str] = None,
+                       status: Optional[str] = None) -> int:
+        """Count products matching the filters"""
+        return self._product_index.count(category, status)
+    
+    def get_category_counts(self, status: Optional[str] = None) -> Dict[str, int]:
+        """Get number of products per category"""
+        return self._product_index.category_counts(status)
     
     def update_product(self, product_id: str, **kwargs) -> bool:
         """Update product fields"""
         if product_id not in self.products:
             return False
         
-        self.products[product_id].update(kwargs)
+        product = self.products[product_id]
+        product.update(kwargs)
+        self._product_index.reindex(product)
+        for index in self._product_ranges.values():
+            index.reindex(product)
+        self._log("patch", "products", product_id, kwargs)
         return True
     
     def delete_product(self, product_id: str) -> bool:
         """Delete a product"""
         if product_id in self.products:
             del self.products[product_id]
+            self._product_index.remove(product_id)
+            for index in self._product_ranges.values():
+                index.remove(product_id)
+            self._log("del", "products", product_id)
             return True
         return False
     
@@ -84,9 +787,13 @@ class Database:
             "link": link,
             "float": float_value,
             "status": "active",  # active, closed
-            "bids": [],
+            "bids": BidHistory(),
             "created_at": datetime.now().isoformat()
         }
+        self._auction_index.add(self.auctions[auction_id])
+        for index in self._auction_ranges.values():
+            index.add(self.auctions[auction_id])
+        self._log("put", "auctions", self._export(self.auctions[auction_id]))
         return auction_id
     
     def get_auction(self, auction_id: str) -> Optional[dict]:
@@ -94,13 +801,21 @@ class Database:
         return self.auctions.get(auction_id)
     
     def get_all_auctions(self, status: Optional[str] = None) -> List[dict]:
-        """Get all auctions with optional status filter"""
-        auctions = list(self.auctions.values())
-        
-        if status:
-            auctions = [a for a in auctions if a["status"] == status]
-        
-        return sorted(auctions, key=lambda x: x["created_at"], reverse=True)
+        """Get all auctions with optional status filter, newest first"""
+        auctions = self.auctions
+        return [auctions[auction_id] for _, auction_id
+                in reversed(self._auction_index.bucket(status=status))]
+    
+    def get_auctions_page(self, category: Optional[str] = None,
+                          status: Optional[str] = None, limit: int = 50,
+                          cursor: Optional[str] = None, sort: str = "newest",
+                          min_price: Optional[float] = None, max_price: Optional[float] = None,
+                          min_float: Optional[float] = None, max_float: Optional[float] = None
+                          ) -> Tuple[List[dict], Optional[str]]:
+        """Get one page of auctions (price = current price) and the cursor of the next page"""
+        return self._find_page(self.auctions, self._auction_index, self._auction_ranges,
+                               "auctions", category, status, limit, cursor, sort,
+                               {"price": (min_price, max_price), "float": (min_float, max_float)})
     
     def add_bid(self, auction_id: str, user_id: int, amount: float) -> bool:
         """Add a bid to an auction"""
@@ -114,14 +829,20 @@ class Database:
         if amount <= auction["current_price"]:
             return False
         
-        auction["bids"].append({
-            "user_id": user_id,
-            "amount": amount,
-            "timestamp": datetime.now().isoformat()
-        })
+        timestamp = time.time()
+        auction["bids"].append(user_id, amount, timestamp)
         auction["current_price"] = amount
+        self._auction_ranges["current_price"].reindex(auction)
+        self._log("bid", auction_id, user_id, amount, timestamp)
         return True
     
+    def get_price_series(self, auction_id: str, points: int = 50) -> Optional[Dict[str, list]]:
+        """Get a downsampled price-over-time series of an auction"""
+        auction = self.auctions.get(auction_id)
+        if auction is None:
+            return None
+        return auction["bids"].price_series(points)
+    
     def close_auction(self, auction_id: str) -> bool:
         """Close an auction"""
         return self.update_auction(auction_id, status="closed")
@@ -131,13 +852,22 @@ class Database:
         if auction_id not in self.auctions:
             return False
         
-        self.auctions[auction_id].update(kwargs)
+        auction = self.auctions[auction_id]
+        auction.update(kwargs)
+        self._auction_index.reindex(auction)
+        for index in self._auction_ranges.values():
+            index.reindex(auction)
+        self._log("patch", "auctions", auction_id, kwargs)
         return True
     
     def delete_auction(self, auction_id: str) -> bool:
         """Delete an auction"""
         if auction_id in self.auctions:
             del self.auctions[auction_id]
+            self._auction_index.remove(auction_id)
+            for index in self._auction_ranges.values():
+                index.remove(auction_id)
+            self._log("del", "auctions", auction_id)
             return True
         return False
     
@@ -152,8 +882,21 @@ class Database:
             "status": "pending",  # pending, confirmed, cancelled
             "timestamp": datetime.now().isoformat()
         }
+        self._log("put", "purchases", self.purchases[purchase_id])
         return purchase_id
     
+    def reserve_purchase(self, product_id: str, user_id: int, since: str) -> Tuple[bool, dict]:
+        """Record a purchase unless one for the product is pending since ``since`` (ISO time).
+
+        Returns ``(True, new purchase)`` or ``(False, the pending purchase)``.
+        """
+        for purchase in self.purchases.values():
+            if (purchase["product_id"] == product_id and purchase["status"] == "pending"
+                    and purchase["timestamp"] >= since):
+                return False, purchase
+        purchase_id = self.record_purchase(product_id, user_id)
+        return True, self.purchases[purchase_id]
+
     def get_purchase(self, purchase_id: str) -> Optional[dict]:
         """Get purchase by ID"""
         return self.purchases.get(purchase_id)
@@ -162,5 +905,22 @@ class Database:
         """Update purchase status"""
         if purchase_id in self.purchases:
             self.purchases[purchase_id]["status"] = status
+            self._log("patch", "purchases", purchase_id, {"status": status})
             return True
         return False
+    
+    def get_pending_purchases(self) -> List[dict]:
+        """Purchases still waiting for the admin, oldest first"""
+        pending = [purchase for purchase in self.purchases.values() if purchase["status"] == "pending"]
+        return sorted(pending, key=lambda x: x["timestamp"])
+    
+    def expire_purchases(self, purchase_ids: List[str]) -> int:
+        """Delete the given purchases that are still pending; return how many were deleted"""
+        expired = 0
+        for purchase_id in purchase_ids:
+            purchase = self.purchases.get(purchase_id)
+            if purchase is not None and purchase["status"] == "pending":
+                del self.purchases[purchase_id]
+                self._log("del", "purchases", purchase_id)
+                expired += 1
+        return expired
@@ -0,0 +1,151 @@
+import gzip
+import hashlib
+import json
+import os
+from typing import Dict, Optional, Tuple
+
+from aiohttp import web
+
+from static_cache import accepted_encodings
+
+LANGUAGES = ("ru", "uz")
+DEFAULT_LANGUAGE = "ru"
+FIRST_PAGE_SIZE = 200  # the page size loadProducts() in app.js asks for
+TRANSLATIONS_TAG = '<script src="/static/translations.js"></script>'
+HTML_TAG = '<html lang="ru">'
+
+
+def inline_json(value) -> str:
+    """JSON safe to embed in an inline <script>"""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).replace("<", "\\u003c")
+
+
+class _Variant:
+    __slots__ = ("template_etag", "version", "page", "etag", "variants")
+
+    def __init__(self, template_etag: str, version: int, page: str, body: bytes):
+        self.template_etag = template_etag
+        self.version = version
+        self.page = page
+        self.etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        self.variants: Dict[str, bytes] = {"identity": body, "gzip": gzip.compress(body, compresslevel=6, mtime=0)}
+
+
+class FirstPaintRenderer:
+    """``index.html`` per language and mode with the data for the first paint inlined.
+
+    Each variant replaces the ``translations.js`` tag with one inline
+    script holding the translation table (compiled once from
+    ``translations.yaml`` on first use) and the first catalog page, so the Mini App
+    renders products without another request.  A variant is rebuilt
+    lazily when the catalog version moves, and only re-encoded when its
+    inlined page actually changed (auction bids, say, leave it alone).
+    """
+
+    def __init__(self, static_cache, db, translations_path: str, page_size: int = FIRST_PAGE_SIZE):
+        self.static_cache = static_cache
+        self.db = db
+        self.page_size = page_size
+        self.translations_path = translations_path
+        self._translations: Optional[str] = None  # without it the plain index.html is served
+        self._translations_loaded = False
+        self._variants: Dict[Tuple[str, bool], _Variant] = {}
+
+    @classmethod
+    def for_site(cls, static_cache, db, page_size: int = FIRST_PAGE_SIZE) -> "FirstPaintRenderer":
+        return cls(static_cache, db, os.path.join(static_cache.root, "translations.yaml"), page_size)
+
+    def build_all(self):
+        """Render every variant up front (called at startup, off the request path)"""
+        for language in LANGUAGES:
+            for admin in (False, True):
+                self._refresh(language, admin, self._first_page(admin))
+
+    def translations(self) -> Optional[str]:
+        """The translation table as inline JSON, or None if there is no translations.yaml"""
+        if not self._translations_loaded:
+            self._translations_loaded = True
+            if os.path.isfile(self.translations_path):
+                import yaml  # deferred: PyYAML is only needed to compile the table once
+                with open(self.translations_path, "r", encoding="utf-8") as f:
+                    self._translations = inline_json(yaml.safe_load(f))
+        return self._translations
+
+    async def respond(self, request: web.Request) -> web.Response:
+        """GET / -- the Mini App page for ``?lang=`` (or Accept-Language) and ``?admin=true``"""
+        language = self._language(request)
+        admin = request.query.get("admin") == "true"
+        variant = self._current(language, admin)
+        if variant is None:
+            page = await self.db.run(self._first_page, admin)
+            variant = self._refresh(language, admin, page)
+        if variant is None:
+            return self.static_cache.respond(request, "index.html")
+
+        headers = {
+            "ETag": variant.etag,
+            "Cache-Control": self.static_cache.html_cache_control,
+            "Vary": "Accept-Encoding, Accept-Language",
+        }
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            if "*" in tags or variant.etag in tags:
+                return web.Response(status=304, headers=headers)
+        accepted = accepted_encodings(request.headers.get("Accept-Encoding", ""))
+        encoding = "gzip" if accepted.get("gzip", accepted.get("*", 0)) > 0 else "identity"
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return web.Response(body=variant.variants[encoding], headers=headers,
+                            content_type="text/html", charset="utf-8")
+
+    @staticmethod
+    def _language(request: web.Request) -> str:
+        language = request.query.get("lang")
+        if language in LANGUAGES:
+            return language
+        best, best_q = DEFAULT_LANGUAGE, 0.0
+        for tag, q in accepted_encodings(request.headers.get("Accept-Language", "")).items():
+            primary = tag.split("-", 1)[0]
+            if primary in LANGUAGES and q > best_q:
+                best, best_q = primary, q
+        return best
+
+    def _current(self, language: str, admin: bool) -> Optional[_Variant]:
+        """The cached variant if neither the catalog nor the template changed since it was built"""
+        variant = self._variants.get((language, admin))
+        template = self.static_cache.get("index.html")
+        if variant is None or template is None or variant.template_etag != template.etag:
+            return None
+        return variant if variant.version == self.db.version else None
+
+    def _first_page(self, admin: bool) -> Tuple[int, str]:
+        """Catalog version and the serialized first listing page"""
+        version = self.db.version
+        items, next_cursor = self.db.get_products_page(
+            status=None if admin else "available", limit=self.page_size)
+        return version, inline_json({"items": items, "next_cursor": next_cursor})
+
+    def _refresh(self, language: str, admin: bool, page: Tuple[int, str]) -> Optional[_Variant]:
+        template = self.static_cache.get("index.html")
+        translations = self.translations()
+        if template is None or translations is None:
+            return None
+        version, listing = page
+        variant = self._variants.get((language, admin))
+        if variant is not None and variant.template_etag == template.etag and variant.page == listing:
+            # Same products: the inlined page is still exact as of its older version
+            variant.version = version
+            return variant
+        html = template.variants["identity"].decode("utf-8")
+        if TRANSLATIONS_TAG not in html:
+            return None
+        script = (f"<script>const translationsData = {translations};"
+                  f"window.bootLanguage = {inline_json(language)};"
+                  f"window.bootCatalog = {listing};"
+                  f"bootCatalog.version = {version};"
+                  f"bootCatalog.instance = {inline_json(self.db.instance_id)};</script>")
+        html = html.replace(HTML_TAG, f'<html lang="{language}">', 1).replace(TRANSLATIONS_TAG, script, 1)
+        variant = _Variant(template.etag, version, listing, html.encode("utf-8"))
+        self._variants[(language, admin)] = variant
+        return variant
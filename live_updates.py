@@ -0,0 +1,215 @@
+import asyncio
+import json
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from aiohttp import web
+
+from api import json_error
+from database import CATALOG_COLLECTIONS
+
+MAX_TOPICS = 50  # per connection
+MAX_PENDING = 1000  # coalesced changes per connection before it is told to resync
+TOPIC_PREFIXES = ("product:", "auction:", "category:")
+SINGULAR = {"products": "product", "auctions": "auction"}
+
+
+class LiveClient:
+    """One open event stream and the changes waiting to be written to it"""
+
+    __slots__ = ("topics", "pending", "overflow", "wakeup", "last_write", "closed")
+
+    def __init__(self, topics: Set[str]):
+        self.topics = topics
+        self.pending: Dict[Tuple[str, str], dict] = {}
+        self.overflow = False
+        self.wakeup = asyncio.Event()
+        self.last_write = 0.0
+        self.closed = False
+
+    def push(self, kind: str, record_id: str, op: str, fields: dict):
+        """Queue a change, merging it into a pending change of the same record"""
+        key = (kind, record_id)
+        current = self.pending.get(key)
+        if current is None:
+            if len(self.pending) >= MAX_PENDING:
+                self.overflow = True
+                self.pending.clear()
+            elif not self.overflow:
+                self.pending[key] = {"kind": kind, "id": record_id, "op": op, "fields": dict(fields)}
+        elif op == "delete":
+            current["op"] = "delete"
+            current["fields"] = {}
+        elif current["op"] != "delete":
+            current["fields"].update(fields)  # an insert followed by updates stays an insert
+        self.wakeup.set()
+
+
+class LiveUpdates:
+    """Server-Sent Events push channel for catalog changes.
+
+    ``GET /api/live?topics=products,auction:<id>,category:weapons`` opens a
+    stream.  Database changes are routed only to the connections subscribed
+    to the record's topics (``products``/``auctions``, ``product:<id>``/
+    ``auction:<id>``, ``category:<name>``).  Each connection coalesces
+    changes per record and writes at most once per ``coalesce_interval``,
+    so a bidding war costs one small event per viewer rather than one per
+    bid.  An idle connection is just a parked coroutine: a single
+    heartbeat task wakes the ones that have been quiet too long.
+    """
+
+    def __init__(self, db, max_clients: int = 10000, coalesce_interval: float = 0.25,
+                 heartbeat_interval: float = 20.0):
+        self.db = db
+        self.max_clients = max_clients
+        self.coalesce_interval = coalesce_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.clients: Set[LiveClient] = set()
+        self._subscribers: Dict[str, Set[LiveClient]] = {}
+        # (kind, id) -> category, since patches only carry the changed fields
+        self._categories: Dict[Tuple[str, str], Optional[str]] = {}
+        self._heartbeat: Optional[asyncio.Task] = None
+        for product in db.get_all_products():
+            self._categories[("products", product["id"])] = product.get("category")
+        for auction in db.get_all_auctions():
+            self._categories[("auctions", auction["id"])] = auction.get("category")
+        db.subscribe(self.on_change)
+
+    def register(self, app: web.Application):
+        app.router.add_get("/api/live", self.handle)
+        app.on_startup.append(self._start)
+        app.on_shutdown.append(self._stop)
+
+    def client_count(self) -> int:
+        return len(self.clients)
+
+    # Routing
+    def on_change(self, entry):
+        """Database listener"""
+        op = entry[0]
+        if op == "bid":
+            self._publish("auctions", entry[1], "update", {"current_price": entry[3]})
+            return
+        kind = entry[1]
+        if kind not in CATALOG_COLLECTIONS:
+            return
+        if op == "put":
+            record = entry[2]
+            self._categories[(kind, record["id"])] = record.get("category")
+            fields = record
+            if kind == "auctions":
+                # Logged auctions carry their bids in column form
+                bids = record.get("bids") or ()
+                fields = {key: value for key, value in record.items() if key != "bids"}
+                fields["bid_count"] = len(bids["amounts"]) if isinstance(bids, dict) else len(bids)
+            self._publish(kind, record["id"], "insert", fields)
+        elif op == "patch":
+            _, _, record_id, fields = entry
+            fields = {key: value for key, value in fields.items() if key != "bids"}
+            previous = self._categories.get((kind, record_id))
+            if "category" in fields:
+                self._categories[(kind, record_id)] = fields["category"]
+            self._publish(kind, record_id, "update", fields, (previous,))
+        elif op == "del":
+            previous = self._categories.pop((kind, entry[2]), None)
+            self._publish(kind, entry[2], "delete", {}, (previous,))
+
+    def _publish(self, kind: str, record_id: str, op: str, fields: dict,
+                 extra_categories: Iterable[Optional[str]] = ()):
+        topics = [kind, f"{SINGULAR[kind]}:{record_id}"]
+        for category in (self._categories.get((kind, record_id)), *extra_categories):
+            if category:
+                topics.append(f"category:{category}")
+        subscribers = self._subscribers
+        targets = [subscribers[topic] for topic in topics if topic in subscribers]
+        if not targets:
+            return
+        clients = targets[0] if len(targets) == 1 else set().union(*targets)
+        for client in clients:
+            client.push(kind, record_id, op, fields)
+
+    # Connections
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        """GET /api/live?topics= -- Server-Sent Events stream of catalog changes"""
+        topics = {topic.strip() for topic in request.query.get("topics", "").split(",") if topic.strip()}
+        if not topics:
+            return json_error("topics is required")
+        if len(topics) > MAX_TOPICS:
+            return json_error(f"At most {MAX_TOPICS} topics")
+        for topic in topics:
+            if topic not in CATALOG_COLLECTIONS and not topic.startswith(TOPIC_PREFIXES):
+                return json_error(f"Unknown topic: {topic}")
+        if len(self.clients) >= self.max_clients:
+            return json_error("Too many live connections", status=503)
+
+        response = web.StreamResponse(headers={
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # keep reverse proxies from buffering the stream
+        })
+        await response.prepare(request)
+        client = LiveClient(topics)
+        self._add(client)
+        loop = asyncio.get_running_loop()
+        try:
+            await response.write(f"retry: 3000\nevent: ready\ndata: {self.db.version}\n\n".encode())
+            client.last_write = loop.time()
+            while not client.closed:
+                await client.wakeup.wait()
+                delay = client.last_write + self.coalesce_interval - loop.time()
+                if delay > 0 and not client.closed:
+                    await asyncio.sleep(delay)
+                client.wakeup.clear()
+                await response.write(self._flush(client))
+                client.last_write = loop.time()
+        except ConnectionError:
+            pass  # the client went away; noticed on the next write
+        finally:
+            self._remove(client)
+        return response
+
+    def _flush(self, client: LiveClient) -> bytes:
+        if client.overflow:
+            client.overflow = False
+            client.pending = {}
+            return b"event: resync\ndata: {}\n\n"
+        if not client.pending:
+            return b": ping\n\n"
+        changes: List[dict] = list(client.pending.values())
+        client.pending = {}
+        data = json.dumps({"version": self.db.version, "changes": changes},
+                          ensure_ascii=False, separators=(",", ":"))
+        return f"data: {data}\n\n".encode()
+
+    def _add(self, client: LiveClient):
+        self.clients.add(client)
+        for topic in client.topics:
+            self._subscribers.setdefault(topic, set()).add(client)
+
+    def _remove(self, client: LiveClient):
+        self.clients.discard(client)
+        for topic in client.topics:
+            subscribers = self._subscribers.get(topic)
+            if subscribers is not None:
+                subscribers.discard(client)
+                if not subscribers:
+                    del self._subscribers[topic]
+
+    async def _start(self, app: web.Application):
+        self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+
+    async def _stop(self, app: web.Application):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+        for client in list(self.clients):
+            client.closed = True
+            client.wakeup.set()
+
+    async def _heartbeat_loop(self):
+        """Wake connections that have been quiet for a heartbeat interval"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.heartbeat_interval / 2)
+            deadline = loop.time() - self.heartbeat_interval
+            for client in self.clients:
+                if client.last_write < deadline:
+                    client.wakeup.set()
@@ -0,0 +1,329 @@
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiohttp import web
+
+# Seconds; HTTP and Telegram calls live in milliseconds, storage in microseconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STORAGE_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001,
+                   0.0025, 0.005, 0.01, 0.05, 0.25)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Storage methods that are plumbing or the metrics' own reads, not operations
+UNTIMED_DB_METHODS = frozenset({"run", "subscribe", "attach_journal", "close", "collection_sizes",
+                                "sync", "refresh", "start", "stop"})
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with positional label values"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, *labelvalues, amount: float = 1):
+        self.values[labelvalues] = self.values.get(labelvalues, 0) + amount
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+                for key, value in self.values.items()]
+
+
+class Histogram:
+    """Fixed-bucket histogram; ``observe`` is a bisect and three increments"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (last is +Inf), sum, count]
+        self.values: Dict[tuple, list] = {}
+
+    def observe(self, value: float, *labelvalues):
+        series = self.values.get(labelvalues)
+        if series is None:
+            series = self.values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def time(self, *labelvalues) -> "_Timer":
+        """Context manager observing the elapsed wall time"""
+        return _Timer(self, labelvalues)
+
+    def render(self) -> List[str]:
+        lines = []
+        bounds = self.buckets + (float("inf"),)
+        for key, (counts, total, count) in self.values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labelvalues", "start")
+
+    def __init__(self, histogram: Histogram, labelvalues: tuple):
+        self.histogram = histogram
+        self.labelvalues = labelvalues
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labelvalues)
+
+
+class Gauge:
+    """Gauge read from a callback at scrape time.
+
+    The callback returns a number, or a dict of label-value tuples to numbers.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, callback: Callable[[], Any],
+                 labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        values = self.callback()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+                for key, value in values.items()]
+
+
+class MetricsRegistry:
+    """Collects metrics and renders them in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def gauge(self, name: str, help_text: str, callback: Callable[[], Any],
+              labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, callback, labelnames))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class ServiceMetrics:
+    """The bot's metrics and the hooks that feed them.
+
+    * ``http_middleware`` times every aiohttp request per route template;
+    * ``HandlerTimingMiddleware`` times aiogram handlers by function name;
+    * ``TelegramRequestMiddleware`` times outbound Bot API calls per method;
+    * ``instrument_database`` times every storage method call, direct or
+      through ``db.run``.
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        self.registry = registry or MetricsRegistry()
+        r = self.registry
+        self.http_requests = r.counter(
+            "http_requests_total", "HTTP requests by route, method and status",
+            ("route", "method", "status"))
+        self.http_latency = r.histogram(
+            "http_request_duration_seconds", "HTTP request latency by route", ("route", "method"))
+        self.handler_latency = r.histogram(
+            "bot_handler_duration_seconds", "aiogram handler latency", ("handler",))
+        self.handler_errors = r.counter(
+            "bot_handler_errors_total", "aiogram handler exceptions", ("handler", "error"))
+        self.action_latency = r.histogram(
+            "bot_webapp_action_duration_seconds", "Mini App action latency (purchase, bid, admin)",
+            ("action",))
+        self.storage_latency = r.histogram(
+            "db_operation_duration_seconds", "Storage call latency", ("operation",),
+            buckets=STORAGE_BUCKETS)
+        self.telegram_latency = r.histogram(
+            "telegram_api_duration_seconds", "Outbound Bot API call latency", ("method",))
+        self.telegram_errors = r.counter(
+            "telegram_api_errors_total", "Outbound Bot API call failures", ("method", "error"))
+        self._db = None
+        self._db_sizes: Dict[str, int] = {}
+
+    def render(self) -> str:
+        return self.registry.render()
+
+    def http_middleware(self, route_names: Optional[Dict[str, str]] = None):
+        """aiohttp middleware; ``route_names`` relabels routes (e.g. hide a token in a path)"""
+        route_names = route_names or {}
+        clock = time.perf_counter
+
+        @web.middleware
+        async def middleware(request: web.Request, handler):
+            start = clock()
+            status = 500
+            try:
+                response = await handler(request)
+                status = response.status
+                return response
+            except web.HTTPException as e:
+                status = e.status
+                raise
+            finally:
+                resource = request.match_info.route.resource
+                route = resource.canonical if resource is not None else "unmatched"
+                route = route_names.get(route, route)
+                self.http_latency.observe(clock() - start, route, request.method)
+                self.http_requests.inc(route, request.method, status)
+
+        return middleware
+
+    def instrument_database(self, db):
+        """Time every public storage method on ``db`` and export collection sizes.
+
+        The methods are replaced on the instance, so handlers calling them
+        directly are timed as well as ``db.run(db.method, ...)``, which on
+        the SQLite backends runs the timed method on the executor.  With
+        ``SharedDatabase`` the reads are the cache's methods set on the
+        instance and the writes are timed on its SQLite store.
+        """
+        observe = self.storage_latency.observe
+        clock = time.perf_counter
+        lock = threading.Lock()  # SQLite methods run on executor threads
+        local = threading.local()  # only the outermost call is an operation
+
+        def timed(method):
+            name = method.__name__
+
+            @functools.wraps(method)
+            def call(*args, **kwargs):
+                if getattr(local, "active", False):
+                    return method(*args, **kwargs)
+                local.active = True
+                start = clock()
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    elapsed = clock() - start
+                    local.active = False
+                    with lock:
+                        observe(elapsed, name)
+
+            return call
+
+        def instrument(target, names):
+            for name in names:
+                method = getattr(target, name)
+                if name.startswith("_") or name in UNTIMED_DB_METHODS or not callable(method) \
+                        or inspect.iscoroutinefunction(method):
+                    continue
+                setattr(target, name, timed(method))
+
+        store = getattr(db, "store", None)
+        if store is not None:
+            instrument(db, list(vars(db)))
+            instrument(store, dir(type(store)))
+        else:
+            instrument(db, dir(type(db)))
+        self._db = db
+        self.registry.gauge(
+            "db_records", "Records per collection",
+            lambda: {(name,): size for name, size in self._db_sizes.items()},
+            ("collection",))
+        self.registry.gauge("db_version", "Catalog version counter", lambda: db.version)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """GET /metrics"""
+        if self._db is not None:
+            # Counted through db.run: COUNT(*) on SQLite must not block the loop
+            self._db_sizes = await self._db.run(self._db.collection_sizes)
+        return web.Response(body=self.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+
+class HandlerTimingMiddleware(BaseMiddleware):
+    """aiogram inner middleware timing each handler by its function name"""
+
+    def __init__(self, metrics: ServiceMetrics):
+        self.metrics = metrics
+
+    async def __call__(self, handler: Callable[[Any, Dict[str, Any]], Awaitable[Any]],
+                       event: Any, data: Dict[str, Any]) -> Any:
+        handler_object = data.get("handler")
+        name = getattr(getattr(handler_object, "callback", None), "__name__", "unknown")
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            self.metrics.handler_errors.inc(name, type(e).__name__)
+            raise
+        finally:
+            self.metrics.handler_latency.observe(time.perf_counter() - start, name)
+
+
+class TelegramRequestMiddleware(BaseRequestMiddleware):
+    """Bot session middleware timing outbound API calls by method"""
+
+    def __init__(self, metrics: ServiceMetrics):
+        self.metrics = metrics
+
+    async def __call__(self, make_request, bot, method):
+        name = type(method).__name__
+        start = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            self.metrics.telegram_errors.inc(name, type(e).__name__)
+            raise
+        finally:
+            self.metrics.telegram_latency.observe(time.perf_counter() - start, name)
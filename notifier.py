@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set
+
+from aiogram import Bot
+from aiogram.exceptions import (TelegramAPIError, TelegramBadRequest,
+                                TelegramForbiddenError, TelegramRetryAfter)
+
+logger = logging.getLogger(__name__)
+
+MAX_MESSAGE_LENGTH = 4096
+COALESCE_SEPARATOR = "\n\n➖➖➖\n\n"
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, up to ``capacity``"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self, now: Optional[float] = None) -> float:
+        """Take one token; return 0 on success or the seconds to wait"""
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    async def take(self):
+        """Wait until a token is available and take it"""
+        while True:
+            delay = self.try_take()
+            if not delay:
+                return
+            await asyncio.sleep(delay)
+
+    def is_idle(self, now: float) -> bool:
+        """True when the bucket would be full again, i.e. it can be dropped"""
+        return self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+
+class OutboundMessage:
+    __slots__ = ("chat_id", "text", "kwargs", "attempts")
+
+    def __init__(self, chat_id: int, text: str, kwargs: dict):
+        self.chat_id = chat_id
+        self.text = text
+        self.kwargs = kwargs
+        self.attempts = 0
+
+
+class OutboundQueue:
+    """Background delivery of bot messages within Telegram's flood limits.
+
+    ``enqueue`` returns immediately.  Worker tasks deliver messages
+    concurrently across chats while keeping per-chat order, wait on a global
+    and a per-chat token bucket, sleep through ``RetryAfter`` answers and
+    retry other failures with exponential backoff.  Plain-text messages
+    still waiting for the same chat are merged into one message.
+    """
+
+    def __init__(self, bot: Bot, workers: int = 4,
+                 global_rate: float = 30.0, global_burst: float = 30.0,
+                 per_chat_rate: float = 1.0, per_chat_burst: float = 3.0,
+                 max_retries: int = 5, backoff_base: float = 0.5,
+                 backoff_max: float = 30.0, coalesce: bool = True):
+        self.bot = bot
+        self.workers = workers
+        self.per_chat_rate = per_chat_rate
+        self.per_chat_burst = per_chat_burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.coalesce = coalesce
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+        self._pending: Dict[int, Deque[OutboundMessage]] = {}
+        self._scheduled: Set[int] = set()
+        self._ready: "asyncio.Queue[int]" = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self.sent = 0
+        self.coalesced = 0
+        self.failed = 0
+
+    def enqueue(self, chat_id: int, text: str, **kwargs):
+        """Queue a message for background delivery"""
+        pending = self._pending.setdefault(chat_id, deque())
+        if self.coalesce and not kwargs and pending:
+            last = pending[-1]
+            if (not last.kwargs and last.attempts == 0
+                    and len(last.text) + len(COALESCE_SEPARATOR) + len(text) <= MAX_MESSAGE_LENGTH):
+                last.text += COALESCE_SEPARATOR + text
+                self.coalesced += 1
+                return
+        pending.append(OutboundMessage(chat_id, text, kwargs))
+        if chat_id not in self._scheduled:
+            self._scheduled.add(chat_id)
+            self._ready.put_nowait(chat_id)
+
+    def pending_count(self) -> int:
+        return sum(len(messages) for messages in self._pending.values())
+
+    async def start(self):
+        """Start worker tasks"""
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = 5.0):
+        """Try to deliver what is queued within ``timeout``, then stop workers"""
+        try:
+            await asyncio.wait_for(self.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Outbound queue stopped with %d undelivered messages",
+                           self.pending_count())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def join(self):
+        """Wait until every queued message was delivered or dropped"""
+        while self._scheduled:
+            await asyncio.sleep(0.01)
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) > 1024:
+                now = time.monotonic()
+                self._chat_buckets = {
+                    chat: chat_bucket for chat, chat_bucket in self._chat_buckets.items()
+                    if chat in self._scheduled or not chat_bucket.is_idle(now)
+                }
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.per_chat_rate, self.per_chat_burst)
+        return bucket
+
+    async def _worker(self):
+        while True:
+            chat_id = await self._ready.get()
+            pending = self._pending.get(chat_id)
+            if pending:
+                await self._deliver(pending[0])
+                pending.popleft()
+            if pending:
+                # Back of the line, so one busy chat cannot starve the others
+                self._ready.put_nowait(chat_id)
+            else:
+                self._pending.pop(chat_id, None)
+                self._scheduled.discard(chat_id)
+
+    async def _deliver(self, message: OutboundMessage):
+        while True:
+            await self._chat_bucket(message.chat_id).take()
+            await self.global_bucket.take()
+            message.attempts += 1
+            try:
+                await self.bot.send_message(message.chat_id, message.text, **message.kwargs)
+                self.sent += 1
+                return
+            except TelegramRetryAfter as e:
+                logger.warning("Flood limit for chat %s, retrying in %ss",
+                               message.chat_id, e.retry_after)
+                await asyncio.sleep(e.retry_after)
+            except (TelegramBadRequest, TelegramForbiddenError) as e:
+                # Retrying cannot help (bad payload, bot blocked by the user)
+                self.failed += 1
+                logger.error("Message to %s rejected: %s", message.chat_id, e)
+                return
+            except (TelegramAPIError, OSError, asyncio.TimeoutError) as e:
+                if message.attempts > self.max_retries:
+                    self.failed += 1
+                    logger.error("Failed to deliver message to %s: %s", message.chat_id, e)
+                    return
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (message.attempts - 1))
+                await asyncio.sleep(delay)
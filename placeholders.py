@@ -0,0 +1,158 @@
+import base64
+import gzip
+import hashlib
+from collections import OrderedDict
+from html import escape
+from typing import Dict, Optional, Tuple
+
+from aiohttp import web
+
+from static_cache import accepted_encodings
+
+# Same palette and rules as generatePhotoUrl in static-site/app.js
+GRADIENTS = (
+    ("667eea", "764ba2"),  # Фиолетовый
+    ("f093fb", "f5576c"),  # Розовый
+    ("4facfe", "00f2fe"),  # Голубой
+    ("43e97b", "38f9d7"),  # Зеленый
+    ("fa709a", "fee140"),  # Желто-розовый
+    ("30cfd0", "330867"),  # Сине-фиолетовый
+    ("a8edea", "fed6e3"),  # Пастельный
+    ("ff9a9e", "fecfef"),  # Светло-розовый
+)
+MAX_NAME_LENGTH = 20
+MAX_TOKEN_LENGTH = 256
+# Bump when the design changes: URLs are cached as immutable.  Version 1
+# tokens carried no gradient and picked it by the truncated name's length;
+# they are still served for photo URLs already stored.
+DESIGN_VERSION = "2"
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+SVG_TEMPLATE = """<svg xmlns="http://www.w3.org/2000/svg" width="400" height="200" viewBox="0 0 400 200">
+<defs><linearGradient id="g" x1="0" y1="0" x2="1" y2="1">
+<stop offset="0" stop-color="#{start}"/><stop offset="1" stop-color="#{end}"/>
+</linearGradient></defs>
+<rect width="400" height="200" fill="url(#g)"/>
+<text x="200" y="95" font-size="56" text-anchor="middle">{icon}</text>
+<text x="200" y="155" font-family="-apple-system,Segoe UI,Roboto,sans-serif" font-size="24" font-weight="600" fill="#fff" text-anchor="middle">{name}</text>
+</svg>
+"""
+
+
+def gradient_index(name: str) -> int:
+    """Palette entry for a full product name (``name.length`` in JS counts UTF-16 units)"""
+    return len(name.encode("utf-16-le")) // 2 % len(GRADIENTS)
+
+
+def truncate_name(name: str) -> str:
+    """First MAX_NAME_LENGTH UTF-16 units, like ``name.substring(0, 20)`` in JS.
+
+    A surrogate pair cut in half becomes U+FFFD, as TextEncoder encodes it,
+    so server and client build the same token for names with emoji.
+    """
+    return name.encode("utf-16-le", "surrogatepass")[:MAX_NAME_LENGTH * 2].decode("utf-16-le", "replace")
+
+
+def placeholder_token(name: str, category: str) -> str:
+    """URL token for a product card placeholder (the inverse of ``decode_token``)"""
+    raw = f"{DESIGN_VERSION}|{category}|{gradient_index(name)}|{truncate_name(name)}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_token(token: str) -> Tuple[str, str, int]:
+    """Return ``(name, category, gradient)`` from a token, raising ValueError if it is malformed"""
+    if len(token) > MAX_TOKEN_LENGTH:
+        raise ValueError("Token too long")
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        version, rest = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+        if version == "1":
+            category, name = rest.split("|", 1)
+            name = name[:MAX_NAME_LENGTH]
+            return name, category, len(name) % len(GRADIENTS)
+        category, gradient, name = rest.split("|", 2)
+        gradient = int(gradient)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid placeholder token: {token!r}")
+    if version != DESIGN_VERSION:
+        raise ValueError(f"Unknown placeholder version: {version!r}")
+    if not 0 <= gradient < len(GRADIENTS):
+        raise ValueError(f"Invalid placeholder gradient: {gradient}")
+    return truncate_name(name), category, gradient
+
+
+def render_placeholder(name: str, category: str, gradient: int) -> str:
+    """Gradient card with a category icon and the product name, as SVG"""
+    start, end = GRADIENTS[gradient]
+    icon = "🔫" if category == "weapons" else "👤"
+    return SVG_TEMPLATE.format(start=start, end=end, icon=icon, name=escape(name))
+
+
+class _Image:
+    __slots__ = ("etag", "variants", "size")
+
+    def __init__(self, body: bytes):
+        self.etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        self.variants: Dict[str, bytes] = {"identity": body}
+        compressed = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(compressed) < len(body):
+            self.variants["gzip"] = compressed
+        self.size = sum(len(variant) for variant in self.variants.values())
+
+
+class PlaceholderImages:
+    """``/img/placeholder/{token}.svg``: product card placeholders rendered in-process.
+
+    The token carries the design version, category, gradient and name, so a URL
+    always maps to the same bytes and is served as immutable.  Rendered
+    images are kept in an LRU bounded by ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes: int = 4 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._images: "OrderedDict[str, _Image]" = OrderedDict()
+
+    def register(self, app: web.Application):
+        app.router.add_get("/img/placeholder/{token}.svg", self.handle)
+
+    def get(self, token: str) -> Optional[_Image]:
+        image = self._images.get(token)
+        if image is not None:
+            self._images.move_to_end(token)
+            self.hits += 1
+            return image
+        try:
+            name, category, gradient = decode_token(token)
+        except ValueError:
+            return None
+        self.misses += 1
+        image = _Image(render_placeholder(name, category, gradient).encode())
+        self._images[token] = image
+        self.size += image.size
+        while self.size > self.max_bytes and len(self._images) > 1:
+            _, evicted = self._images.popitem(last=False)
+            self.size -= evicted.size
+        return image
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """GET /img/placeholder/{token}.svg"""
+        image = self.get(request.match_info["token"])
+        if image is None:
+            return web.Response(text="Not found", status=404)
+        headers = {"ETag": image.etag, "Cache-Control": IMMUTABLE, "Vary": "Accept-Encoding"}
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            if "*" in tags or image.etag in tags:
+                return web.Response(status=304, headers=headers)
+        encoding = "identity"
+        if "gzip" in image.variants:
+            accepted = accepted_encodings(request.headers.get("Accept-Encoding", ""))
+            if accepted.get("gzip", accepted.get("*", 0)) > 0:
+                encoding = "gzip"
+                headers["Content-Encoding"] = "gzip"
+        return web.Response(body=image.variants[encoding], headers=headers,
+                            content_type="image/svg+xml", charset="utf-8")
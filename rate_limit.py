@@ -0,0 +1,120 @@
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery
+
+from notifier import TokenBucket
+
+MIN_SWEEP_SIZE = 4096
+
+
+class _UserBucket(TokenBucket):
+    __slots__ = ("warned",)
+
+    def __init__(self, rate: float, capacity: float):
+        super().__init__(rate, capacity)
+        self.warned = False
+
+
+class UserRateLimiter:
+    """Token buckets per ``(user, action)``.
+
+    ``limits`` maps an action name to ``(rate per second, burst)``; actions
+    without a limit always pass.  Buckets are created on first use and
+    swept once they would be full again (an idle user costs nothing).
+    A sweep runs when the table doubles since the last one, so it is
+    amortized O(1) per new bucket; at ``max_buckets`` the oldest quarter
+    is dropped, which can only make a limit more lenient.
+    """
+
+    def __init__(self, limits: Dict[str, Tuple[float, float]], max_buckets: int = 100000):
+        self.limits = {action: limit for action, limit in limits.items() if limit[0] > 0}
+        self.max_buckets = max_buckets
+        self._buckets: Dict[Tuple[int, str], _UserBucket] = {}
+        self._sweep_at = MIN_SWEEP_SIZE
+
+    def check(self, user_id: int, action: str, now: Optional[float] = None) -> Tuple[float, bool]:
+        """Take a token.
+
+        Returns ``(0, False)`` when the action is allowed, otherwise the
+        seconds until it will be and whether this is the first rejection
+        since the user's last allowed action.
+        """
+        limit = self.limits.get(action)
+        if limit is None:
+            return 0.0, False
+        bucket = self._bucket(user_id, action, limit)
+        delay = bucket.try_take(now)
+        if not delay:
+            bucket.warned = False
+            return 0.0, False
+        first, bucket.warned = not bucket.warned, True
+        return delay, first
+
+    def bucket_count(self) -> int:
+        return len(self._buckets)
+
+    def _bucket(self, user_id: int, action: str, limit: Tuple[float, float]) -> _UserBucket:
+        key = (user_id, action)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self._sweep_at:
+                self.sweep()
+            bucket = self._buckets[key] = _UserBucket(*limit)
+        return bucket
+
+    def sweep(self, now: Optional[float] = None):
+        """Drop buckets that have refilled completely"""
+        now = time.monotonic() if now is None else now
+        buckets = {key: bucket for key, bucket in self._buckets.items() if not bucket.is_idle(now)}
+        if len(buckets) >= self.max_buckets:
+            # Dicts keep insertion order: the oldest buckets go first, down to 3/4
+            for key in list(buckets)[:len(buckets) - self.max_buckets * 3 // 4]:
+                del buckets[key]
+        self._buckets = buckets
+        self._sweep_at = max(MIN_SWEEP_SIZE, min(2 * len(buckets), self.max_buckets))
+
+
+def update_action(event: Any) -> str:
+    """Rate-limit action of an incoming message or callback query"""
+    if isinstance(event, CallbackQuery):
+        return "callback"
+    web_app_data = getattr(event, "web_app_data", None)
+    if web_app_data is not None:
+        prefix = web_app_data.data.split(":", 1)[0]
+        return prefix if prefix in ("buy", "bid", "admin") else "webapp"
+    return "message"
+
+
+class RateLimitMiddleware(BaseMiddleware):
+    """aiogram outer middleware dropping updates over a user's limit.
+
+    Runs before filters and handlers, so a rejected update costs a dict
+    lookup and a bucket refill.  The user is told once per throttled
+    stretch; further updates are dropped silently until one passes.
+    """
+
+    def __init__(self, limiter: UserRateLimiter, exempt: Iterable[int] = (),
+                 on_reject: Optional[Callable[[str], None]] = None):
+        self.limiter = limiter
+        self.exempt = frozenset(exempt)
+        self.on_reject = on_reject
+
+    async def __call__(self, handler, event, data: Dict[str, Any]) -> Any:
+        user = getattr(event, "from_user", None)
+        if user is None or user.id in self.exempt:
+            return await handler(event, data)
+        action = update_action(event)
+        delay, first = self.limiter.check(user.id, action)
+        if not delay:
+            return await handler(event, data)
+
+        if self.on_reject is not None:
+            self.on_reject(action)
+        if first:
+            seconds = max(1, round(delay))
+            # Message.answer sends a reply, CallbackQuery.answer stops the button spinner
+            await event.answer(f"⏳ Слишком часто, попробуйте через {seconds} с\n"
+                               f"⏳ Juda tez-tez, {seconds} soniyadan keyin urinib ko'ring")
+        return None
@@ -0,0 +1,176 @@
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+EXPIRY_BATCH_WINDOW = 1.0  # seconds; holds expiring this close together are released together
+
+
+class Hold:
+    __slots__ = ("product_id", "user_id", "purchase_id", "expires_at")
+
+    def __init__(self, product_id: str, user_id: int, expires_at: float):
+        self.product_id = product_id
+        self.user_id = user_id
+        self.purchase_id: Optional[str] = None
+        self.expires_at = expires_at
+
+    def seconds_left(self, now: Optional[float] = None) -> float:
+        return max(0.0, self.expires_at - (time.time() if now is None else now))
+
+
+class ReservationBook:
+    """Time-limited holds on products for pending purchases.
+
+    ``reserve`` puts a product on hold for one buyer for ``ttl`` seconds
+    and records the pending purchase; taps by the same buyer while the hold
+    lasts return the same hold, anyone else is turned away.  Expiry is one
+    coroutine sleeping until the earliest deadline in a heap of
+    ``(expires_at, product_id, id, hold)`` entries: it pops every due hold at
+    once and deletes their purchases in a single storage call if the
+    admin has not acted on them.  Released or replaced holds leave stale
+    heap entries, which are skipped when popped.  Deleting or selling the
+    product, or handling the purchase, releases the hold early (followed
+    through ``Database.subscribe``).
+
+    ``holds`` is per process.  Across workers (DB_BACKEND=shared) the
+    pending purchase is the hold: ``reserve_purchase`` refuses a second
+    one for a product inside the same write transaction, and the refusing
+    worker adopts the other buyer's hold.
+    """
+
+    def __init__(self, db, ttl: float = 900.0):
+        self.db = db
+        self.ttl = ttl
+        self.holds: Dict[str, Hold] = {}
+        self._purchase_products: Dict[str, str] = {}  # purchase id -> product id
+        self.expired = 0
+        self._heap: List[Tuple[float, str, int, Hold]] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        db.subscribe(self.on_change)
+
+    async def reserve(self, product_id: str, user_id: int) -> Tuple[str, Hold]:
+        """Hold a product for a buyer.
+
+        Returns ``("held", hold)`` for a new hold, ``("repeat", hold)`` if the
+        buyer already holds it and ``("taken", hold)`` if someone else does.
+        """
+        now = time.time()
+        hold = self.holds.get(product_id)
+        if hold is not None and hold.expires_at > now:
+            return ("repeat" if hold.user_id == user_id else "taken"), hold
+
+        # Claim before the await so a concurrent tap sees the hold
+        hold = self.holds[product_id] = Hold(product_id, user_id, now + self.ttl)
+        since = datetime.fromtimestamp(now - self.ttl).isoformat()
+        try:
+            created, purchase = await self.db.run(self.db.reserve_purchase, product_id, user_id, since)
+        except Exception:
+            if self.holds.get(product_id) is hold:
+                del self.holds[product_id]
+            raise
+        if not created:
+            # Another worker holds it: adopt that hold
+            started = datetime.fromisoformat(purchase["timestamp"]).timestamp()
+            hold = Hold(product_id, purchase["user_id"], started + self.ttl)
+            self.holds[product_id] = hold
+        hold.purchase_id = purchase["id"]
+        self._purchase_products[hold.purchase_id] = product_id
+        self._schedule(hold)
+        if not created:
+            return ("repeat" if hold.user_id == user_id else "taken"), hold
+        return "held", hold
+
+    def release(self, product_id: str) -> Optional[Hold]:
+        """Free a product before its hold ends; a purchase still pending at the deadline is expired as usual"""
+        return self.holds.pop(product_id, None)
+
+    def on_change(self, entry):
+        """Database listener"""
+        op = entry[0]
+        if op == "bid":
+            return
+        collection, record_id = entry[1], entry[2]
+        if collection == "products":
+            if op == "del" or (op == "patch" and entry[3].get("status", "available") != "available"):
+                self.release(record_id)
+        elif collection == "purchases":
+            if op == "del" or (op == "patch" and entry[3].get("status", "pending") != "pending"):
+                product_id = self._purchase_products.pop(record_id, None)
+                hold = self.holds.get(product_id)
+                if hold is not None and hold.purchase_id == record_id:
+                    del self.holds[product_id]
+
+    def hold_count(self) -> int:
+        return len(self.holds)
+
+    async def restore(self):
+        """Re-create holds for purchases left pending by a previous run"""
+        for purchase in await self.db.run(self.db.get_pending_purchases):
+            started = datetime.fromisoformat(purchase["timestamp"]).timestamp()
+            hold = Hold(purchase["product_id"], purchase["user_id"], started + self.ttl)
+            hold.purchase_id = purchase["id"]
+            self._purchase_products[hold.purchase_id] = hold.product_id
+            current = self.holds.get(hold.product_id)
+            if current is None or current.expires_at < hold.expires_at:
+                self.holds[hold.product_id] = hold
+            self._schedule(hold)  # a superseded hold still expires its purchase
+
+    async def start(self):
+        """Start the expiry coroutine"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._expiry_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _schedule(self, hold: Hold):
+        entry = (hold.expires_at, hold.product_id, id(hold), hold)
+        if not self._heap or entry[0] < self._heap[0][0]:
+            self._wakeup.set()
+        heapq.heappush(self._heap, entry)
+
+    async def _expiry_loop(self):
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._expire_due()
+            except Exception:
+                logger.exception("Failed to expire purchase holds")
+                await asyncio.sleep(EXPIRY_BATCH_WINDOW)
+
+    async def _expire_due(self):
+        """Pop every hold due within the batch window and expire its purchase"""
+        deadline = time.time() + EXPIRY_BATCH_WINDOW
+        purchase_ids = []
+        while self._heap and self._heap[0][0] <= deadline:
+            _, product_id, _, hold = heapq.heappop(self._heap)
+            if self.holds.get(product_id) is hold:
+                del self.holds[product_id]
+            if hold.purchase_id is not None:
+                self._purchase_products.pop(hold.purchase_id, None)
+                purchase_ids.append(hold.purchase_id)
+        if purchase_ids:
+            self.expired += await self.db.run(self.db.expire_purchases, purchase_ids)
@@ -0,0 +1,320 @@
+import heapq
+import re
+from math import ceil
+from typing import Dict, List, Optional, Set, Tuple
+
+# Russian and Uzbek Cyrillic to a plain Latin spelling, so "Редлайн",
+# "redlayn" and "Redline" meet in the same trigram space.
+CYRILLIC_TO_LATIN = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e",
+    "ж": "zh", "з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m",
+    "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u",
+    "ф": "f", "х": "h", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "sch", "ъ": "",
+    "ы": "y", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+    "ў": "o", "қ": "q", "ғ": "g", "ҳ": "h",
+}
+TRANSLIT_TABLE = str.maketrans(CYRILLIC_TO_LATIN)
+WORD_JOINERS = re.compile(r"(?<=\w)[-'’‘`ʻʼ](?=\w)")
+NON_WORD = re.compile(r"[^\w]+")
+
+MIN_SHARED_RATIO = 0.4  # share of a query word's trigrams a vocabulary word must contain
+MIN_WORD_SIMILARITY = 0.3
+PREFIX_SIMILARITY = 0.8  # "glo" finds "glock18" while typing
+MAX_WORD_POSTINGS = 2000  # description words more common than this only boost, never recall
+DESCRIPTION_BONUS = 0.1
+SUBSTRING_BONUS = 0.5
+LENGTH_PENALTY = 0.02
+
+
+def normalize(text: str) -> str:
+    """Lowercase, transliterate to Latin and collapse punctuation to spaces"""
+    text = (text or "").lower().translate(TRANSLIT_TABLE)
+    text = WORD_JOINERS.sub("", text)  # "AK-47" -> "ak47", "o'q" -> "oq"
+    return NON_WORD.sub(" ", text).strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    """Padded per-word trigrams of normalized text"""
+    grams = set()
+    for word in text.split():
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+class SearchIndex:
+    """Typo-tolerant search over product and auction names.
+
+    Two levels keep queries cheap at catalog scale:
+
+    * every distinct name word is indexed by its trigrams, so each query
+      word is fuzzily matched against the (small) vocabulary rather than
+      against all records;
+    * skin catalogs repeat the same names many times, so matched words
+      point at distinct normalized names and each name maps to its records.
+
+    Names matching every query word are ranked first (by mean word
+    similarity, shorter names first on ties); names matching only some
+    words fill up the remaining slots.  Unspecific queries ("ak47") whose
+    best-matching words alone fill the page skip per-name scoring.  Description words give records a
+    small bonus.  The index follows the database through
+    ``Database.subscribe``.
+    """
+
+    def __init__(self, db=None):
+        self.db = db
+        self._gram_words: Dict[str, Set[str]] = {}  # trigram -> vocabulary words
+        self._word_grams: Dict[str, Set[str]] = {}
+        self._word_names: Dict[str, Set[str]] = {}  # word -> names containing it
+        self._name_words: Dict[str, Tuple[str, ...]] = {}
+        self._name_docs: Dict[str, Set[str]] = {}  # name -> doc keys
+        self._kind_names: Dict[str, Dict[str, int]] = {}  # kind -> name -> records of that kind
+        self._desc_docs: Dict[str, Set[str]] = {}  # description word -> doc keys
+        self._doc_names: Dict[str, str] = {}
+        self._doc_words: Dict[str, Set[str]] = {}
+        if db is not None:
+            self.build()
+            db.subscribe(self.on_change)
+
+    def build(self):
+        """Index every product and auction currently in the database"""
+        for product in self.db.get_all_products():
+            self.add("products", product)
+        for auction in self.db.get_all_auctions():
+            self.add("auctions", auction)
+
+    def __len__(self) -> int:
+        return len(self._doc_names)
+
+    # Maintenance
+    def add(self, kind: str, record: dict):
+        key = f"{kind}:{record['id']}"
+        if key in self._doc_names:
+            self.remove(kind, record["id"])
+        name = normalize(record.get("name", ""))
+        docs = self._name_docs.get(name)
+        if docs is None:
+            docs = self._name_docs[name] = set()
+            words = self._name_words[name] = tuple(dict.fromkeys(name.split()))
+            for word in words:
+                names = self._word_names.get(word)
+                if names is None:
+                    names = self._word_names[word] = set()
+                    grams = self._word_grams[word] = trigrams(word)
+                    for gram in grams:
+                        self._gram_words.setdefault(gram, set()).add(word)
+                names.add(name)
+        docs.add(key)
+        counts = self._kind_names.setdefault(kind, {})
+        counts[name] = counts.get(name, 0) + 1
+        desc_words = set(normalize(record.get("description", "")).split())
+        for word in desc_words:
+            self._desc_docs.setdefault(word, set()).add(key)
+        self._doc_names[key] = name
+        self._doc_words[key] = desc_words
+
+    def remove(self, kind: str, record_id: str):
+        key = f"{kind}:{record_id}"
+        name = self._doc_names.pop(key, None)
+        if name is None:
+            return
+        docs = self._name_docs[name]
+        docs.discard(key)
+        counts = self._kind_names[kind]
+        counts[name] -= 1
+        if not counts[name]:
+            del counts[name]
+        if not docs:
+            del self._name_docs[name]
+            for word in self._name_words.pop(name):
+                names = self._word_names[word]
+                names.discard(name)
+                if not names:
+                    del self._word_names[word]
+                    for gram in self._word_grams.pop(word):
+                        words = self._gram_words[gram]
+                        words.discard(word)
+                        if not words:
+                            del self._gram_words[gram]
+        for word in self._doc_words.pop(key):
+            word_docs = self._desc_docs[word]
+            word_docs.discard(key)
+            if not word_docs:
+                del self._desc_docs[word]
+
+    def on_change(self, entry):
+        """Database listener"""
+        op = entry[0]
+        if op == "bid" or entry[1] not in ("products", "auctions"):
+            return
+        kind = entry[1]
+        if op == "put":
+            self.add(kind, entry[2])
+        elif op == "del":
+            self.remove(kind, entry[2])
+        elif op == "patch" and {"name", "description"} & set(entry[3]):
+            # Merged into the indexed copy: normalized text normalizes to
+            # itself, and reading the record back would block on SQLite
+            key = f"{kind}:{entry[2]}"
+            fields = entry[3]
+            if key not in self._doc_names:
+                return
+            self.add(kind, {
+                "id": entry[2],
+                "name": fields.get("name", self._doc_names[key]),
+                "description": fields.get("description", " ".join(self._doc_words[key])),
+            })
+
+    # Queries
+    def match_word(self, query_word: str) -> Dict[str, float]:
+        """Vocabulary words similar to ``query_word`` with their similarity"""
+        query_grams = trigrams(query_word)
+        required = max(1, ceil(len(query_grams) * MIN_SHARED_RATIO))
+        by_rarity = sorted(query_grams, key=lambda gram: len(self._gram_words.get(gram, ())))
+        candidates: Set[str] = set()
+        for gram in by_rarity[:len(query_grams) - required + 1]:
+            candidates.update(self._gram_words.get(gram, ()))
+        matches = {}
+        for word in candidates:
+            grams = self._word_grams[word]
+            shared = len(query_grams & grams)
+            if shared < required:
+                continue
+            # Mean of query coverage and Jaccard: "glok" still reaches
+            # "glock18", while long unrelated words sharing a gram do not
+            similarity = (shared / len(query_grams)
+                          + shared / (len(query_grams) + len(grams) - shared)) / 2
+            if word.startswith(query_word):
+                similarity = max(similarity, PREFIX_SIMILARITY)
+            if similarity >= MIN_WORD_SIMILARITY:
+                matches[word] = similarity
+        return matches
+
+    def search(self, query: str, limit: int = 20,
+               kind: Optional[str] = None) -> List[Tuple[str, str, float]]:
+        """Return up to ``limit`` (kind, id, score) tuples, best first"""
+        text = normalize(query)
+        query_words = list(dict.fromkeys(text.split()))
+        if not query_words:
+            return []
+        # With ``kind``, names without a record of that kind are dropped
+        # before ranking so they cannot take the places of ones that have
+        kind_counts = self._kind_names.get(kind, {}) if kind else None
+        if kind_counts is not None and not kind_counts:
+            return []
+
+        matches = [self.match_word(word) for word in query_words]
+        name_sets = []
+        for matched in matches:
+            names: Set[str] = set()
+            for word in matched:
+                names |= self._word_names[word]
+            if kind_counts is not None:
+                names = {name for name in names if name in kind_counts}
+            name_sets.append(names)
+
+        # Records whose description contains a (not too common) query word
+        word_docs: Set[str] = set()
+        for word in query_words:
+            docs = self._desc_docs.get(word, ())
+            if len(docs) <= MAX_WORD_POSTINGS:
+                word_docs.update(docs)
+        if kind:
+            prefix = f"{kind}:"
+            word_docs = {key for key in word_docs if key.startswith(prefix)}
+
+        # Names carrying the best-matching vocabulary word for every query
+        # word all share the same similarity, so when they alone can fill
+        # the page they are ranked without the per-word scoring loop.
+        ranked = []
+        top_sets = []
+        base = 0.0
+        for matched in matches:
+            top = max(matched.values(), default=0.0)
+            names = set()
+            for word, similarity in matched.items():
+                if similarity == top:
+                    names |= self._word_names[word]
+            if kind_counts is not None:
+                names = {name for name in names if name in kind_counts}
+            top_sets.append(names)
+            base += top
+        top_names = set.intersection(*top_sets)
+        if len(top_names) >= limit:
+            base /= len(query_words)
+            query_count = len(query_words)
+            name_words = self._name_words
+            ranked = heapq.nlargest(limit, (
+                (base - LENGTH_PENALTY * max(0, len(name_words[name]) - query_count)
+                 + (SUBSTRING_BONUS if text in name else 0.0), name)
+                for name in top_names
+            ))
+        else:
+            ranked = self._rank_names(text, query_words, matches,
+                                      set.intersection(*name_sets), limit)
+        if self._doc_count(ranked, limit, kind_counts) < limit:
+            partial = set.union(*name_sets).difference(name for _, name in ranked)
+            partial.update(self._doc_names[key] for key in word_docs)
+            ranked += self._rank_names(text, query_words, matches, partial, limit)
+
+        # Only records in ``word_docs`` can get the description bonus, so
+        # every other record of a name shares its score and at most
+        # ``limit`` of them are needed; names scoring more than the bonus
+        # below the current cut-off cannot reach the top.
+        margin = DESCRIPTION_BONUS if word_docs else 0.0
+        scored = []
+        cutoff = None
+        for score, name in ranked:
+            if cutoff is not None and score < cutoff - margin:
+                break
+            plain_taken = 0
+            for key in self._name_docs[name]:
+                has_words = key in word_docs
+                if not has_words and plain_taken >= limit:
+                    continue
+                doc_kind, record_id = key.split(":", 1)
+                if kind and doc_kind != kind:
+                    continue
+                if has_words:
+                    bonus = DESCRIPTION_BONUS * len(set(query_words) & self._doc_words[key]) / len(query_words)
+                else:
+                    bonus = 0.0
+                    plain_taken += 1
+                scored.append((score + bonus, doc_kind, record_id))
+            if cutoff is None and len(scored) >= limit:
+                cutoff = score
+
+        best = heapq.nlargest(limit, scored, key=lambda item: item[0])
+        return [(doc_kind, record_id, round(score, 4)) for score, doc_kind, record_id in best]
+
+    def _rank_names(self, text: str, query_words: List[str], matches: List[Dict[str, float]],
+                    names: Set[str], limit: int) -> List[Tuple[float, str]]:
+        """Score names by mean best word similarity; return the best ones"""
+        scored = []
+        query_count = len(query_words)
+        for name in names:
+            words = self._name_words[name]
+            total = 0.0
+            for matched in matches:
+                best = 0.0
+                for word in words:
+                    similarity = matched.get(word)
+                    if similarity is not None and similarity > best:
+                        best = similarity
+                total += best
+            score = total / query_count - LENGTH_PENALTY * max(0, len(words) - query_count)
+            if text in name:
+                score += SUBSTRING_BONUS
+            scored.append((score, name))
+        # Keep enough names to fill ``limit`` records even if each has one
+        return heapq.nlargest(limit, scored)
+
+    def _doc_count(self, ranked: List[Tuple[float, str]], limit: int,
+                   kind_counts: Optional[Dict[str, int]] = None) -> int:
+        count = 0
+        for _, name in ranked:
+            count += len(self._name_docs[name]) if kind_counts is None else kind_counts[name]
+            if count >= limit:
+                break
+        return count
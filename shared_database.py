@@ -0,0 +1,286 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from database import CATALOG_COLLECTIONS, ChangeLog, Database, change_key
+from sqlite_database import SqliteDatabase
+
+logger = logging.getLogger(__name__)
+
+# Every committed row change is numbered by a trigger, whichever process made it
+CHANGE_LOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    collection TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    op TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shared_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+CHANGE_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS {table}_put_insert AFTER INSERT ON {table} BEGIN
+    INSERT INTO changes (collection, record_id, op) VALUES ('{table}', NEW.id, 'put');
+END;
+CREATE TRIGGER IF NOT EXISTS {table}_put_update AFTER UPDATE ON {table} BEGIN
+    INSERT INTO changes (collection, record_id, op) VALUES ('{table}', NEW.id, 'put');
+END;
+CREATE TRIGGER IF NOT EXISTS {table}_del AFTER DELETE ON {table} BEGIN
+    INSERT INTO changes (collection, record_id, op) VALUES ('{table}', OLD.id, 'del');
+END;
+"""
+BID_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS bids_insert AFTER INSERT ON bids BEGIN
+    INSERT INTO changes (collection, record_id, op) VALUES ('bids', NEW.rowid, 'bid');
+END;
+"""
+SHARED_TABLES = ("products", "auctions", "purchases")
+
+WRITE_METHODS = (
+    "add_product", "add_products", "update_product", "delete_product", "set_product_status",
+    "add_auction", "add_bid", "close_auction", "update_auction", "delete_auction",
+    "record_purchase", "reserve_purchase", "update_purchase_status", "expire_purchases",
+)
+READ_METHODS = (
+    "get_product", "get_all_products", "get_products_page", "count_products",
+    "get_category_counts", "get_auction", "get_all_auctions", "get_auctions_page",
+    "get_price_series", "get_purchase", "get_pending_purchases", "collection_sizes", "subscribe",
+)
+SYNC_BATCH = 500  # change rows per fetch (also bounds the IN (...) lists)
+
+
+class SharedDatabase:
+    """SQLite shared by several worker processes, read through a local cache.
+
+    Writes go to ``SqliteDatabase``; triggers append every committed row
+    change to a ``changes`` table.  Each process keeps a full in-memory
+    ``Database`` as its read cache and applies new change rows in order:
+    right after its own writes (so a worker reads what it wrote) and from
+    a poller every ``poll_interval`` seconds (so other workers' writes show
+    up within that delay).  Reads never touch SQLite.
+
+    ``version`` is the sequence number of the last applied catalog change,
+    the same in every worker, so ETags and delta-sync versions stay valid
+    across processes.
+    """
+
+    def __init__(self, path: str = "shop.sqlite3", pool_size: int = 4,
+                 poll_interval: float = 0.05, change_retention: int = 100000,
+                 change_log_size: int = 10000):
+        self.store = SqliteDatabase(path, pool_size=pool_size)
+        self.cache = Database()
+        self.poll_interval = poll_interval
+        self.change_retention = change_retention
+        self.seq = 0
+        self.version = 0
+        self.changes = ChangeLog(change_log_size)
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        for name in READ_METHODS:
+            setattr(self, name, getattr(self.cache, name))
+        with self.store._connection() as conn:
+            conn.executescript(CHANGE_LOG_SCHEMA)
+            for table in SHARED_TABLES:
+                conn.executescript(CHANGE_TRIGGERS.format(table=table))
+            conn.executescript(BID_TRIGGER)
+            conn.execute("INSERT OR IGNORE INTO shared_meta (key, value) VALUES ('instance_id', ?)",
+                         (uuid.uuid4().hex[:8],))
+            self.instance_id = conn.execute(
+                "SELECT value FROM shared_meta WHERE key = 'instance_id'").fetchone()[0]
+        self._load()
+
+    async def run(self, func, *args, **kwargs):
+        """Reads run inline on the cache; writes run on the SQLite executor, then sync"""
+        name = func.__name__
+        if name not in WRITE_METHODS:
+            return func(*args, **kwargs)
+        result = await self.store.run(getattr(self.store, name), *args, **kwargs)
+        await self.refresh()
+        return result
+
+    # Synchronization
+    def sync(self) -> int:
+        """Apply pending changes on the calling thread; return how many were applied"""
+        applied = 0
+        while True:
+            batch = self._fetch_changes(self.seq)
+            if batch is None:
+                self._load()
+                continue
+            applied += self._apply(batch)
+            if len(batch) < SYNC_BATCH:
+                return applied
+
+    async def refresh(self) -> int:
+        """Fetch pending changes on the executor and apply them on the event loop"""
+        applied = 0
+        async with self._lock:
+            while True:
+                batch = await self.store.run(self._fetch_changes, self.seq)
+                if batch is None:
+                    snapshot = await self.store.run(self._read_snapshot)
+                    self._apply_snapshot(*snapshot)
+                    continue
+                applied += self._apply(batch)
+                if len(batch) < SYNC_BATCH:
+                    return applied
+
+    async def start(self):
+        """Start polling for other workers' changes"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._poll_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def close(self):
+        self.store.close()
+
+    async def _poll_loop(self):
+        last_prune = time.monotonic()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.refresh()
+                if time.monotonic() - last_prune > 60:
+                    last_prune = time.monotonic()
+                    await self.store.run(self._prune)
+            except Exception:
+                logger.exception("Shared database sync failed")
+
+    def _prune(self):
+        """Keep the last ``change_retention`` change rows"""
+        with self.store._transaction() as conn:
+            conn.execute("DELETE FROM changes WHERE seq <= (SELECT MAX(seq) FROM changes) - ?",
+                         (self.change_retention,))
+
+    def _fetch_changes(self, after: int) -> Optional[List[Tuple[int, tuple]]]:
+        """Change rows after ``after`` with the records they point at.
+
+        Records are read as they are now, so a row changed twice in a batch
+        is applied once.  Returns None when rows after ``after`` were already
+        pruned and the cache must be reloaded.
+        """
+        with self.store._connection() as conn:
+            conn.execute("BEGIN")
+            try:
+                rows = conn.execute(
+                    "SELECT seq, collection, record_id, op FROM changes WHERE seq > ? ORDER BY seq LIMIT ?",
+                    (after, SYNC_BATCH),
+                ).fetchall()
+                if rows and rows[0][0] != after + 1:
+                    first = conn.execute("SELECT MIN(seq) FROM changes").fetchone()[0]
+                    if first is not None and first > after + 1:
+                        return None
+
+                wanted: Dict[str, List[str]] = {}
+                for _, collection, record_id, _ in rows:
+                    wanted.setdefault(collection, []).append(record_id)
+                records: Dict[str, Dict[str, dict]] = {}
+                for collection, ids in wanted.items():
+                    placeholders = ", ".join("?" for _ in ids)
+                    if collection == "bids":
+                        query = (f"SELECT rowid AS id, auction_id, user_id, amount, timestamp"
+                                 f" FROM bids WHERE rowid IN ({placeholders})")
+                    else:
+                        query = f"SELECT * FROM {collection} WHERE id IN ({placeholders})"
+                    records[collection] = {str(row["id"]): dict(row)
+                                           for row in conn.execute(query, ids)}
+            finally:
+                conn.execute("COMMIT")
+
+        batch = []
+        seen = set()
+        for seq, collection, record_id, op in rows:
+            record = records[collection].get(record_id)
+            if collection == "bids":
+                entry = None if record is None else (
+                    "bid", record["auction_id"], record["user_id"], record["amount"],
+                    datetime.fromisoformat(record["timestamp"]).timestamp())
+            elif (collection, record_id) in seen:
+                entry = None
+            else:
+                seen.add((collection, record_id))
+                entry = ("del", collection, record_id) if record is None else ("put", collection, record)
+            batch.append((seq, entry))
+        return batch
+
+    def _apply(self, batch: List[Tuple[int, Optional[tuple]]]) -> int:
+        entries = []
+        for seq, entry in batch:
+            if seq <= self.seq:
+                continue  # already applied by a concurrent sync
+            self.seq = seq
+            if entry is None:
+                continue
+            if entry[0] == "bid" or entry[1] in CATALOG_COLLECTIONS:
+                collection, record_id, op = change_key(entry)
+                if op == "insert" and record_id in getattr(self.cache, collection):
+                    op = "update"
+                self.changes.record(seq, collection, record_id, op)
+                self.version = seq
+            entries.append(entry)
+        # Records are deduplicated per batch, so checking the cache before applying any is exact
+        self.cache.apply_changes(entries)
+        return len(entries)
+
+    def _read_snapshot(self) -> tuple:
+        """All records and the change sequence they reflect, read in one transaction"""
+        with self.store._connection() as conn:
+            conn.execute("BEGIN")
+            try:
+                seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+                state = {
+                    "products": {row["id"]: dict(row) for row in conn.execute("SELECT * FROM products")},
+                    "purchases": {row["id"]: dict(row) for row in conn.execute("SELECT * FROM purchases")},
+                }
+                auctions = self.store._with_bids(conn, conn.execute("SELECT * FROM auctions").fetchall(), "", [])
+                state["auctions"] = {auction["id"]: auction for auction in auctions}
+            finally:
+                conn.execute("COMMIT")
+        return seq, state
+
+    def _apply_snapshot(self, seq: int, state: Dict[str, Dict[str, dict]]):
+        if not any(self.cache.collection_sizes().values()):
+            self.cache.load_state(state)
+            self.cache.rebuild_indexes()
+        else:
+            # Fell behind the retained change log: diff against the snapshot
+            logger.warning("Shared database cache fell behind, reloading")
+            collections = {"products": self.cache.products, "auctions": self.cache.auctions,
+                           "purchases": self.cache.purchases}
+            for name, records in state.items():
+                for record_id in set(collections[name]) - set(records):
+                    self.cache.apply_change(("del", name, record_id))
+                for record in records.values():
+                    self.cache.apply_change(("put", name, record))
+        self.seq = self.version = seq
+        self.changes.reset(seq)  # deltas from before the reload are unknown
+
+    def _load(self):
+        self._apply_snapshot(*self._read_snapshot())
+
+
+def _writer(name: str):
+    def write(self, *args, **kwargs):
+        result = getattr(self.store, name)(*args, **kwargs)
+        self.sync()
+        return result
+    write.__name__ = name
+    write.__doc__ = getattr(SqliteDatabase, name).__doc__
+    return write
+
+
+for _name in WRITE_METHODS:
+    setattr(SharedDatabase, _name, _writer(_name))
@@ -1,19 +1,31 @@
+import math
+
 from aiogram import Bot, types
+from auction_engine import AuctionEngine
 from database import Database
+from notifier import OutboundQueue
+from reservations import ReservationBook
+from tracing import tracer
 
 
 class ShopHandler:
     """Handle shop-related operations"""
     
-    def __init__(self, db: Database, bot: Bot, admin_ids: list):
+    def __init__(self, db: Database, bot: Bot, admin_ids: list,
+                 auction_engine: AuctionEngine = None, notifier: OutboundQueue = None,
+                 reservations: ReservationBook = None):
         self.db = db
         self.bot = bot
         self.admin_ids = admin_ids
+        self.auction_engine = auction_engine or AuctionEngine(db)
+        self.notifier = notifier
+        self.reservations = reservations
     
+    @tracer.traced("shop.handle_purchase")
     async def handle_purchase(self, message: types.Message, product_id: str):
         """Handle purchase request from user"""
         user_id = message.from_user.id
-        product = self.db.get_product(product_id)
+        product = await self.db.run(self.db.get_product, product_id)
         
         if not product:
             await message.answer(
@@ -27,8 +39,21 @@ class ShopHandler:
             )
             return
         
-        # Record purchase attempt
-        purchase_id = self.db.record_purchase(product_id, user_id)
+        # Record purchase attempt, holding the product for this buyer
+        status = "held"
+        if self.reservations is not None:
+            status, hold = await self.reservations.reserve(product_id, user_id)
+            purchase_id = hold.purchase_id
+        else:
+            purchase_id = await self.db.run(self.db.record_purchase, product_id, user_id)
+        
+        if status == "taken":
+            minutes = max(1, round(hold.seconds_left() / 60))
+            await message.answer(
+                f"⏳ Товар забронирован другим покупателем, попробуйте через {minutes} мин\n"
+                f"⏳ Mahsulot boshqa xaridor tomonidan band qilingan, {minutes} daqiqadan keyin urinib ko'ring"
+            )
+            return
         
         # Send product link to user
         response_text = (
@@ -37,6 +62,12 @@ class ShopHandler:
             f"✅ Mahsulot havolasi:\n{product['link']}\n\n"
             f"📝 Xaridni yakunlash uchun bu havolani administratorga yuboring."
         )
+        if self.reservations is not None:
+            minutes = max(1, round(hold.seconds_left() / 60))
+            response_text += (
+                f"\n\n⏳ Товар забронирован за вами на {minutes} мин\n"
+                f"⏳ Mahsulot siz uchun {minutes} daqiqaga band qilindi"
+            )
         
         # Create button to contact admin
         keyboard = types.InlineKeyboardMarkup(inline_keyboard=[
@@ -47,6 +78,8 @@ class ShopHandler:
         ])
         
         await message.answer(response_text, reply_markup=keyboard)
+        if status == "repeat":
+            return  # admins were told when the hold was placed
         
         # Notify admin about purchase attempt
         admin_notification = (
@@ -58,12 +91,60 @@ class ShopHandler:
             f"🔗 ID покупки: {purchase_id}"
         )
         
+        await self.notify_admins(admin_notification)
+    
+    @tracer.traced("shop.notify_admins")
+    async def notify_admins(self, text: str):
+        """Notify all admins, through the outbound queue when one is configured"""
+        if self.notifier is not None:
+            for admin_id in self.admin_ids:
+                self.notifier.enqueue(admin_id, text)
+            return
+        
         for admin_id in self.admin_ids:
             try:
-                await self.bot.send_message(admin_id, admin_notification)
+                await self.bot.send_message(admin_id, text)
             except Exception as e:
                 print(f"Failed to notify admin {admin_id}: {e}")
     
+    @tracer.traced("shop.handle_bid")
+    async def handle_bid(self, message: types.Message, auction_id: str, amount: str):
+        """Handle a (maximum) bid from user"""
+        try:
+            max_amount = float(amount)
+        except ValueError:
+            max_amount = math.nan
+        if not (math.isfinite(max_amount) and max_amount > 0):
+            await message.answer("❌ Неверная сумма / Noto'g'ri summa")
+            return
+        
+        result = await self.auction_engine.place_bid(auction_id, message.from_user.id, max_amount)
+        
+        if result.reason == "invalid":
+            text = "❌ Неверная сумма / Noto'g'ri summa"
+        elif result.reason == "not_found":
+            text = "❌ Лот не найден / Lot topilmadi"
+        elif result.reason == "closed":
+            text = "❌ Аукцион завершен / Auksion yakunlangan"
+        elif result.reason == "too_low":
+            text = (
+                f"❌ Минимальная ставка: {result.min_next_bid} ₽\n"
+                f"❌ Minimal stavka: {result.min_next_bid} ₽"
+            )
+        elif result.reason == "outbid":
+            text = (
+                f"⚠️ Вашу ставку перебили, текущая цена: {result.current_price} ₽\n"
+                f"⚠️ Stavkangiz oshib ketildi, joriy narx: {result.current_price} ₽"
+            )
+        elif result.reason == "raised_max":
+            text = "✅ Максимальная ставка повышена / Maksimal stavka oshirildi"
+        else:
+            text = (
+                f"✅ Вы лидируете! Текущая цена: {result.current_price} ₽\n"
+                f"✅ Siz yetakchisiz! Joriy narx: {result.current_price} ₽"
+            )
+        await message.answer(text)
+    
     def get_products_by_category(self, category: str = None):
         """Get products filtered by category"""
         return self.db.get_all_products(category=category, status="available")
@@ -71,3 +152,7 @@ class ShopHandler:
     def get_product_details(self, product_id: str):
         """Get detailed product information"""
         return self.db.get_product(product_id)
+    
+    def get_category_counts(self):
+        """Get number of available products per category"""
+        return self.db.get_category_counts(status="available")
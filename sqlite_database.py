@@ -0,0 +1,585 @@
+import asyncio
+import functools
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from bid_history import downsample_series
+from database import (CATALOG_COLLECTIONS, RANGE_FIELDS, SORT_ORDERS, ChangeLog, change_key,
+                      decode_cursor, encode_cursor)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    price REAL NOT NULL,
+    category TEXT NOT NULL,
+    description TEXT,
+    photo_url TEXT,
+    link TEXT,
+    float REAL,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_products_created ON products (created_at);
+CREATE INDEX IF NOT EXISTS idx_products_category ON products (category, created_at);
+CREATE INDEX IF NOT EXISTS idx_products_status ON products (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_products_category_status ON products (category, status, created_at);
+CREATE INDEX IF NOT EXISTS idx_products_price ON products (price);
+CREATE INDEX IF NOT EXISTS idx_products_float ON products (float);
+CREATE INDEX IF NOT EXISTS idx_products_status_price ON products (status, price);
+CREATE INDEX IF NOT EXISTS idx_products_status_float ON products (status, float);
+
+CREATE TABLE IF NOT EXISTS auctions (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    starting_price REAL NOT NULL,
+    current_price REAL NOT NULL,
+    category TEXT NOT NULL,
+    description TEXT,
+    photo_url TEXT,
+    link TEXT,
+    float REAL,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_auctions_created ON auctions (created_at);
+CREATE INDEX IF NOT EXISTS idx_auctions_status ON auctions (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_auctions_price ON auctions (status, current_price);
+CREATE INDEX IF NOT EXISTS idx_auctions_float ON auctions (status, float);
+
+CREATE TABLE IF NOT EXISTS bids (
+    auction_id TEXT NOT NULL REFERENCES auctions (id) ON DELETE CASCADE,
+    user_id INTEGER NOT NULL,
+    amount REAL NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_bids_auction ON bids (auction_id);
+
+CREATE TABLE IF NOT EXISTS purchases (
+    id TEXT PRIMARY KEY,
+    product_id TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_purchases_status ON purchases (status, timestamp);
+"""
+
+PRODUCT_COLUMNS = ("name", "price", "category", "description", "photo_url",
+                   "link", "float", "status", "created_at")
+AUCTION_COLUMNS = ("name", "starting_price", "current_price", "category",
+                   "description", "photo_url", "link", "float", "status",
+                   "created_at")
+
+
+class SqliteDatabase:
+    """SQLite-backed database with the same interface as ``Database``.
+
+    Connections live in a small pool shared by a thread-pool executor.
+    Handlers should go through ``await db.run(db.method, ...)`` so queries
+    run off the event loop; the plain methods stay usable from sync code.
+    """
+
+    def __init__(self, path: str = "shop.sqlite3", pool_size: int = 4, change_log_size: int = 10000):
+        self.path = path
+        self.instance_id = uuid.uuid4().hex[:8]
+        self.version = 0
+        self.changes = ChangeLog(change_log_size)
+        self._listeners = []
+        self._version_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="sqlite")
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    @contextmanager
+    def _transaction(self):
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    @contextmanager
+    def _snapshot(self):
+        """Read transaction: every SELECT inside sees the same version of the file"""
+        with self._connection() as conn:
+            conn.execute("BEGIN")
+            try:
+                yield conn
+            finally:
+                conn.execute("COMMIT")
+
+    async def run(self, func, *args, **kwargs):
+        """Run a database method on the executor"""
+        loop = self._loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def subscribe(self, listener):
+        """Call ``listener(entry)`` on the event loop after every mutation"""
+        self._listeners.append(listener)
+
+    def _changed(self, *entry):
+        if entry[0] == "bid" or entry[1] in CATALOG_COLLECTIONS:
+            with self._version_lock:
+                self.version += 1
+                self.changes.record(self.version, *change_key(entry))
+        if not self._listeners:
+            return
+        loop = self._loop
+        for listener in self._listeners:
+            if loop is not None and threading.current_thread() is not threading.main_thread():
+                loop.call_soon_threadsafe(listener, entry)
+            else:
+                listener(entry)
+
+    def collection_sizes(self) -> Dict[str, int]:
+        """Number of records per collection"""
+        with self._connection() as conn:
+            return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                    for table in ("products", "auctions", "purchases")}
+
+    def close(self):
+        """Close all pooled connections"""
+        self._executor.shutdown(wait=True)
+        while not self._pool.empty():
+            self._pool.get().close()
+
+    # Product methods
+    def add_product(self, name: str, price: float, category: str,
+                   description: str, photo_url: str, link: str,
+                   float_value: Optional[float] = None) -> str:
+        """Add a new product"""
+        product = {
+            "id": str(uuid.uuid4()),
+            "name": name,
+            "price": price,
+            "category": category,
+            "description": description,
+            "photo_url": photo_url,
+            "link": link,
+            "float": float_value,
+            "status": "available",
+            "created_at": datetime.now().isoformat(),
+        }
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO products (id, name, price, category, description, photo_url,"
+                " link, float, status, created_at) VALUES (:id, :name, :price, :category,"
+                " :description, :photo_url, :link, :float, :status, :created_at)",
+                product,
+            )
+        self._changed("put", "products", product)
+        return product["id"]
+
+    def add_products(self, items: List[dict]) -> List[str]:
+        """Add many products in one transaction"""
+        products = [{
+            "id": str(uuid.uuid4()),
+            "name": item["name"],
+            "price": item["price"],
+            "category": item["category"],
+            "description": item.get("description", ""),
+            "photo_url": item.get("photo_url", ""),
+            "link": item.get("link", ""),
+            "float": item.get("float"),
+            "status": item.get("status") or "available",
+            "created_at": datetime.now().isoformat(),
+        } for item in items]
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO products (id, name, price, category, description, photo_url,"
+                " link, float, status, created_at) VALUES (:id, :name, :price, :category,"
+                " :description, :photo_url, :link, :float, :status, :created_at)",
+                products,
+            )
+        for product in products:
+            self._changed("put", "products", product)
+        return [product["id"] for product in products]
+
+    def get_product(self, product_id: str) -> Optional[dict]:
+        """Get product by ID"""
+        with self._connection() as conn:
+            row = conn.execute("SELECT * FROM products WHERE id = ?", (product_id,)).fetchone()
+        return dict(row) if row else None
+
+    def get_all_products(self, category: Optional[str] = None,
+                        status: Optional[str] = None) -> List[dict]:
+        """Get all products with optional filters, newest first"""
+        where, params = self._filters(category=category, status=status)
+        with self._connection() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM products{where} ORDER BY created_at DESC", params
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_products_page(self, category: Optional[str] = None,
+                          status: Optional[str] = None, limit: int = 50,
+                          cursor: Optional[str] = None, sort: str = "newest",
+                          min_price: Optional[float] = None, max_price: Optional[float] = None,
+                          min_float: Optional[float] = None, max_float: Optional[float] = None
+                          ) -> Tuple[List[dict], Optional[str]]:
+        """Get one page of products and the cursor of the next page"""
+        filters = {"price": (min_price, max_price), "float": (min_float, max_float)}
+        with self._connection() as conn:
+            rows, sort_column = self._page(conn, "products", category, status, limit,
+                                           cursor, sort, filters)
+        return self._split_page([dict(row) for row in rows], limit, sort_column)
+
+    def count_products(self, category: Optional[str] = None,
+                       status: Optional[str] = None) -> int:
+        """Count products matching the filters"""
+        where, params = self._filters(category=category, status=status)
+        with self._connection() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM products{where}", params).fetchone()[0]
+
+    def get_category_counts(self, status: Optional[str] = None) -> Dict[str, int]:
+        """Get number of products per category"""
+        where, params = self._filters(status=status)
+        with self._connection() as conn:
+            rows = conn.execute(
+                f"SELECT category, COUNT(*) FROM products{where} GROUP BY category", params
+            ).fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def update_product(self, product_id: str, **kwargs) -> bool:
+        """Update product fields"""
+        return self._update("products", PRODUCT_COLUMNS, product_id, kwargs)
+
+    def delete_product(self, product_id: str) -> bool:
+        """Delete a product"""
+        with self._transaction() as conn:
+            deleted = conn.execute("DELETE FROM products WHERE id = ?", (product_id,)).rowcount > 0
+        if deleted:
+            self._changed("del", "products", product_id)
+        return deleted
+
+    def set_product_status(self, product_id: str, status: str) -> bool:
+        """Set product status (available/sold)"""
+        return self.update_product(product_id, status=status)
+
+    # Auction methods
+    def add_auction(self, name: str, starting_price: float, category: str,
+                   description: str, photo_url: str, link: str,
+                   float_value: Optional[float] = None) -> str:
+        """Add a new auction lot"""
+        auction = {
+            "id": str(uuid.uuid4()),
+            "name": name,
+            "starting_price": starting_price,
+            "current_price": starting_price,
+            "category": category,
+            "description": description,
+            "photo_url": photo_url,
+            "link": link,
+            "float": float_value,
+            "status": "active",
+            "created_at": datetime.now().isoformat(),
+        }
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO auctions (id, name, starting_price, current_price, category,"
+                " description, photo_url, link, float, status, created_at)"
+                " VALUES (:id, :name, :starting_price, :current_price, :category,"
+                " :description, :photo_url, :link, :float, :status, :created_at)",
+                auction,
+            )
+        self._changed("put", "auctions", dict(auction, bids=[]))
+        return auction["id"]
+
+    def get_auction(self, auction_id: str) -> Optional[dict]:
+        """Get auction by ID"""
+        with self._snapshot() as conn:
+            row = conn.execute("SELECT * FROM auctions WHERE id = ?", (auction_id,)).fetchone()
+            if not row:
+                return None
+            return self._with_bids(conn, [row], " WHERE id = ?", [auction_id])[0]
+
+    def get_all_auctions(self, status: Optional[str] = None) -> List[dict]:
+        """Get all auctions with optional status filter, newest first"""
+        where, params = self._filters(status=status)
+        with self._snapshot() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM auctions{where} ORDER BY created_at DESC", params
+            ).fetchall()
+            return self._with_bids(conn, rows, where, params)
+
+    def get_auctions_page(self, category: Optional[str] = None,
+                          status: Optional[str] = None, limit: int = 50,
+                          cursor: Optional[str] = None, sort: str = "newest",
+                          min_price: Optional[float] = None, max_price: Optional[float] = None,
+                          min_float: Optional[float] = None, max_float: Optional[float] = None
+                          ) -> Tuple[List[dict], Optional[str]]:
+        """Get one page of auctions (price = current price) and the cursor of the next page"""
+        filters = {"price": (min_price, max_price), "float": (min_float, max_float)}
+        with self._snapshot() as conn:
+            rows, sort_column = self._page(conn, "auctions", category, status, limit,
+                                           cursor, sort, filters)
+            ids = [row["id"] for row in rows[:limit]]
+            placeholders = ", ".join("?" for _ in ids) or "NULL"
+            auctions = self._with_bids(conn, rows, f" WHERE id IN ({placeholders})", ids)
+        return self._split_page(auctions, limit, sort_column)
+
+    def add_bid(self, auction_id: str, user_id: int, amount: float) -> bool:
+        """Add a bid to an auction"""
+        with self._transaction() as conn:
+            updated = conn.execute(
+                "UPDATE auctions SET current_price = ?"
+                " WHERE id = ? AND status = 'active' AND current_price < ?",
+                (amount, auction_id, amount),
+            ).rowcount
+            if not updated:
+                return False
+            timestamp = time.time()
+            conn.execute(
+                "INSERT INTO bids (auction_id, user_id, amount, timestamp) VALUES (?, ?, ?, ?)",
+                (auction_id, user_id, amount, datetime.fromtimestamp(timestamp).isoformat()),
+            )
+        self._changed("bid", auction_id, user_id, amount, timestamp)
+        return True
+
+    def get_price_series(self, auction_id: str, points: int = 50) -> Optional[Dict[str, list]]:
+        """Get a downsampled price-over-time series of an auction"""
+        with self._connection() as conn:
+            if conn.execute("SELECT 1 FROM auctions WHERE id = ?", (auction_id,)).fetchone() is None:
+                return None
+            rows = conn.execute(
+                "SELECT timestamp, amount FROM bids WHERE auction_id = ? ORDER BY rowid",
+                (auction_id,),
+            ).fetchall()
+        timestamps = [datetime.fromisoformat(row[0]).timestamp() for row in rows]
+        return downsample_series(timestamps, [row[1] for row in rows], points)
+
+    def close_auction(self, auction_id: str) -> bool:
+        """Close an auction"""
+        return self.update_auction(auction_id, status="closed")
+
+    def update_auction(self, auction_id: str, **kwargs) -> bool:
+        """Update auction fields"""
+        return self._update("auctions", AUCTION_COLUMNS, auction_id, kwargs)
+
+    def delete_auction(self, auction_id: str) -> bool:
+        """Delete an auction"""
+        with self._transaction() as conn:
+            deleted = conn.execute("DELETE FROM auctions WHERE id = ?", (auction_id,)).rowcount > 0
+        if deleted:
+            self._changed("del", "auctions", auction_id)
+        return deleted
+
+    # Purchase tracking
+    def record_purchase(self, product_id: str, user_id: int) -> str:
+        """Record a purchase attempt"""
+        purchase = {
+            "id": str(uuid.uuid4()),
+            "product_id": product_id,
+            "user_id": user_id,
+            "status": "pending",
+            "timestamp": datetime.now().isoformat(),
+        }
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO purchases (id, product_id, user_id, status, timestamp)"
+                " VALUES (:id, :product_id, :user_id, :status, :timestamp)",
+                purchase,
+            )
+        self._changed("put", "purchases", purchase)
+        return purchase["id"]
+
+    def reserve_purchase(self, product_id: str, user_id: int, since: str) -> Tuple[bool, dict]:
+        """Record a purchase unless one for the product is pending since ``since`` (ISO time).
+
+        The check and the insert share one write transaction, so of two
+        processes reserving the same product only one records a purchase.
+        Returns ``(True, new purchase)`` or ``(False, the pending purchase)``.
+        """
+        purchase = {
+            "id": str(uuid.uuid4()),
+            "product_id": product_id,
+            "user_id": user_id,
+            "status": "pending",
+            "timestamp": datetime.now().isoformat(),
+        }
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT * FROM purchases WHERE status = 'pending' AND product_id = ? AND timestamp >= ?"
+                " ORDER BY timestamp LIMIT 1",
+                (product_id, since),
+            ).fetchone()
+            if row is not None:
+                return False, dict(row)
+            conn.execute(
+                "INSERT INTO purchases (id, product_id, user_id, status, timestamp)"
+                " VALUES (:id, :product_id, :user_id, :status, :timestamp)",
+                purchase,
+            )
+        self._changed("put", "purchases", purchase)
+        return True, purchase
+
+    def get_purchase(self, purchase_id: str) -> Optional[dict]:
+        """Get purchase by ID"""
+        with self._connection() as conn:
+            row = conn.execute("SELECT * FROM purchases WHERE id = ?", (purchase_id,)).fetchone()
+        return dict(row) if row else None
+
+    def update_purchase_status(self, purchase_id: str, status: str) -> bool:
+        """Update purchase status"""
+        with self._transaction() as conn:
+            updated = conn.execute(
+                "UPDATE purchases SET status = ? WHERE id = ?", (status, purchase_id)
+            ).rowcount > 0
+        if updated:
+            self._changed("patch", "purchases", purchase_id, {"status": status})
+        return updated
+
+    def get_pending_purchases(self) -> List[dict]:
+        """Purchases still waiting for the admin, oldest first"""
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT * FROM purchases WHERE status = 'pending' ORDER BY timestamp").fetchall()
+        return [dict(row) for row in rows]
+
+    def expire_purchases(self, purchase_ids: List[str]) -> int:
+        """Delete the given purchases that are still pending; return how many were deleted"""
+        expired = []
+        with self._transaction() as conn:
+            for purchase_id in purchase_ids:
+                if conn.execute("DELETE FROM purchases WHERE id = ? AND status = 'pending'",
+                                (purchase_id,)).rowcount:
+                    expired.append(purchase_id)
+        for purchase_id in expired:
+            self._changed("del", "purchases", purchase_id)
+        return len(expired)
+
+    # Helpers
+    @staticmethod
+    def _filters(**filters) -> tuple:
+        clauses = [f"{column} = ?" for column, value in filters.items() if value]
+        params = [value for value in filters.values() if value]
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def _page(self, conn: sqlite3.Connection, table: str, category: Optional[str],
+              status: Optional[str], limit: int, cursor: Optional[str], sort: str,
+              filters: Dict[str, Tuple[Optional[float], Optional[float]]]) -> tuple:
+        if sort not in SORT_ORDERS:
+            raise ValueError(f"Unknown sort order: {sort!r}")
+        fields = RANGE_FIELDS[table]
+        where, params = self._filters(category=category, status=status)
+        clauses = [where[len(" WHERE "):]] if where else []
+        for name, (low, high) in filters.items():
+            if low is not None:
+                clauses.append(f"{fields[name]} >= ?")
+                params.append(low)
+            if high is not None:
+                clauses.append(f"{fields[name]} <= ?")
+                params.append(high)
+
+        if sort == "newest":
+            column, descending = "created_at", True
+        else:
+            name, _, direction = sort.rpartition("_")
+            column, descending = fields[name], direction == "desc"
+            clauses.append(f"{column} IS NOT NULL")
+        if cursor:
+            value, record_id = decode_cursor(cursor)
+            if column != "created_at":
+                try:
+                    value = float(value)
+                except ValueError:
+                    raise ValueError(f"Invalid cursor: {cursor!r}")
+            clauses.append(f"({column}, id) {'<' if descending else '>'} (?, ?)")
+            params.extend((value, record_id))
+
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        order = "DESC" if descending else "ASC"
+        # One extra row tells whether another page exists
+        rows = conn.execute(
+            f"SELECT * FROM {table}{where} ORDER BY {column} {order}, id {order} LIMIT ?",
+            (*params, limit + 1),
+        ).fetchall()
+        return rows, column
+
+    @staticmethod
+    def _split_page(records: List[dict], limit: int,
+                    sort_column: str = "created_at") -> Tuple[List[dict], Optional[str]]:
+        if len(records) <= limit:
+            return records, None
+        records = records[:limit]
+        last = records[-1]
+        value = last[sort_column]
+        if sort_column != "created_at":
+            value = repr(float(value))
+        return records, encode_cursor((value, last["id"]))
+
+    def _update(self, table: str, columns: tuple, record_id: str, fields: dict) -> bool:
+        unknown = set(fields) - set(columns)
+        if unknown:
+            raise ValueError(f"Unknown {table} fields: {', '.join(sorted(unknown))}")
+        with self._transaction() as conn:
+            if not fields:
+                return conn.execute(
+                    f"SELECT 1 FROM {table} WHERE id = ?", (record_id,)
+                ).fetchone() is not None
+            assignments = ", ".join(f"{column} = ?" for column in fields)
+            updated = conn.execute(
+                f"UPDATE {table} SET {assignments} WHERE id = ?",
+                (*fields.values(), record_id),
+            ).rowcount > 0
+        if updated:
+            self._changed("patch", table, record_id, fields)
+        return updated
+
+    @staticmethod
+    def _with_bids(conn: sqlite3.Connection, rows, where: str, params: list) -> List[dict]:
+        """Attach bids; call inside ``_snapshot`` so ``where`` matches the rows already read"""
+        auctions = [dict(row) for row in rows]
+        if not auctions:
+            return auctions
+        by_id = {}
+        for auction in auctions:
+            auction["bids"] = []
+            by_id[auction["id"]] = auction
+        for bid in conn.execute(
+            f"SELECT auction_id, user_id, amount, timestamp FROM bids"
+            f" WHERE auction_id IN (SELECT id FROM auctions{where}) ORDER BY rowid",
+            params,
+        ):
+            auction = by_id.get(bid["auction_id"])
+            if auction is None:
+                continue
+            auction["bids"].append({
+                "user_id": bid["user_id"],
+                "amount": bid["amount"],
+                "timestamp": bid["timestamp"],
+            })
+        return auctions
@@ -0,0 +1,78 @@
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def process_age() -> Optional[float]:
+    """Seconds since this process was created (Linux), None elsewhere"""
+    try:
+        with open("/proc/self/stat", "r") as f:
+            # Fields after the parenthesized command name start at field 3 (state)
+            fields = f.read().rpartition(")")[2].split()
+        started = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+        return max(0.0, time.clock_gettime(time.CLOCK_BOOTTIME) - started)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupTimer:
+    """Wall-clock breakdown of startup, from process creation to ready.
+
+    ``mark`` closes a sequential phase (interpreter and imports, module
+    setup, on_startup, binding the port); ``record`` adds work that ran in
+    the background after the port was bound and so did not delay it.
+    """
+
+    def __init__(self):
+        now = time.perf_counter()
+        self.origin = now - (process_age() or 0.0)
+        self._last = self.origin
+        self.phases: List[Tuple[str, float]] = []
+        self.background: List[Tuple[str, float]] = []
+        self.ready: Optional[float] = None
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def record(self, phase: str, seconds: float):
+        self.background.append((phase, seconds))
+
+    def set_ready(self):
+        """The port is bound: updates are being accepted from here on"""
+        self.ready = time.perf_counter() - self.origin
+
+    def summary(self) -> str:
+        parts = [f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in self.phases]
+        text = ", ".join(parts)
+        if self.ready is not None:
+            text += f" -> ready in {self.ready:.2f} s"
+        if self.background:
+            text += "; background: " + ", ".join(
+                f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in self.background)
+        return text
+
+    def as_gauges(self) -> Dict[Tuple[str], float]:
+        """Phase durations for a labelled gauge"""
+        return {(phase,): seconds for phase, seconds in self.phases + self.background}
+
+
+async def ensure_webhook(bot, url: str, allowed_updates: Optional[List[str]] = None,
+                         drop_pending_updates: bool = False) -> bool:
+    """Register the webhook unless Telegram already has this configuration.
+
+    Returns whether ``setWebhook`` was called.  Pending updates are kept
+    by default: after a cold start they include the one that woke us.
+    """
+    info = await bot.get_webhook_info()
+    same_updates = allowed_updates is None or sorted(info.allowed_updates or []) == sorted(allowed_updates)
+    if info.url == url and same_updates:
+        if info.last_error_message:
+            logger.info("Webhook unchanged; last delivery error: %s", info.last_error_message)
+        return False
+    await bot.set_webhook(url, allowed_updates=allowed_updates, drop_pending_updates=drop_pending_updates)
+    return True
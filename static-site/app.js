@@ -109,7 +109,7 @@ function renderProducts() {
       (product) => `
         <div class="product-card">
             <img src="${product.photo_url}" alt="${product.name}" class="product-image" 
-                 onerror="this.src='https://via.placeholder.com/400x200/667eea/ffffff?text=Product'">
+                 onerror="this.onerror=null;this.src='${generatePhotoUrl(product.name, product.category)}'">
             <div class="product-info">
                 <div class="product-header">
                     <div>
@@ -181,30 +181,19 @@ document.getElementById("lotCategory")?.addEventListener("change", (e) => {
   floatGroup.style.display = e.target.value === "weapons" ? "block" : "none"
 })
 
-// Helper: Generate photo URL based on product name and category
+// Helper: Generate photo URL based on product name and category.
+// The card (gradient by name length, icon by category) is rendered by the server at
+// /img/placeholder/<token>.svg, where the token is base64url("2|category|gradient|name").
 function generatePhotoUrl(name, category) {
-  // Создаем уникальный цвет на основе названия
-  const colors = [
-    ['667eea', '764ba2'], // Фиолетовый
-    ['f093fb', 'f5576c'], // Розовый
-    ['4facfe', '00f2fe'], // Голубой
-    ['43e97b', '38f9d7'], // Зеленый
-    ['fa709a', 'fee140'], // Желто-розовый
-    ['30cfd0', '330867'], // Сине-фиолетовый
-    ['a8edea', 'fed6e3'], // Пастельный
-    ['ff9a9e', 'fecfef'], // Светло-розовый
-  ]
-  
-  const colorIndex = name.length % colors.length
-  const [color1, color2] = colors[colorIndex]
-  
-  // Иконка в зависимости от категории
-  const icon = category === 'weapons' ? '🔫' : '👤'
-  
-  // Кодируем текст для URL
-  const encodedName = encodeURIComponent(name.substring(0, 20))
-  
-  return `https://via.placeholder.com/400x200/${color1}/${color2}?text=${icon}+${encodedName}`
+  const gradient = name.length % 8
+  const raw = `2|${category}|${gradient}|${name.substring(0, 20)}`
+  const bytes = new TextEncoder().encode(raw)
+  let binary = ""
+  bytes.forEach((byte) => {
+    binary += String.fromCharCode(byte)
+  })
+  const token = btoa(binary).replace(/\+/g, "-").replace(/\//g, "_").replace(/=+$/, "")
+  return `/img/placeholder/${token}.svg`
 }
 
 // Helper: Generate Steam market link
@@ -288,7 +277,7 @@ function showAllProducts() {
       (product) => `
         <div class="product-card">
             <img src="${product.photo_url}" alt="${product.name}" class="product-image"
-                 onerror="this.src='https://via.placeholder.com/400x200/667eea/ffffff?text=Product'">
+                 onerror="this.onerror=null;this.src='${generatePhotoUrl(product.name, product.category)}'">
             <div class="product-info">
                 <div class="product-name">${product.name}</div>
                 <div class="product-category">${t(product.category)}</div>
@@ -331,32 +320,210 @@ function deleteProduct(productId) {
   }
 }
 
-// Initialize
-function init() {
-  // Mock data for demonstration
-  products = [
-    {
-      id: "1",
-      name: "AK-47 | Redline",
-      price: 2500,
-      category: "weapons",
-      description: "Field-Tested качество, отличное состояние",
-      photo_url: "https://via.placeholder.com/400x200/667eea/ffffff?text=AK-47",
-      link: "https://example.com/item1",
-      float: 0.25,
-      status: "available",
-    },
-    {
-      id: "2",
-      name: "Агент Phoenix",
-      price: 1500,
-      category: "agents",
-      description: "Редкий агент из коллекции",
-      photo_url: "https://via.placeholder.com/400x200/764ba2/ffffff?text=Agent",
-      link: "https://example.com/item2",
-      status: "available",
-    },
-  ]
+// Load catalog from the server API, following cursors until the last page.
+// Responses carry an ETag, so repeat opens are revalidated with a cheap 304.
+// Throws if any page fails: a partial list must never be cached as complete.
+async function loadProducts(startCursor = null) {
+  const params = new URLSearchParams({ limit: "200" })
+  if (!isAdmin) params.set("status", "available")
+  const items = []
+  let cursor = startCursor
+  let version = null
+  do {
+    if (cursor) params.set("cursor", cursor)
+    const response = await fetch(`/api/products?${params}`)
+    if (!response.ok) throw new Error(`Catalog page failed: HTTP ${response.status}`)
+    const page = await response.json()
+    // Changes made while paging are sent again by the next delta
+    if (version === null) version = { version: page.version, instance: page.instance }
+    items.push(...page.items)
+    cursor = page.next_cursor
+  } while (cursor)
+  if (!startCursor) {
+    catalogVersion = version.version
+    catalogInstance = version.instance
+    catalogPartial = false
+  }
+  return items
+}
+
+// The catalog is cached in localStorage and brought up to date with
+// /api/catalog/changes, so a repeat open downloads only what changed.
+const CATALOG_CACHE_KEY = isAdmin ? "catalog-admin" : "catalog"
+let catalogVersion = null
+let catalogInstance = null
+let catalogPartial = false // only the inlined first page arrived; never cached
+
+function saveCatalog() {
+  if (catalogVersion === null || catalogPartial) return
+  try {
+    localStorage.setItem(
+      CATALOG_CACHE_KEY,
+      JSON.stringify({ version: catalogVersion, instance: catalogInstance, products }),
+    )
+  } catch (e) {
+    // Storage full or disabled: the next open loads the full catalog
+  }
+}
+
+// Apply one record from a delta: the record as it is now, or its deletion
+function applyDelta(change) {
+  if (change.kind !== "products") return
+  const index = products.findIndex((p) => p.id === change.id)
+  const hidden = change.op === "delete" || (!isAdmin && change.item.status !== "available")
+  if (hidden) {
+    if (index >= 0) products.splice(index, 1)
+  } else if (index >= 0) {
+    products[index] = change.item
+  } else {
+    products.unshift(change.item)
+  }
+}
+
+// Bring the catalog up to date: a delta from the cached version, or a full load
+async function syncProducts() {
+  let cached = null
+  try {
+    cached = JSON.parse(localStorage.getItem(CATALOG_CACHE_KEY))
+  } catch (e) {
+    cached = null
+  }
+  const base = catalogVersion !== null ? { version: catalogVersion, instance: catalogInstance, products } : cached
+  if (base) {
+    const params = new URLSearchParams({ since: base.version, instance: base.instance })
+    const response = await fetch(`/api/catalog/changes?${params}`)
+    if (response.ok) {
+      const delta = await response.json()
+      if (!delta.resync) {
+        products = base.products
+        delta.changes.forEach(applyDelta)
+        catalogVersion = delta.version
+        catalogInstance = delta.instance
+        saveCatalog()
+        return
+      }
+    }
+  }
+  products = await loadProducts()
+  saveCatalog()
+}
+
+// Apply one pushed change to the local catalog. Returns false for an update
+// to a product we do not have that may make it visible: updates carry only
+// the changed fields, so the whole record has to come from a delta sync.
+function applyChange(change) {
+  if (change.kind !== "products") return true
+  const index = products.findIndex((p) => p.id === change.id)
+  if (change.op === "delete") {
+    if (index >= 0) products.splice(index, 1)
+  } else if (index >= 0) {
+    Object.assign(products[index], change.fields)
+  } else if (change.op === "insert") {
+    products.unshift(change.fields)
+  } else if (isAdmin || change.fields.status === "available") {
+    return false
+  }
+  return true
+}
+
+// Live updates: the server pushes coalesced catalog changes over Server-Sent Events.
+// After a dropped connection the catalog is synced, since changes may have been missed.
+function subscribeLive() {
+  if (!window.EventSource) return
+  const source = new EventSource("/api/live?topics=products")
+  let renderScheduled = false
+  let dropped = false
+
+  // On failure the current list and the cached one stay as they were
+  const reload = async () => {
+    try {
+      products = await loadProducts()
+    } catch (e) {
+      console.error("Failed to reload products", e)
+      return
+    }
+    saveCatalog()
+    renderProducts()
+  }
+  const resume = async () => {
+    try {
+      await syncProducts()
+    } catch (e) {
+      console.error("Failed to sync products", e)
+      return false
+    }
+    renderProducts()
+    return true
+  }
+
+  // While a sync for an incomplete change is pending the version stays put,
+  // so neither the cache nor the next delta can skip past that change
+  let syncing = false
+  let syncAgain = false
+  const syncMissing = async () => {
+    syncing = true
+    do {
+      syncAgain = false
+      if (!(await resume())) {
+        await new Promise((resolve) => setTimeout(resolve, 5000))
+        syncAgain = true
+      }
+    } while (syncAgain)
+    syncing = false
+  }
+
+  source.onmessage = (event) => {
+    const batch = JSON.parse(event.data)
+    const complete = batch.changes.map(applyChange).every(Boolean)
+    if (!complete) {
+      if (syncing) syncAgain = true
+      else syncMissing()
+    } else if (!syncing) {
+      catalogVersion = batch.version
+    }
+    if (!renderScheduled) {
+      renderScheduled = true
+      requestAnimationFrame(() => {
+        renderScheduled = false
+        renderProducts()
+        saveCatalog()
+      })
+    }
+  }
+  source.addEventListener("resync", reload)
+  source.addEventListener("ready", (event) => {
+    // Also catches changes made between the page render and the stream opening
+    if (dropped || (catalogVersion !== null && Number(event.data) > catalogVersion)) {
+      dropped = false
+      resume()
+    }
+  })
+  source.onerror = () => {
+    dropped = true
+  }
+}
+
+// Initialize. The server inlines the translations and the first catalog page
+// (window.bootCatalog), so products render without waiting for a request;
+// the plain static site falls back to translations.js and the API.
+async function init() {
+  const boot = window.bootCatalog
+  if (window.bootLanguage) {
+    currentLang = window.bootLanguage
+    document.querySelectorAll(".lang-btn").forEach((b) => b.classList.toggle("active", b.dataset.lang === currentLang))
+  }
+  try {
+    if (boot) {
+      products = boot.items
+      catalogVersion = boot.version
+      catalogInstance = boot.instance
+    } else {
+      await syncProducts()
+    }
+  } catch (e) {
+    console.error("Failed to load products", e)
+    products = []
+  }
 
   if (isAdmin) {
     document.getElementById("shopView").style.display = "none"
@@ -366,6 +533,35 @@ function init() {
   }
 
   updateTexts()
+  if (boot && boot.next_cursor) {
+    try {
+      products = products.concat(await loadProducts(boot.next_cursor))
+      renderProducts()
+    } catch (e) {
+      // Keep the first page and stay live; a partial catalog is not cached
+      console.error("Failed to load the rest of the catalog", e)
+      catalogPartial = true
+      retryFullLoad(5000)
+    }
+  }
+  saveCatalog()
+  subscribeLive()
+}
+
+// A delta from the boot version cannot bring back pages that never arrived,
+// so after a failed background load the whole catalog is fetched again
+function retryFullLoad(delay) {
+  setTimeout(async () => {
+    if (!catalogPartial) return // a resync already reloaded it
+    try {
+      products = await loadProducts()
+    } catch (e) {
+      retryFullLoad(Math.min(delay * 2, 60000))
+      return
+    }
+    saveCatalog()
+    renderProducts()
+  }, delay)
 }
 
 init()
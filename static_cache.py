@@ -0,0 +1,169 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional
+
+from aiohttp import web
+
+try:
+    import brotli
+except ImportError:  # Optional: pip install Brotli
+    brotli = None
+
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json",
+                      "application/yaml", "image/svg+xml")
+MIN_COMPRESS_SIZE = 256
+
+mimetypes.add_type("application/javascript", ".js")
+mimetypes.add_type("application/yaml", ".yaml")
+mimetypes.add_type("text/markdown", ".md")
+
+
+class StaticAsset:
+    """One file held in memory with its precompressed variants"""
+
+    def __init__(self, path: str, cache_control: str):
+        self.path = path
+        self.cache_control = cache_control
+        self.load()
+
+    def load(self):
+        with open(self.path, "rb") as f:
+            body = f.read()
+        stat = os.stat(self.path)
+        self.mtime = stat.st_mtime
+        self.content_type = mimetypes.guess_type(self.path)[0] or "application/octet-stream"
+        self.etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        self.last_modified = formatdate(int(self.mtime), usegmt=True)
+        self.variants: Dict[str, bytes] = {"identity": body}
+        if len(body) >= MIN_COMPRESS_SIZE and self.content_type.startswith(COMPRESSIBLE_TYPES):
+            compressed = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(compressed) < len(body):
+                self.variants["gzip"] = compressed
+            if brotli is not None:
+                compressed = brotli.compress(body, quality=11)
+                if len(compressed) < len(body):
+                    self.variants["br"] = compressed
+
+    def is_stale(self) -> bool:
+        try:
+            return os.stat(self.path).st_mtime != self.mtime
+        except FileNotFoundError:
+            return False
+
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    """Parse Accept-Encoding into {coding: q}"""
+    encodings = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        encodings[coding.strip().lower()] = q
+    return encodings
+
+
+class StaticCache:
+    """In-memory cache of the static site, loaded once at startup.
+
+    Assets are served from memory as bytes with precomputed gzip/brotli
+    variants, ETag/Last-Modified validators and Cache-Control headers.
+    With ``reload`` enabled the file mtime is checked on each request, which
+    is meant for local development only.  Without ``preload`` files are
+    loaded on first request until ``load_all`` runs (fast start).
+    """
+
+    def __init__(self, root: str, reload: bool = False,
+                 html_cache_control: str = "no-cache",
+                 asset_cache_control: str = "public, max-age=3600",
+                 preload: bool = True):
+        self.root = root
+        self.reload = reload
+        self.html_cache_control = html_cache_control
+        self.asset_cache_control = asset_cache_control
+        self.assets: Dict[str, StaticAsset] = {}
+        self.loaded = False
+        if preload:
+            self.load_all()
+
+    def load_all(self):
+        """(Re)load every file in the root directory"""
+        assets = {}
+        if os.path.isdir(self.root):
+            for name in sorted(os.listdir(self.root)):
+                path = os.path.join(self.root, name)
+                if os.path.isfile(path):
+                    assets[name] = StaticAsset(path, self._cache_control(name))
+        self.assets = assets
+        self.loaded = True
+
+    def _cache_control(self, name: str) -> str:
+        return self.html_cache_control if name.endswith(".html") else self.asset_cache_control
+
+    def get(self, name: str) -> Optional[StaticAsset]:
+        asset = self.assets.get(name)
+        if self.reload or not self.loaded:
+            if asset is None:
+                path = os.path.join(self.root, name)
+                if os.path.basename(name) == name and os.path.isfile(path):
+                    asset = self.assets[name] = StaticAsset(path, self._cache_control(name))
+            elif self.reload and asset.is_stale():
+                asset.load()
+        return asset
+
+    def respond(self, request: web.Request, name: str) -> web.Response:
+        """Build the response for one asset, honouring validators and Accept-Encoding"""
+        asset = self.get(name)
+        if asset is None:
+            return web.Response(text="File not found", status=404)
+
+        headers = {
+            "ETag": asset.etag,
+            "Last-Modified": asset.last_modified,
+            "Cache-Control": asset.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if self._not_modified(request, asset):
+            return web.Response(status=304, headers=headers)
+
+        encoding = self._negotiate(request, asset)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return web.Response(body=asset.variants[encoding], headers=headers,
+                            content_type=asset.content_type,
+                            charset="utf-8" if asset.content_type.startswith(COMPRESSIBLE_TYPES) else None)
+
+    @staticmethod
+    def _not_modified(request: web.Request, asset: StaticAsset) -> bool:
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or asset.etag in tags
+        if_modified_since = request.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(asset.mtime) <= since
+        return False
+
+    @staticmethod
+    def _negotiate(request: web.Request, asset: StaticAsset) -> str:
+        if len(asset.variants) == 1:
+            return "identity"
+        accepted = accepted_encodings(request.headers.get("Accept-Encoding", ""))
+        for encoding in ("br", "gzip"):
+            if encoding in asset.variants and accepted.get(encoding, accepted.get("*", 0)) > 0:
+                return encoding
+        return "identity"
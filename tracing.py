@@ -0,0 +1,281 @@
+import asyncio
+import functools
+import itertools
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+
+MIN_PROFILE_SECONDS = 0.1
+MAX_PROFILE_SECONDS = 60
+
+
+class Span:
+    __slots__ = ("name", "attrs", "parent", "start", "end")
+
+    def __init__(self, name: str, attrs: Dict[str, Any], parent: int, start: float):
+        self.name = name
+        self.attrs = attrs
+        self.parent = parent
+        self.start = start
+        self.end = 0.0
+
+
+class _Trace:
+    __slots__ = ("trace_id", "started_at", "spans")
+
+    def __init__(self, trace_id: int):
+        self.trace_id = trace_id
+        self.started_at = time.time()
+        self.spans: List[Span] = []
+
+    def to_dict(self) -> dict:
+        origin = self.spans[0].start
+        return {
+            "trace_id": self.trace_id,
+            "name": self.spans[0].name,
+            "started_at": self.started_at,
+            "duration_ms": round((self.spans[0].end - origin) * 1000, 3),
+            "spans": [
+                {
+                    "name": span.name,
+                    "parent": span.parent,
+                    "start_ms": round((span.start - origin) * 1000, 3),
+                    "duration_ms": round((span.end - span.start) * 1000, 3),
+                    **({"attrs": span.attrs} if span.attrs else {}),
+                }
+                for span in self.spans
+            ],
+        }
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+# (trace, index of the enclosing span) for the running task
+_current: ContextVar[Optional[tuple]] = ContextVar("trace_span", default=None)
+
+
+class _ActiveSpan:
+    __slots__ = ("tracer", "trace", "index", "token", "root")
+
+    def __init__(self, tracer: "Tracer", trace: _Trace, index: int, root: bool):
+        self.tracer = tracer
+        self.trace = trace
+        self.index = index
+        self.root = root
+
+    def __enter__(self):
+        self.token = _current.set((self.trace, self.index))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        span = self.trace.spans[self.index]
+        span.end = time.perf_counter()
+        if exc_type is not None:
+            span.attrs["error"] = exc_type.__name__
+        _current.reset(self.token)
+        if self.root:
+            self.tracer.finished.append(self.trace)
+        return False
+
+
+class Tracer:
+    """Per-update trace spans kept in a ring buffer.
+
+    ``trace()`` opens a root span (one per Telegram update), ``span()``
+    nests under whatever span the current task is in.  While disabled both
+    return a shared no-op object after a single attribute check, and spans
+    outside a trace are never recorded.
+    """
+
+    def __init__(self, capacity: int = 500):
+        self.enabled = False
+        self.finished: Deque[_Trace] = deque(maxlen=capacity)
+        self._ids = itertools.count(1)
+
+    def configure(self, enabled: Optional[bool] = None, capacity: Optional[int] = None):
+        if capacity is not None:
+            self.finished = deque(self.finished, maxlen=capacity)
+        if enabled is not None:
+            self.enabled = enabled
+
+    def trace(self, name: str, **attrs):
+        if not self.enabled:
+            return NOOP_SPAN
+        trace = _Trace(next(self._ids))
+        trace.spans.append(Span(name, attrs, -1, time.perf_counter()))
+        return _ActiveSpan(self, trace, 0, root=True)
+
+    def span(self, name: str, **attrs):
+        if not self.enabled:
+            return NOOP_SPAN
+        current = _current.get()
+        if current is None:
+            return NOOP_SPAN
+        trace, parent = current
+        trace.spans.append(Span(name, attrs, parent, time.perf_counter()))
+        return _ActiveSpan(self, trace, len(trace.spans) - 1, root=False)
+
+    def traced(self, name: str):
+        """Decorator wrapping a coroutine function in a span"""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return await func(*args, **kwargs)
+                with self.span(name):
+                    return await func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def instrument_database(self, db):
+        """Add a span around every ``await db.run(method, ...)``"""
+        run = db.run
+
+        async def traced_run(func, *args, **kwargs):
+            if not self.enabled:
+                return await run(func, *args, **kwargs)
+            with self.span(f"db.{func.__name__}"):
+                return await run(func, *args, **kwargs)
+
+        db.run = traced_run
+
+    def recent(self, limit: Optional[int] = None) -> List[dict]:
+        """Finished traces, newest first"""
+        traces = list(self.finished)[::-1]
+        return [trace.to_dict() for trace in traces[:limit]]
+
+    def slowest(self, limit: int = 10) -> List[dict]:
+        traces = sorted(self.finished, key=lambda t: t.spans[0].end - t.spans[0].start, reverse=True)
+        return [trace.to_dict() for trace in traces[:limit]]
+
+
+tracer = Tracer()
+
+
+class UpdateTracingMiddleware(BaseMiddleware):
+    """aiogram outer middleware opening one trace per update"""
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+
+    async def __call__(self, handler, event, data: Dict[str, Any]) -> Any:
+        if not self.tracer.enabled:
+            return await handler(event, data)
+        with self.tracer.trace(f"update.{event.event_type}", update_id=event.update_id):
+            return await handler(event, data)
+
+
+class HandlerTracingMiddleware(BaseMiddleware):
+    """aiogram inner middleware adding a span for the matched handler"""
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+
+    async def __call__(self, handler, event, data: Dict[str, Any]) -> Any:
+        if not self.tracer.enabled:
+            return await handler(event, data)
+        callback = getattr(data.get("handler"), "callback", None)
+        with self.tracer.span(f"handler.{getattr(callback, '__name__', 'unknown')}"):
+            return await handler(event, data)
+
+
+class TelegramTracingMiddleware(BaseRequestMiddleware):
+    """Bot session middleware adding a span per outbound API call"""
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+
+    async def __call__(self, make_request, bot, method):
+        if not self.tracer.enabled:
+            return await make_request(bot, method)
+        with self.tracer.span(f"telegram.{type(method).__name__}"):
+            return await make_request(bot, method)
+
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler producing collapsed stacks.
+
+    A daemon thread wakes every ``interval`` seconds and records the stack
+    of every other thread via ``sys._current_frames()``; nothing is hooked
+    into the profiled code, so the overhead is one stack walk per thread
+    per sample.  ``collapsed()`` returns ``thread;frame;frame count`` lines
+    as consumed by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            raise RuntimeError("Profiler is already running")
+        self.samples.clear()
+        self.sample_count = 0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    async def run_for(self, seconds: float) -> str:
+        """Profile for ``seconds`` (capped) without blocking the loop; return collapsed stacks"""
+        if not math.isfinite(seconds):
+            raise ValueError(f"Profile duration must be finite, got {seconds!r}")
+        self.start()
+        try:
+            await asyncio.sleep(min(max(seconds, MIN_PROFILE_SECONDS), MAX_PROFILE_SECONDS))
+        finally:
+            self.stop()
+        return self.collapsed()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                name = names.get(thread_id)
+                if name is None:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                    name = names.get(thread_id, str(thread_id))
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(name)
+                self.samples[";".join(reversed(stack))] += 1
+            self.sample_count += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
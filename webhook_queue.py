@@ -0,0 +1,136 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+
+def update_user_key(update: Dict[str, Any]) -> Optional[int]:
+    """User (or chat) id an update belongs to, used to keep one user's updates in order"""
+    for key, payload in update.items():
+        if key == "update_id" or not isinstance(payload, dict):
+            continue
+        sender = payload.get("from") or payload.get("user")
+        if isinstance(sender, dict) and "id" in sender:
+            return sender["id"]
+        chat = payload.get("chat")
+        if isinstance(chat, dict) and "id" in chat:
+            return chat["id"]
+    return None
+
+
+class UpdateDeduplicator:
+    """Remembers the last ``window`` update ids"""
+
+    def __init__(self, window: int = 10000):
+        self.window = window
+        self._order: Deque[int] = deque()
+        self._seen: Set[int] = set()
+
+    def __contains__(self, update_id: int) -> bool:
+        return update_id in self._seen
+
+    def add(self, update_id: int):
+        self._seen.add(update_id)
+        self._order.append(update_id)
+        if len(self._order) > self.window:
+            self._seen.discard(self._order.popleft())
+
+
+class QueuedRequestHandler(SimpleRequestHandler):
+    """Webhook handler that acknowledges at once and processes updates in workers.
+
+    Updates are sharded over ``workers`` bounded queues by user id, so one
+    user's updates are handled sequentially while different users proceed
+    in parallel.  Duplicates redelivered by Telegram are dropped by
+    ``update_id``.  When the target queue stays full for
+    ``enqueue_timeout`` seconds the request is answered with 503, and
+    Telegram redelivers it later.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, workers: int = 4,
+                 queue_size: int = 1000, dedup_window: int = 10000,
+                 enqueue_timeout: float = 1.0, secret_token: Optional[str] = None,
+                 **data: Any):
+        super().__init__(dispatcher=dispatcher, bot=bot, handle_in_background=True,
+                         secret_token=secret_token, **data)
+        self.workers = workers
+        self.enqueue_timeout = enqueue_timeout
+        shard_size = max(queue_size // workers, 1)
+        self._queues: List["asyncio.Queue[Dict[str, Any]]"] = [
+            asyncio.Queue(maxsize=shard_size) for _ in range(workers)
+        ]
+        self._dedup = UpdateDeduplicator(dedup_window)
+        self._waiting: Set[int] = set()  # update ids blocked on a full queue
+        self._tasks: List[asyncio.Task] = []
+        self.accepted = 0
+        self.duplicates = 0
+        self.rejected = 0
+
+    def register(self, app: web.Application, /, path: str, **kwargs: Any) -> None:
+        app.on_startup.append(self._start_workers)
+        super().register(app, path=path, **kwargs)
+
+    async def _start_workers(self, app: web.Application):
+        self._tasks = [asyncio.create_task(self._worker(queue)) for queue in self._queues]
+
+    def queue_depth(self) -> int:
+        return sum(queue.qsize() for queue in self._queues)
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        update = await request.json(loads=bot.session.json_loads)
+        update_id = update.get("update_id")
+        if update_id is not None and (update_id in self._dedup or update_id in self._waiting):
+            self.duplicates += 1
+            return web.json_response({}, dumps=bot.session.json_dumps)
+
+        user_key = update_user_key(update)
+        shard = (user_key if user_key is not None else update_id or 0) % self.workers
+        queue = self._queues[shard]
+        try:
+            queue.put_nowait(update)
+        except asyncio.QueueFull:
+            self._waiting.add(update_id)
+            try:
+                await asyncio.wait_for(queue.put(update), self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                return web.Response(status=503, text="Busy", headers={"Retry-After": "1"})
+            finally:
+                self._waiting.discard(update_id)
+
+        # Only accepted updates count as seen, so a 503'd update is redelivered
+        if update_id is not None:
+            self._dedup.add(update_id)
+        self.accepted += 1
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    async def _worker(self, queue: "asyncio.Queue[Dict[str, Any]]"):
+        while True:
+            update = await queue.get()
+            try:
+                result = await self.dispatcher.feed_raw_update(bot=self.bot, update=update, **self.data)
+                if isinstance(result, TelegramMethod):
+                    await self.dispatcher.silent_call_request(bot=self.bot, result=result)
+            except Exception as e:
+                logger.exception("Failed to process update %s: %s", update.get("update_id"), e)
+            finally:
+                queue.task_done()
+
+    async def close(self) -> None:
+        """Drain queued updates (briefly), stop workers and close the bot session"""
+        try:
+            await asyncio.wait_for(asyncio.gather(*(queue.join() for queue in self._queues)), 5.0)
+        except asyncio.TimeoutError:
+            logger.warning("Webhook queue closed with %d unprocessed updates", self.queue_depth())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await super().close()